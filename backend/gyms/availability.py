@@ -0,0 +1,94 @@
+"""
+Tính khung giờ trống dựa trên giao nhau giữa các khoảng thời gian (interval overlap), bằng NumPy.
+
+Một khung giờ [a, b) giao với lịch hẹn [s, e) khi s < b và e > a. Với mảng `starts`, `ends` đã sắp xếp,
+số lịch hẹn giao với khung giờ là
+    #(s < b) - #(e <= a)
+(mọi lịch hẹn có e <= a cũng có s < b), nên đếm cho mọi khung giờ chỉ cần hai lần `searchsorted`.
+
+Một khung giờ còn trống khi:
+- số lịch hẹn đang diễn ra trong phòng gym chưa đạt `settings.GYM_CAPACITY`;
+- PT được chọn (nếu có) không có lịch hẹn nào giao với khung giờ;
+- hội viên (nếu có) chưa có lịch hẹn nào giao với khung giờ.
+
+Mọi lịch hẹn cần thiết được lấy bằng một câu query theo khoảng `start_time` (có index). Để khoảng quét
+bị chặn dưới, thời lượng một lịch hẹn không vượt quá `MAX_BOOKING_DURATION` (ràng buộc CHECK
+`booking_duration_range` trên bảng Booking, nên đúng với mọi đường ghi).
+"""
+import datetime
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MAX_BOOKING_DURATION, Booking
+
+OPENING_TIME = datetime.time(8, 0)
+CLOSING_TIME = datetime.time(22, 0)
+SLOT_MINUTES = 60
+MAX_RANGE_DAYS = 62
+ACTIVE_STATUSES = ('pending', 'approved')
+
+
+def slot_labels():
+    opening = OPENING_TIME.hour * 60 + OPENING_TIME.minute
+    closing = CLOSING_TIME.hour * 60 + CLOSING_TIME.minute
+    return [f'{minute // 60:02d}:{minute % 60:02d}' for minute in range(opening, closing, SLOT_MINUTES)]
+
+
+def slot_grid(start_date, end_date):
+    """Các ngày trong [start_date, end_date] và mảng (ngày x khung giờ) thời điểm bắt đầu (epoch giây)."""
+    days = [start_date + datetime.timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    offsets = np.arange(len(slot_labels()), dtype=np.float64) * SLOT_MINUTES * 60
+    openings = np.array([
+        timezone.make_aware(datetime.datetime.combine(day, OPENING_TIME)).timestamp() for day in days
+    ])
+    return days, openings[:, None] + offsets[None, :]
+
+
+def count_overlaps(starts, ends, slot_starts, slot_ends):
+    """Số khoảng [starts, ends) giao với mỗi khung giờ; `starts` và `ends` phải được sắp xếp tăng dần (độc lập)."""
+    return np.searchsorted(starts, slot_ends, side='left') - np.searchsorted(ends, slot_starts, side='right')
+
+
+def _sorted_bounds(rows):
+    starts = np.sort(np.array([row[0] for row in rows], dtype=np.float64))
+    ends = np.sort(np.array([row[1] for row in rows], dtype=np.float64))
+    return starts, ends
+
+
+def load_bookings(range_start, range_end):
+    """
+    Các lịch hẹn chưa hủy giao với [range_start, range_end), trong một câu query.
+    Trả về danh sách (pt_id, member_id, start epoch, end epoch).
+    """
+    rows = Booking.objects.filter(
+        start_time__gte=range_start - MAX_BOOKING_DURATION,
+        start_time__lt=range_end,
+        end_time__gt=range_start,
+        status__in=ACTIVE_STATUSES,
+    ).values_list('pt_id', 'member_id', 'start_time', 'end_time')
+    return [(pt_id, member_id, start.timestamp(), end.timestamp()) for pt_id, member_id, start, end in rows]
+
+
+def available_slots(start_date, end_date, pt_id=None, member_id=None, capacity=None):
+    """Trả về {ngày ISO: [các khung giờ 'HH:MM' còn trống]} cho mọi ngày trong [start_date, end_date]."""
+    capacity = settings.GYM_CAPACITY if capacity is None else capacity
+    labels = slot_labels()
+    days, slot_starts = slot_grid(start_date, end_date)
+    slot_ends = slot_starts + SLOT_MINUTES * 60
+
+    range_start = datetime.datetime.fromtimestamp(slot_starts[0, 0], tz=datetime.timezone.utc)
+    range_end = datetime.datetime.fromtimestamp(slot_ends[-1, -1], tz=datetime.timezone.utc)
+    bookings = load_bookings(range_start, range_end)
+
+    free = count_overlaps(*_sorted_bounds([row[2:] for row in bookings]), slot_starts, slot_ends) < capacity
+    for index, key in ((0, pt_id), (1, member_id)):
+        if key is not None:
+            own = [row[2:] for row in bookings if row[index] == key]
+            free &= count_overlaps(*_sorted_bounds(own), slot_starts, slot_ends) == 0
+
+    return {
+        day.isoformat(): [label for label, is_free in zip(labels, row) if is_free]
+        for day, row in zip(days, free.tolist())
+    }
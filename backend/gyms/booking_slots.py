@@ -0,0 +1,57 @@
+"""
+Chống đặt trùng lịch PT bằng bảng ô thời gian (BookingSlot) có ràng buộc unique.
+
+Mỗi lịch hẹn có PT và chưa hủy giữ các ô 15 phút phủ đúng [start_time, end_time): thời gian bắt đầu và
+kết thúc phải nằm trên lưới 15 phút (BookingSerializer và Booking.clean() kiểm tra), nên hai lịch hẹn
+liền kề không bao giờ giữ chung một ô. Việc ghi ô diễn ra trong cùng transaction với lịch hẹn (trong
+Booking.save() và BookingQuerySet.update()): nếu một ô đã bị lịch hẹn khác giữ, INSERT vi phạm unique
+(pt, slot_start) và cả thao tác bị rollback. Hai request đồng thời cho cùng một ô thì request sau chờ
+request trước commit rồi nhận lỗi, thay vì cả hai cùng thành công.
+
+bulk_create/bulk_update không đi qua hai đường trên: nơi gọi phải tự gọi sync_slots cho từng lịch hẹn.
+"""
+import datetime
+
+from django.db import IntegrityError, transaction
+
+from .models import BookingSlot
+
+SLOT_MINUTES = 15
+ACTIVE_STATUSES = ('pending', 'approved')
+
+
+class SlotConflict(Exception):
+    """Khung giờ của PT đã bị lịch hẹn khác giữ."""
+
+
+def on_slot_grid(moment):
+    return moment.second == 0 and moment.microsecond == 0 and moment.minute % SLOT_MINUTES == 0
+
+
+def slot_starts(start_time, end_time):
+    step = datetime.timedelta(minutes=SLOT_MINUTES)
+    current = start_time.replace(minute=start_time.minute - start_time.minute % SLOT_MINUTES, second=0, microsecond=0)
+    starts = []
+    while current < end_time:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def sync_slots(booking):
+    """
+    Đồng bộ các ô của `booking` theo PT, thời gian và trạng thái hiện tại.
+    Được Booking.save() gọi trong transaction của thao tác ghi lịch hẹn; ném SlotConflict nếu bị trùng.
+    """
+    BookingSlot.objects.filter(booking=booking).delete()
+    if booking.pt_id is None or booking.status not in ACTIVE_STATUSES:
+        return
+    try:
+        # Savepoint riêng để lỗi unique không làm hỏng transaction bên ngoài
+        with transaction.atomic():
+            BookingSlot.objects.bulk_create([
+                BookingSlot(booking=booking, pt_id=booking.pt_id, slot_start=start)
+                for start in slot_starts(booking.start_time, booking.end_time)
+            ])
+    except IntegrityError:
+        raise SlotConflict(f"PT {booking.pt_id} đã có lịch hẹn trong khung giờ này.")
@@ -0,0 +1,72 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from gyms.availability import CLOSING_TIME, OPENING_TIME
+from gyms.models import Booking
+from gyms.views import AvailableSlotsView
+from resofit_api.benchmarks import format_latency, rolled_back, time_calls
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark endpoint khung giờ trống (theo ngày, tuần, tháng; có và không có PT) "
+        "trên một lượng lớn lịch hẹn tổng hợp. Dữ liệu được rollback sau khi chạy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--pts', type=int, default=30)
+        parser.add_argument('--members', type=int, default=500)
+        parser.add_argument('--days', type=int, default=365, help="Lịch hẹn trải đều trên số ngày này tính từ hôm nay.")
+        parser.add_argument('--repeat', type=int, default=100)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        factory = APIRequestFactory()
+        view = AvailableSlotsView.as_view()
+        today = timezone.now().date()
+        open_hours = CLOSING_TIME.hour - OPENING_TIME.hour
+
+        with rolled_back():
+            pts = CustomUser.objects.bulk_create([
+                CustomUser(username=f'bench_avail_pt_{i}', role='pt') for i in range(options['pts'])
+            ])
+            members = CustomUser.objects.bulk_create([
+                CustomUser(username=f'bench_avail_member_{i}', role='member') for i in range(options['members'])
+            ])
+            bookings = []
+            for _ in range(options['bookings']):
+                day = today + datetime.timedelta(days=rng.randrange(options['days']))
+                start = timezone.make_aware(datetime.datetime.combine(day, OPENING_TIME)) + datetime.timedelta(
+                    minutes=rng.randrange(open_hours * 4) * 15
+                )
+                bookings.append(Booking(
+                    member=rng.choice(members), pt=rng.choice(pts) if rng.random() < 0.6 else None,
+                    start_time=start, end_time=start + datetime.timedelta(minutes=rng.choice([30, 60, 90, 120])),
+                    status=rng.choice(['pending', 'approved', 'approved', 'cancelled']),
+                ))
+            Booking.objects.bulk_create(bookings, batch_size=5000)
+            self.stdout.write(f"bookings={len(bookings)} pts={len(pts)} days={options['days']}")
+
+            scenarios = {}
+            for label, days in (('day', 1), ('week', 7), ('month', 31)):
+                for with_pt in (False, True):
+                    scenarios[f"{label}{' +pt' if with_pt else ''}"] = (days, with_pt)
+
+            for label, (days, with_pt) in scenarios.items():
+                def call():
+                    start = today + datetime.timedelta(days=rng.randrange(options['days'] - days))
+                    params = {'start': start.isoformat(), 'end': (start + datetime.timedelta(days=days - 1)).isoformat()}
+                    if with_pt:
+                        params['pt_id'] = rng.choice(pts).pk
+                    request = factory.get('/api/gyms/available-slots/', params, HTTP_HOST='localhost')
+                    force_authenticate(request, user=rng.choice(members))
+                    response = view(request)
+                    response.render()
+
+                self.stdout.write("  " + format_latency(label, time_calls(call, options['repeat'])))
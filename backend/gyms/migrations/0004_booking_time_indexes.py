@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0003_membershippackage_image_url_alter_booking_pt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['start_time', 'end_time'], name='booking_start_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['pt', 'start_time'], name='booking_pt_start_idx'),
+        ),
+    ]
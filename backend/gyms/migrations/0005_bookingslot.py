@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:09
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_slots(apps, schema_editor):
+    # Lịch hẹn cũ đã chồng nhau (nếu có) thì lịch hẹn tạo trước giữ ô, không làm hỏng migration
+    Booking = apps.get_model('gyms', 'Booking')
+    BookingSlot = apps.get_model('gyms', 'BookingSlot')
+    bookings = Booking.objects.filter(pt__isnull=False, status__in=['pending', 'approved']).order_by('pk')
+    step = datetime.timedelta(minutes=15)
+    batch = []
+    for booking in bookings.iterator():
+        start = booking.start_time
+        current = start.replace(minute=start.minute - start.minute % 15, second=0, microsecond=0)
+        while current < booking.end_time:
+            batch.append(BookingSlot(booking_id=booking.pk, pt_id=booking.pt_id, slot_start=current))
+            current += step
+        if len(batch) >= 5000:
+            BookingSlot.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    BookingSlot.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0004_booking_time_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_start', models.DateTimeField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='gyms.booking')),
+                ('pt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('pt', 'slot_start'), name='unique_pt_booking_slot')],
+            },
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
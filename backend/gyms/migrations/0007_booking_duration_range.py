@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:08
+
+import datetime
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+MAX_BOOKING_DURATION = datetime.timedelta(hours=4)
+
+
+def check_existing_bookings(apps, schema_editor):
+    Booking = apps.get_model('gyms', 'Booking')
+    invalid = list(
+        Booking.objects.exclude(
+            end_time__gt=models.F('start_time'),
+            end_time__lte=models.F('start_time') + MAX_BOOKING_DURATION,
+        ).values_list('pk', flat=True)[:20]
+    )
+    if invalid:
+        # Không tự sửa dữ liệu: người vận hành quyết định cắt ngắn, tách hay hủy các lịch hẹn này
+        raise RuntimeError(
+            f"Các lịch hẹn sau có thời lượng không hợp lệ (<= 0 hoặc > 4 giờ): {invalid}. "
+            "Hãy sửa chúng trước khi chạy migration này."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gyms', '0006_booking_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_existing_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time')), ('end_time__lte', django.db.models.expressions.CombinedExpression(models.F('start_time'), '+', models.Value(datetime.timedelta(seconds=14400))))), name='booking_duration_range', violation_error_message='Thời gian kết thúc phải sau thời gian bắt đầu và một lịch hẹn không được dài quá 4 giờ.'),
+        ),
+    ]
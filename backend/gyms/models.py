@@ -1,6 +1,12 @@
-from django.db import models
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.conf import settings
 
+# Thời lượng tối đa của một lịch hẹn; gyms/availability.py dựa vào giới hạn này để chặn khoảng quét
+MAX_BOOKING_DURATION = datetime.timedelta(hours=4)
+
 class MembershipPackage(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -12,6 +18,28 @@ class MembershipPackage(models.Model):
     def __str__(self):
         return self.name
 
+# Các trường quyết định ô thời gian mà lịch hẹn giữ (xem gyms/booking_slots.py)
+SLOT_FIELDS = frozenset({'pt', 'pt_id', 'start_time', 'end_time', 'status'})
+
+
+class BookingQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """
+        Cập nhật hàng loạt không gọi save(), nên khi đổi PT, thời gian hoặc trạng thái thì đồng bộ lại
+        ô thời gian của các lịch hẹn bị ảnh hưởng trong cùng transaction (trùng lịch => SlotConflict).
+        """
+        if not SLOT_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        from .booking_slots import sync_slots
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            count = super().update(**kwargs)
+            for booking in self.model._base_manager.using(self.db).filter(pk__in=pks).only(*SLOT_FIELDS):
+                sync_slots(booking)
+        return count
+
+
 class Booking(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -40,6 +68,66 @@ class Booking(models.Model):
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Truy vấn khoảng thời gian của gyms/availability.py
+            models.Index(fields=['start_time', 'end_time'], name='booking_start_end_idx'),
+            models.Index(fields=['pt', 'start_time'], name='booking_pt_start_idx'),
+            # Danh sách lịch hẹn (gyms/views.py): lọc theo người dùng, trạng thái và sắp/phân trang theo start_time
+            models.Index(fields=['member', 'start_time'], name='booking_member_start_idx'),
+            models.Index(fields=['member', 'status', 'start_time'], name='booking_member_status_idx'),
+            models.Index(fields=['pt', 'status', 'start_time'], name='booking_pt_status_idx'),
+        ]
+        constraints = [
+            # Áp dụng cho mọi đường ghi (API, admin, script), không chỉ BookingSerializer
+            models.CheckConstraint(
+                condition=models.Q(end_time__gt=models.F('start_time'))
+                & models.Q(end_time__lte=models.F('start_time') + MAX_BOOKING_DURATION),
+                name='booking_duration_range',
+                violation_error_message=(
+                    f"Thời gian kết thúc phải sau thời gian bắt đầu và một lịch hẹn không được dài quá "
+                    f"{MAX_BOOKING_DURATION.total_seconds() / 3600:g} giờ."
+                ),
+            ),
+        ]
+
+    objects = BookingQuerySet.as_manager()
+
+    def clean(self):
+        from .booking_slots import SLOT_MINUTES, on_slot_grid
+        for field in ('start_time', 'end_time'):
+            value = getattr(self, field)
+            if value is not None and not on_slot_grid(value):
+                raise ValidationError({field: f"Thời gian phải là bội số của {SLOT_MINUTES} phút."})
+
+    def save(self, *args, **kwargs):
+        # Mọi đường ghi (API, admin, script) đều giữ/nhả ô thời gian của PT trong cùng transaction
+        from .booking_slots import sync_slots
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if update_fields is None or SLOT_FIELDS.intersection(update_fields):
+                sync_slots(self)
+
     def __str__(self):
         pt_name = f" with {self.pt.username}" if self.pt else " (self-practice)"
         return f"Booking for {self.member.username} at {self.start_time.strftime('%Y-%m-%d %H:%M')}{pt_name}"
+
+
+class BookingSlot(models.Model):
+    """
+    Các ô 15 phút mà một lịch hẹn có PT đang giữ trên lịch của PT đó (xem gyms/booking_slots.py).
+    Ràng buộc unique (pt, slot_start) để database từ chối hai lịch hẹn chồng nhau của cùng một PT,
+    kể cả khi hai request chạy đồng thời; chỉ khóa các dòng bị trùng, không khóa cả bảng.
+    """
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='slots')
+    pt = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='booked_slots')
+    slot_start = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pt', 'slot_start'], name='unique_pt_booking_slot'),
+        ]
+
+    def __str__(self):
+        return f"PT {self.pt_id} busy at {self.slot_start:%Y-%m-%d %H:%M} (booking {self.booking_id})"
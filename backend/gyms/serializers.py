@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import MembershipPackage, Booking
+from .models import MAX_BOOKING_DURATION, MembershipPackage, Booking
 from users.serializers import UserSerializer
+from .booking_slots import SLOT_MINUTES, on_slot_grid
 
 
 class MembershipPackageSerializer(serializers.ModelSerializer):
@@ -23,4 +24,13 @@ class BookingSerializer(serializers.ModelSerializer):
 
         if start_time and end_time and start_time >= end_time:
             raise serializers.ValidationError("Thời gian kết thúc phải sau thời gian bắt đầu.")
+        if start_time and end_time and end_time - start_time > MAX_BOOKING_DURATION:
+            raise serializers.ValidationError(
+                f"Một lịch hẹn không được dài quá {MAX_BOOKING_DURATION.total_seconds() / 3600:g} giờ."
+            )
+        # Ô thời gian của PT được giữ theo lưới này (xem gyms/booking_slots.py)
+        if any(moment and not on_slot_grid(moment) for moment in (start_time, end_time)):
+            raise serializers.ValidationError(
+                f"Thời gian bắt đầu và kết thúc phải là bội số của {SLOT_MINUTES} phút."
+            )
         return data
\ No newline at end of file
@@ -1,3 +1,222 @@
-from django.test import TestCase
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipIf
 
-# Create your tests here.
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import CustomUser
+from .availability import count_overlaps, slot_labels
+from .booking_slots import SlotConflict
+from .models import Booking, BookingSlot
+
+DAY = datetime.date(2030, 1, 7)
+
+
+def at(hour, minute=0, day=DAY):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour, minute)))
+
+
+@override_settings(GYM_CAPACITY=2)
+class AvailabilityTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.other = CustomUser.objects.create_user(username='other', password='pass', role='member')
+        self.pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def book(self, start, end, pt=None, member=None, status='approved'):
+        return Booking.objects.create(member=member or self.other, pt=pt, start_time=start, end_time=end, status=status)
+
+    def slots(self, **params):
+        response = self.client.get('/api/gyms/available-slots/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_count_overlaps(self):
+        starts, ends = np.array([0.0, 5.0, 10.0]), np.array([6.0, 10.0, 12.0])
+        slot_starts = np.array([0.0, 6.0, 10.0, 12.0])
+        np.testing.assert_array_equal(count_overlaps(starts, ends, slot_starts, slot_starts + 2), [1, 1, 1, 0])
+
+    def test_pt_calendar_uses_overlaps(self):
+        self.book(at(9, 30), at(10, 30), pt=self.pt)
+        self.book(at(13), at(14), pt=self.pt, status='cancelled')
+
+        pt_slots = self.slots(date=DAY.isoformat(), pt_id=self.pt.pk)
+        self.assertNotIn('09:00', pt_slots)
+        self.assertNotIn('10:00', pt_slots)
+        self.assertIn('13:00', pt_slots)
+        self.assertEqual(self.slots(date=DAY.isoformat()), slot_labels())
+
+    def test_gym_capacity_and_own_bookings(self):
+        self.book(at(15), at(16))
+        self.assertIn('15:00', self.slots(date=DAY.isoformat()))
+        self.book(at(15, 30), at(17))
+        self.assertNotIn('15:00', self.slots(date=DAY.isoformat()))
+        self.assertIn('17:00', self.slots(date=DAY.isoformat()))
+
+        self.book(at(8), at(9), member=self.member)
+        self.assertNotIn('08:00', self.slots(date=DAY.isoformat()))
+
+    def test_range_in_one_query(self):
+        self.book(at(20, day=DAY + datetime.timedelta(days=3)), at(21, day=DAY + datetime.timedelta(days=3)), pt=self.pt)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.slots(start=DAY.isoformat(), end=(DAY + datetime.timedelta(days=6)).isoformat(), pt_id=self.pt.pk)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(data), 7)
+        self.assertNotIn('20:00', data[(DAY + datetime.timedelta(days=3)).isoformat()])
+        self.assertIn('20:00', data[DAY.isoformat()])
+
+        response = self.client.get('/api/gyms/available-slots/', {'start': '2030-03-01', 'end': '2030-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_duration_is_enforced_outside_the_serializer(self):
+        # Lịch hẹn dài hơn MAX_BOOKING_DURATION sẽ lọt khỏi khoảng quét của load_bookings
+        too_long = Booking(member=self.other, start_time=at(8), end_time=at(12, 1))
+        with self.assertRaises(ValidationError):
+            too_long.full_clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            too_long.save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(at(10), at(10))
+
+        self.book(at(8), at(12), member=self.member)
+        self.assertNotIn('11:00', self.slots(date=DAY.isoformat()))
+        self.assertIn('12:00', self.slots(date=DAY.isoformat()))
+
+
+class BookingSlotTests(TestCase):
+
+    def setUp(self):
+        self.pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        self.other_pt = CustomUser.objects.create_user(username='pt2', password='pass', role='pt')
+        self.members = [
+            CustomUser.objects.create_user(username=f'member{i}', password='pass', role='member') for i in range(3)
+        ]
+
+    def request_booking(self, member, start, end, pt=None):
+        client = APIClient()
+        client.force_authenticate(member)
+        return client.post('/api/gyms/bookings/', {
+            'start_time': start.isoformat(), 'end_time': end.isoformat(), 'pt_id': (pt or self.pt).pk,
+        }, format='json')
+
+    def test_overlapping_pt_booking_is_rejected(self):
+        first = self.request_booking(self.members[0], at(10), at(11))
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(BookingSlot.objects.filter(booking_id=first.data['id']).count(), 4)
+
+        conflict = self.request_booking(self.members[1], at(10, 30), at(11, 30))
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(self.request_booking(self.members[1], at(11), at(12)).status_code, 201)
+        self.assertEqual(self.request_booking(self.members[2], at(10), at(11), pt=self.other_pt).status_code, 201)
+
+    def test_rejected_booking_releases_its_slots(self):
+        booking_id = self.request_booking(self.members[0], at(10), at(11)).data['id']
+        client = APIClient()
+        client.force_authenticate(self.pt)
+        self.assertEqual(client.post(f'/api/gyms/bookings/{booking_id}/reject/').status_code, 200)
+        self.assertFalse(BookingSlot.objects.filter(booking_id=booking_id).exists())
+        self.assertEqual(self.request_booking(self.members[1], at(10, 15), at(10, 45)).status_code, 201)
+
+    def test_times_must_be_on_the_slot_grid(self):
+        # 10:05–10:20 và 10:20–10:35 đều làm tròn ra ô 10:15 và báo trùng giả (409)
+        self.assertEqual(self.request_booking(self.members[0], at(10, 5), at(10, 20)).status_code, 400)
+        self.assertEqual(self.request_booking(self.members[0], at(10), at(10, 20)).status_code, 400)
+        with self.assertRaises(ValidationError):
+            Booking(member=self.members[0], start_time=at(10, 5), end_time=at(10, 30)).full_clean()
+
+        self.assertEqual(self.request_booking(self.members[0], at(10), at(10, 15)).status_code, 201)
+        self.assertEqual(self.request_booking(self.members[1], at(10, 15), at(10, 30)).status_code, 201)
+
+    def test_status_changes_outside_the_api_sync_slots(self):
+        booking = Booking.objects.create(member=self.members[0], pt=self.pt, start_time=at(10), end_time=at(11))
+        self.assertEqual(BookingSlot.objects.filter(booking=booking).count(), 4)
+
+        booking.status = 'cancelled'
+        booking.save(update_fields=['status'])
+        self.assertFalse(BookingSlot.objects.filter(booking=booking).exists())
+
+        Booking.objects.filter(pk=booking.pk).update(status='approved')
+        self.assertEqual(BookingSlot.objects.filter(booking=booking).count(), 4)
+        Booking.objects.filter(pk=booking.pk).update(status='cancelled')
+        self.assertFalse(BookingSlot.objects.filter(booking=booking).exists())
+
+        # Ô đã được nhả: lịch hẹn khác giữ được, và bật lại lịch hẹn cũ thì bị từ chối
+        self.assertEqual(self.request_booking(self.members[1], at(10), at(11)).status_code, 201)
+        with self.assertRaises(SlotConflict):
+            Booking.objects.filter(pk=booking.pk).update(status='approved')
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'cancelled')
+
+
+# SQLite khóa cả database khi ghi đồng thời nên không kiểm tra được ở đây
+@skipIf(connection.vendor == 'sqlite', "Cần database hỗ trợ ghi đồng thời (PostgreSQL/MySQL).")
+class BookingSlotConcurrencyTests(TransactionTestCase):
+
+    def test_parallel_requests_for_one_slot(self):
+        pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        members = [CustomUser.objects.create_user(username=f'member{i}', password='pass', role='member') for i in range(32)]
+
+        def book(member):
+            try:
+                client = APIClient()
+                client.force_authenticate(member)
+                return client.post('/api/gyms/bookings/', {
+                    'start_time': at(18).isoformat(), 'end_time': at(19).isoformat(), 'pt_id': pt.pk,
+                }, format='json').status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            codes = list(executor.map(book, members))
+        self.assertEqual(sorted(codes), [201] + [409] * 31)
+        self.assertEqual(Booking.objects.filter(pt=pt).count(), 1)
+        self.assertEqual(BookingSlot.objects.filter(pt=pt).count(), 4)
+
+
+class BookingListTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        statuses = ['pending', 'approved', 'cancelled']
+        for index in range(25):
+            start = at(9, day=DAY + datetime.timedelta(days=index))
+            Booking.objects.create(member=self.member, pt=self.pt if index % 2 else None, start_time=start,
+                                   end_time=start + datetime.timedelta(hours=1), status=statuses[index % 3])
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_keyset_pages_in_one_query_each(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get('/api/gyms/bookings/').data
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(first['results']), 20)
+        self.assertEqual(first['results'][0]['start_time'], at(9, day=DAY + datetime.timedelta(days=24)).isoformat().replace('+00:00', 'Z'))
+        self.assertEqual(first['results'][1]['pt']['username'], 'pt')
+
+        second = self.client.get(first['next']).data
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_filters(self):
+        data = self.client.get('/api/gyms/bookings/', {
+            'status': 'pending,approved', 'from': (DAY + datetime.timedelta(days=3)).isoformat(),
+            'to': (DAY + datetime.timedelta(days=9)).isoformat(), 'order': 'asc',
+        }).data
+        self.assertEqual(
+            [row['start_time'][:10] for row in data['results']],
+            [(DAY + datetime.timedelta(days=offset)).isoformat() for offset in (3, 4, 6, 7)],
+        )
+        self.client.force_authenticate(self.pt)
+        self.assertEqual(len(self.client.get('/api/gyms/bookings/', {'page_size': 100}).data['results']), 12)
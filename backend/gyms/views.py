@@ -9,9 +9,30 @@ from users.permissions import IsMemberOrAssignedPT, IsPT
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime, time, timedelta
+from datetime import datetime
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.pagination import CursorPagination
 from resofit_api.push_notifications import send_push_message
+from .availability import MAX_RANGE_DAYS, available_slots
+from .booking_slots import SlotConflict
+
+def parse_moment(value):
+    """Ngày (YYYY-MM-DD, tính từ 00:00) hoặc thời điểm ISO 8601; trả về datetime có múi giờ, None nếu không hợp lệ."""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, datetime.min.time()) if day else None
+    except ValueError:
+        return None
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
 
 class MembershipPackageViewSet(viewsets.ModelViewSet):
     queryset = MembershipPackage.objects.all()
@@ -19,44 +40,88 @@ class MembershipPackageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsManagerOrReadOnly]
 
 
+class BookingCursorPagination(CursorPagination):
+    """
+    Phân trang theo khóa (keyset) trên start_time: mặc định mới nhất trước, `order=asc` để lấy sắp tới trước.
+    Khớp với các index (member|pt, [status,] start_time) của Booking.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-start_time', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('order') == 'asc':
+            return ('start_time', 'id')
+        return self.ordering
+
+
 class BookingViewSet(viewsets.ModelViewSet):
+    """
+    Lịch hẹn của hội viên/PT, phân trang bằng cursor. Bộ lọc (thực hiện trong SQL):
+    `status` (có thể nhiều giá trị, phân tách bằng dấu phẩy), `from`/`to` (ngày hoặc thời điểm ISO 8601,
+    lọc start_time trong [from, to)), `member_id` (PT xem lịch của một hội viên).
+    """
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated, IsMemberOrAssignedPT]
+    pagination_class = BookingCursorPagination
 
     def get_queryset(self):
         user = self.request.user
+        params = self.request.query_params
 
         # Lấy member_id từ query params (ví dụ: ?member_id=5)
-        member_id_filter = self.request.query_params.get('member_id', None)
+        member_id_filter = params.get('member_id', None)
 
         # Kịch bản 1: PT muốn xem lịch của một hội viên cụ thể
         if user.role == 'pt' and member_id_filter:
             # TODO (Nâng cao): Kiểm tra xem PT này có quyền xem hội viên này không
-            return Booking.objects.filter(member_id=member_id_filter).order_by('-start_time')
+            queryset = Booking.objects.filter(member_id=member_id_filter)
 
         # Kịch bản 2: PT muốn xem lịch của chính mình
-        if user.role == 'pt':
-            return Booking.objects.filter(pt=user).order_by('-start_time')
+        elif user.role == 'pt':
+            queryset = Booking.objects.filter(pt=user)
 
         # Kịch bản 3: Member muốn xem lịch của chính mình
-        if user.role == 'member':
-            return Booking.objects.filter(member=user).order_by('-start_time')
+        elif user.role == 'member':
+            queryset = Booking.objects.filter(member=user)
 
         # Trả về rỗng cho các trường hợp khác
-        return Booking.objects.none()
+        else:
+            return Booking.objects.none()
+
+        if self.action != 'list':
+            return queryset.select_related('member', 'pt')
+
+        statuses = [value for value in params.get('status', '').split(',') if value]
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        for param, lookup in (('from', 'start_time__gte'), ('to', 'start_time__lt')):
+            moment = parse_moment(params.get(param))
+            if moment is not None:
+                queryset = queryset.filter(**{lookup: moment})
+
+        # member và pt được JOIN trong cùng câu query thay vì tải lười từng dòng
+        return queryset.select_related('member', 'pt')
 
     @action(detail=True, methods=['post'], permission_classes=[IsPT])
     def approve(self, request, pk=None):
         booking = self.get_object()
         if booking.status == 'pending':
-            booking.status = 'approved'
-            booking.save()
-            member = booking.member
-            if member.expo_push_token:
-                title = "Lịch hẹn được Xác nhận!"
-                message = f"Lịch hẹn của bạn với PT {request.user.username} vào lúc {booking.start_time.strftime('%H:%M %d/%m')} đã được xác nhận."
-                send_push_message(member.expo_push_token, title, message)
+            try:
+                with transaction.atomic():
+                    booking.status = 'approved'
+                    # save() giữ lại ô thời gian của PT (xem gyms/booking_slots.py)
+                    booking.save()
+                    # Thông báo được ghi vào outbox trong cùng transaction với lịch hẹn
+                    member = booking.member
+                    if member.expo_push_token:
+                        title = "Lịch hẹn được Xác nhận!"
+                        message = f"Lịch hẹn của bạn với PT {request.user.username} vào lúc {booking.start_time.strftime('%H:%M %d/%m')} đã được xác nhận."
+                        send_push_message(member.expo_push_token, title, message)
+            except SlotConflict as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
             return Response({'status': 'booking approved'})
         return Response({'status': 'booking was not in pending state'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -64,18 +129,31 @@ class BookingViewSet(viewsets.ModelViewSet):
     def reject(self, request, pk=None):
         booking = self.get_object()
         if booking.status == 'pending':
-            booking.status = 'cancelled'
-            booking.save()
-            member = booking.member
-            if member.expo_push_token:
-                title = "Lịch hẹn bị từ chối"
-                message = f"Rất tiếc, lịch hẹn của bạn với PT {request.user.username} vào lúc {booking.start_time.strftime('%H:%M %d/%m')} đã không thể xác nhận."
-                # Gửi kèm data để frontend có thể điều hướng
-                extra_data = {'screen': 'MyBookings'}
-                send_push_message(member.expo_push_token, title, message, extra_data)
+            with transaction.atomic():
+                booking.status = 'cancelled'
+                booking.save()
+                member = booking.member
+                if member.expo_push_token:
+                    title = "Lịch hẹn bị từ chối"
+                    message = f"Rất tiếc, lịch hẹn của bạn với PT {request.user.username} vào lúc {booking.start_time.strftime('%H:%M %d/%m')} đã không thể xác nhận."
+                    # Gửi kèm data để frontend có thể điều hướng
+                    extra_data = {'screen': 'MyBookings'}
+                    send_push_message(member.expo_push_token, title, message, extra_data)
             return Response({'status': 'booking rejected'})
         return Response({'status': 'booking was not in pending state'}, status=status.HTTP_400_BAD_REQUEST)
 
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except SlotConflict as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except SlotConflict as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+
     def perform_create(self, serializer):
         pt_id = self.request.data.get('pt_id')
         pt_instance = None
@@ -86,11 +164,13 @@ class BookingViewSet(viewsets.ModelViewSet):
                 booking_status = 'pending'
             except CustomUser.DoesNotExist:
                 pass
-        serializer.save(member=self.request.user, pt=pt_instance, status=booking_status)
-        if booking_status == 'pending' and pt_instance and pt_instance.expo_push_token:
-            title = "Yêu cầu Đặt lịch Mới"
-            message = f"Bạn có một yêu cầu đặt lịch mới từ hội viên {self.request.user.username}."
-            send_push_message(pt_instance.expo_push_token, title, message)
+        # Trùng lịch PT => SlotConflict, lịch hẹn vừa tạo bị rollback
+        with transaction.atomic():
+            serializer.save(member=self.request.user, pt=pt_instance, status=booking_status)
+            if booking_status == 'pending' and pt_instance and pt_instance.expo_push_token:
+                title = "Yêu cầu Đặt lịch Mới"
+                message = f"Bạn có một yêu cầu đặt lịch mới từ hội viên {self.request.user.username}."
+                send_push_message(pt_instance.expo_push_token, title, message)
 
 class BookedSlotsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -107,46 +187,51 @@ class BookedSlotsView(APIView):
             member=request.user,
             start_time__year=year,
             start_time__month=month
-        )
+        ).select_related('member', 'pt')
         serializer = BookingSerializer(bookings, many=True)
         return Response(serializer.data)
 
 
 class AvailableSlotsView(APIView):
+    """
+    Khung giờ trống (xem gyms/availability.py).
+    - `date=YYYY-MM-DD`: trả về danh sách 'HH:MM' của ngày đó (như trước).
+    - `start=...&end=...`: trả về {ngày: [khung giờ]} cho cả khoảng (tối đa MAX_RANGE_DAYS ngày) trong một lần gọi.
+    - `pt_id` (tùy chọn): chỉ giữ các khung giờ PT đó còn rảnh.
+    Khung giờ hội viên đã có lịch hẹn cũng bị loại.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        date_str = request.query_params.get('date')
-        if not date_str:
+        params = request.query_params
+        date_str = params.get('date')
+        if not date_str and not (params.get('start') and params.get('end')):
             return Response({"error": "Date parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            if date_str:
+                start_date = end_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            else:
+                start_date = datetime.strptime(params['start'], '%Y-%m-%d').date()
+                end_date = datetime.strptime(params['end'], '%Y-%m-%d').date()
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (end_date - start_date).days < MAX_RANGE_DAYS:
+            return Response({"error": f"end must be on or after start and within {MAX_RANGE_DAYS} days."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        opening_time = time(8, 0)
-        closing_time = time(22, 0)
-        all_slots_naive = []
-        current_datetime = datetime.combine(selected_date, opening_time)
-        while current_datetime.time() < closing_time:
-            all_slots_naive.append(current_datetime)
-            current_datetime += timedelta(hours=1)
-
-        booked_slots = Booking.objects.filter(
-            start_time__date=selected_date,
-            status='approved'
-        ).values_list('start_time', flat=True)
-
-        current_tz = timezone.get_current_timezone()
-        booked_slots_naive = [slot.astimezone(current_tz).replace(tzinfo=None) for slot in booked_slots]
-
-        available_slots = [
-            slot.strftime('%H:%M') for slot in all_slots_naive
-            if slot not in booked_slots_naive
-        ]
+        pt_id = params.get('pt_id')
+        if pt_id is not None:
+            try:
+                pt_id = int(pt_id)
+            except ValueError:
+                return Response({"error": "pt_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        member_id = request.user.id if request.user.role == 'member' else None
 
-        return Response(available_slots)
+        slots = available_slots(start_date, end_date, pt_id=pt_id, member_id=member_id)
+        if date_str:
+            return Response(slots[start_date.isoformat()])
+        return Response(slots)
 
 
 class UpcomingBookingView(APIView):
@@ -158,7 +243,7 @@ class UpcomingBookingView(APIView):
             member=request.user,
             start_time__gte=now,
             status='approved'
-        ).order_by('start_time').first()
+        ).select_related('member', 'pt').order_by('start_time').first()
 
         if upcoming_booking:
             serializer = BookingSerializer(upcoming_booking)
@@ -0,0 +1,67 @@
+"""
+Client Expo Push API dùng chung một `requests.Session` (giữ kết nối keep-alive), có timeout cho mọi lời gọi.
+
+Lỗi được chia làm hai loại:
+- `ExpoTransportError`: lỗi tạm thời (timeout, mất kết nối, HTTP 429/5xx) — cả lô sẽ được gửi lại sau.
+- `ExpoRequestError`: Expo từ chối cả request (HTTP 4xx khác) — gửi lại cũng không thành công.
+"""
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Giới hạn của Expo: tối đa 100 tin mỗi request gửi, 1000 id mỗi request lấy receipt
+MAX_MESSAGES_PER_REQUEST = 100
+MAX_RECEIPT_IDS_PER_REQUEST = 1000
+DEFAULT_TIMEOUT = (3.05, 10)  # (kết nối, đọc) tính bằng giây
+
+
+class ExpoTransportError(Exception):
+    pass
+
+
+class ExpoRequestError(Exception):
+    pass
+
+
+class ExpoPushClient:
+    def __init__(self, base_url=None, access_token=None, timeout=DEFAULT_TIMEOUT, pool_size=10):
+        self.base_url = (base_url or settings.EXPO_PUSH_API_URL).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount(self.base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Content-Type': 'application/json',
+        })
+        access_token = access_token or settings.EXPO_ACCESS_TOKEN
+        if access_token:
+            self.session.headers['Authorization'] = f'Bearer {access_token}'
+
+    def _post(self, path, payload):
+        try:
+            response = self.session.post(f'{self.base_url}/{path}', json=payload, timeout=self.timeout)
+        except requests.RequestException as exc:
+            raise ExpoTransportError(f"{type(exc).__name__}: {exc}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ExpoTransportError(f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise ExpoRequestError(f"HTTP {response.status_code}: {response.text[:500]}")
+        try:
+            return response.json()
+        except ValueError:
+            raise ExpoTransportError("Invalid JSON response")
+
+    def send(self, messages):
+        """Gửi tối đa 100 tin; trả về danh sách ticket theo đúng thứ tự các tin."""
+        tickets = self._post('send', messages).get('data') or []
+        if len(tickets) != len(messages):
+            raise ExpoTransportError(f"Expected {len(messages)} tickets, got {len(tickets)}")
+        return tickets
+
+    def get_receipts(self, ticket_ids):
+        """Trả về {ticket_id: receipt}; ticket chưa có receipt thì không xuất hiện."""
+        return self._post('getReceipts', {'ids': list(ticket_ids)}).get('data') or {}
+
+    def close(self):
+        self.session.close()
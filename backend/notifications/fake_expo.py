@@ -0,0 +1,105 @@
+"""
+Server Expo Push giả lập (HTTP thật trên 127.0.0.1) dùng cho test và lệnh bench_push_outbox.
+
+    with FakeExpoServer(latency=0.05) as server:
+        client = ExpoPushClient(base_url=server.base_url)
+
+- `latency`: số giây chờ trước khi trả lời mỗi request.
+- `fail_next`: số request tiếp theo trả HTTP 500.
+- `invalid_tokens`: token nhận ticket lỗi DeviceNotRegistered.
+- `rejected_tokens`: lô có chứa token này bị trả HTTP 400 (lỗi kiểm tra dữ liệu của cả request).
+- `receipt_errors`: {ticket_id: mã lỗi} trả về khi lấy receipt.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        fake = self.server.fake
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        if fake.latency:
+            time.sleep(fake.latency)
+        with fake.lock:
+            fake.requests += 1
+            failing = fake.fail_next > 0
+            if failing:
+                fake.fail_next -= 1
+        if failing:
+            return self._reply(500, {'errors': [{'code': 'INTERNAL_SERVER_ERROR'}]})
+
+        path = self.path.rstrip('/').rsplit('/', 1)[-1]
+        if path == 'send' and any(message['to'] in fake.rejected_tokens for message in payload):
+            return self._reply(400, {'errors': [{'code': 'VALIDATION_ERROR', 'message': '"to" is not a valid push token'}]})
+        if path == 'send':
+            return self._reply(200, {'data': [fake.ticket(message) for message in payload]})
+        if path == 'getReceipts':
+            return self._reply(200, {'data': fake.receipts(payload['ids'])})
+        return self._reply(404, {'errors': [{'code': 'NOT_FOUND'}]})
+
+    def _reply(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeExpoServer:
+    def __init__(self, latency=0.0, fail_next=0, invalid_tokens=(), rejected_tokens=(), receipt_errors=None):
+        self.latency = latency
+        self.fail_next = fail_next
+        self.invalid_tokens = set(invalid_tokens)
+        self.rejected_tokens = set(rejected_tokens)
+        self.receipt_errors = dict(receipt_errors or {})
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.messages = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/--/api/v2/push'
+
+    def ticket(self, message):
+        with self.lock:
+            self.messages.append(message)
+        if message['to'] in self.invalid_tokens:
+            return {
+                'status': 'error', 'message': f"{message['to']} is not a registered push notification recipient",
+                'details': {'error': 'DeviceNotRegistered'},
+            }
+        return {'status': 'ok', 'id': str(uuid.uuid4())}
+
+    def receipts(self, ids):
+        result = {}
+        for ticket_id in ids:
+            error = self.receipt_errors.get(ticket_id)
+            result[ticket_id] = {'status': 'ok'} if error is None else {
+                'status': 'error', 'message': error, 'details': {'error': error},
+            }
+        return result
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
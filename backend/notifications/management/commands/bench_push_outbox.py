@@ -0,0 +1,59 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notifications.expo import ExpoPushClient
+from notifications.fake_expo import FakeExpoServer
+from notifications.models import PushOutbox
+from notifications.outbox import drain_outbox, enqueue_push
+from resofit_api.benchmarks import rolled_back
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark gửi push notification qua outbox với server Expo giả lập (có độ trễ mạng), "
+        "so với cách cũ gửi từng tin một. Dữ liệu được rollback sau khi chạy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=10000)
+        parser.add_argument('--latency', type=float, default=0.05, help="Độ trễ (giây) mỗi request tới server giả lập.")
+        parser.add_argument('--legacy-messages', type=int, default=200, help="Số tin gửi theo cách cũ để ước lượng.")
+
+    def handle(self, *args, **options):
+        total = options['messages']
+        with FakeExpoServer(latency=options['latency']) as server:
+            # Cách cũ: mỗi tin một request, không dùng lại kết nối, request người dùng phải chờ
+            started = time.perf_counter()
+            for index in range(options['legacy_messages']):
+                requests.post(f'{server.base_url}/send', json=[{
+                    'to': f'ExponentPushToken[legacy-{index}]', 'title': 'Bench', 'body': 'Bench', 'data': {},
+                }])
+            per_message = (time.perf_counter() - started) / options['legacy_messages']
+            self.stdout.write(
+                f"legacy: {per_message * 1000:.2f}ms/message => ~{per_message * total:.1f}s "
+                f"for {total} messages (blocking the request)"
+            )
+
+            for workers in (1, 4):
+                with rolled_back():
+                    started = time.perf_counter()
+                    with transaction.atomic():
+                        for index in range(total):
+                            enqueue_push(f'ExponentPushToken[bench-{index}]', 'Bench', f'Message {index}')
+                    enqueue_ms = (time.perf_counter() - started) * 1000 / total
+
+                    client = ExpoPushClient(base_url=server.base_url, pool_size=workers)
+                    requests_before = server.requests
+                    started = time.perf_counter()
+                    stats = drain_outbox(client, workers=workers)
+                    elapsed = time.perf_counter() - started
+                    client.close()
+                    self.stdout.write(
+                        f"outbox workers={workers}: enqueue {enqueue_ms:.3f}ms/message, "
+                        f"drained {stats['sent']} in {elapsed:.2f}s ({stats['sent'] / elapsed:.0f} msg/s), "
+                        f"{server.requests - requests_before} HTTP requests, "
+                        f"pending={PushOutbox.objects.filter(status='pending').count()}"
+                    )
@@ -0,0 +1,40 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.expo import ExpoPushClient
+from notifications.outbox import check_receipts, drain_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker gửi push notification từ outbox: gửi các tin đến hạn theo lô 100 tin qua một session dùng chung, "
+        "gửi lại lỗi tạm thời với backoff, rồi cập nhật trạng thái theo receipt của Expo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Chạy một lượt rồi thoát (dùng với cron).")
+        parser.add_argument('--interval', type=float, default=2.0, help="Số giây nghỉ khi outbox trống.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4, help="Số lô gửi song song.")
+        parser.add_argument('--receipt-delay', type=int, default=15, help="Số phút chờ trước khi lấy receipt.")
+
+    def handle(self, *args, **options):
+        client = ExpoPushClient(pool_size=options['workers'])
+        receipt_delay = datetime.timedelta(minutes=options['receipt_delay'])
+        try:
+            while True:
+                close_old_connections()
+                sent = drain_outbox(client, batch_size=options['batch_size'], workers=options['workers'])
+                receipts = check_receipts(client, delay=receipt_delay)
+                if sent['batches'] or any(receipts.values()):
+                    self.stdout.write(f"{sent} receipts={receipts}")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            client.close()
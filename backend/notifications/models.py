@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class PushOutbox(models.Model):
+    """
+    Hàng đợi (transactional outbox) các push notification gửi qua Expo.
+    Request chỉ ghi một dòng vào bảng này trong transaction của nó; lệnh `drain_push_outbox`
+    gửi theo lô và cập nhật trạng thái (xem notifications/outbox.py).
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),      # Chờ gửi (hoặc chờ gửi lại sau lỗi tạm thời)
+        ('sent', 'Sent'),            # Expo đã nhận (có ticket), chờ kiểm tra receipt
+        ('delivered', 'Delivered'),  # Receipt báo đã chuyển tới APNs/FCM
+        ('failed', 'Failed'),        # Lỗi vĩnh viễn hoặc hết số lần thử
+    )
+
+    token = models.CharField(max_length=255)
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Thời điểm sớm nhất được gửi (lại); cũng dùng làm "hợp đồng thuê" khi một worker đang gửi
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    ticket_id = models.CharField(max_length=64, blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='push_outbox_due_idx'),
+            models.Index(fields=['status', 'sent_at'], name='push_outbox_receipt_idx'),
+        ]
+
+    def __str__(self):
+        return f"Push {self.pk} to {self.token} ({self.status})"
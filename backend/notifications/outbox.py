@@ -0,0 +1,231 @@
+"""
+Transactional outbox cho push notification.
+
+- `enqueue_push` chỉ ghi một dòng PushOutbox trong transaction của request: nếu request rollback thì
+  thông báo cũng không được gửi, và request không bao giờ phải chờ Expo.
+- `drain_outbox` (lệnh `drain_push_outbox`) nhận các dòng đến hạn theo lô 100 tin (giới hạn của Expo),
+  gửi song song qua một session dùng chung và ghi kết quả. Khi nhận lô, dòng được "thuê" bằng cách dời
+  `next_attempt_at` thêm `LEASE`; nếu worker chết giữa chừng, dòng tự đến hạn lại sau khi hết hạn thuê.
+  Trên database hỗ trợ SKIP LOCKED, nhiều worker chạy song song không nhận trùng dòng.
+- Lỗi tạm thời (timeout, HTTP 429/5xx, MessageRateExceeded) được gửi lại với backoff lũy thừa,
+  tối đa `MAX_ATTEMPTS` lần. Lô bị Expo từ chối (HTTP 4xx) được chia đôi để chỉ tin lỗi bị đánh dấu thất bại.
+- `check_receipts` lấy receipt của các tin đã gửi (sau `RECEIPT_DELAY`, như Expo khuyến nghị);
+  token báo DeviceNotRegistered bị xóa khỏi tài khoản để không gửi tiếp.
+"""
+import datetime
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import CustomUser
+from .expo import MAX_MESSAGES_PER_REQUEST, MAX_RECEIPT_IDS_PER_REQUEST, ExpoRequestError, ExpoTransportError
+from .models import PushOutbox
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = datetime.timedelta(seconds=30)
+BACKOFF_MAX = datetime.timedelta(hours=1)
+LEASE = datetime.timedelta(minutes=2)
+RECEIPT_DELAY = datetime.timedelta(minutes=15)
+# Expo chỉ giữ receipt trong 24 giờ
+RECEIPT_EXPIRY = datetime.timedelta(hours=24)
+# Mã lỗi tự đặt cho tin bị lỗi khi gửi tách lô (xem `_send_split`)
+TRANSPORT_ERROR = 'TransportError'
+REJECTED_ERROR = 'RequestRejected'
+RETRYABLE_ERRORS = {'MessageRateExceeded', TRANSPORT_ERROR}
+UNREGISTERED_ERROR = 'DeviceNotRegistered'
+# Token do client gửi lên; token sai định dạng làm Expo từ chối cả lô nên bị loại ngay khi xếp hàng
+EXPO_TOKEN_RE = re.compile(r'^Expo(nent)?PushToken\[[^\[\]\s]+\]$')
+
+
+def is_valid_token(token):
+    return isinstance(token, str) and EXPO_TOKEN_RE.match(token) is not None
+
+
+def enqueue_push(token, title, body, data=None):
+    """Ghi một tin vào outbox; trả về None (không ghi) nếu token rỗng hoặc sai định dạng."""
+    if not is_valid_token(token):
+        return None
+    return PushOutbox.objects.create(token=token, title=title, body=body, data=data or {})
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def claim_batches(count, batch_size=MAX_MESSAGES_PER_REQUEST, now=None):
+    """Nhận tối đa `count` lô tin đến hạn và thuê chúng trong `LEASE`; trả về danh sách các lô (list các dict)."""
+    now = now or timezone.now()
+    connection = connections[router.db_for_write(PushOutbox)]
+    with transaction.atomic(using=connection.alias):
+        queryset = PushOutbox.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        rows = list(queryset.values('id', 'token', 'title', 'body', 'data', 'attempts')[:count * batch_size])
+        if rows:
+            PushOutbox.objects.filter(id__in=[row['id'] for row in rows]).update(
+                attempts=F('attempts') + 1, next_attempt_at=now + LEASE,
+            )
+    for row in rows:
+        row['attempts'] += 1
+    return [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+
+
+def _retry_or_fail(row, error, now):
+    if row['attempts'] >= MAX_ATTEMPTS:
+        return 'failed', now, error
+    return 'pending', now + backoff(row['attempts']), error
+
+
+def _write_results(results, tickets, unregistered, extra=None):
+    """
+    Ghi kết quả {id: (status, next_attempt_at, last_error)}: các dòng cùng kết quả được cập nhật bằng một
+    câu UPDATE, chỉ ticket id (khác nhau từng dòng) mới cần `bulk_update`.
+    """
+    groups = defaultdict(list)
+    for row_id, outcome in results.items():
+        groups[outcome].append(row_id)
+    with transaction.atomic():
+        for (row_status, next_attempt_at, last_error), ids in groups.items():
+            fields = {'status': row_status, 'next_attempt_at': next_attempt_at, 'last_error': last_error}
+            fields.update((extra or {}).get(row_status, {}))
+            PushOutbox.objects.filter(id__in=ids).update(**fields)
+        if tickets:
+            PushOutbox.objects.bulk_update(
+                [PushOutbox(id=row_id, ticket_id=ticket_id) for row_id, ticket_id in tickets.items()], ['ticket_id'],
+            )
+        if unregistered:
+            CustomUser.objects.filter(expo_push_token__in=unregistered).update(expo_push_token=None)
+
+
+def _error_code(result):
+    return (result.get('details') or {}).get('error') or result.get('message') or 'unknown error'
+
+
+def apply_tickets(rows, tickets, error, now=None):
+    """
+    Ghi kết quả gửi một lô. `error` là exception của cả lô (hoặc None), khi đó `tickets` bị bỏ qua.
+    Trả về {'sent', 'retried', 'failed'}.
+    """
+    now = now or timezone.now()
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    results = {}
+    ticket_ids = {}
+    unregistered = set()
+    for index, row in enumerate(rows):
+        if error is not None:
+            retryable = isinstance(error, ExpoTransportError)
+            outcome = _retry_or_fail(row, str(error), now) if retryable else ('failed', now, str(error))
+        elif tickets[index].get('status') == 'ok':
+            outcome = ('sent', now, '')
+            ticket_ids[row['id']] = tickets[index].get('id')
+        else:
+            code = _error_code(tickets[index])
+            if code == UNREGISTERED_ERROR:
+                unregistered.add(row['token'])
+            outcome = _retry_or_fail(row, code, now) if code in RETRYABLE_ERRORS else ('failed', now, code)
+        stats[{'sent': 'sent', 'pending': 'retried', 'failed': 'failed'}[outcome[0]]] += 1
+        results[row['id']] = outcome
+
+    _write_results(results, ticket_ids, unregistered, extra={'sent': {'sent_at': now}})
+    return stats
+
+
+def _error_ticket(code, exc):
+    return {'status': 'error', 'message': str(exc), 'details': {'error': code}}
+
+
+def _bisect(client, messages, exc):
+    """
+    Expo từ chối cả lô (HTTP 4xx, VD một tin sai định dạng): chia đôi và gửi lại từng nửa cho đến khi
+    cô lập được tin lỗi, để các tin hợp lệ khác trong lô vẫn được gửi. Trả về ticket cho từng tin.
+    """
+    if len(messages) == 1:
+        return [_error_ticket(REJECTED_ERROR, exc)]
+    middle = len(messages) // 2
+    return _send_part(client, messages[:middle]) + _send_part(client, messages[middle:])
+
+
+def _send_part(client, messages):
+    try:
+        return client.send(messages)
+    except ExpoTransportError as exc:
+        # Các phần khác của lô có thể đã được gửi, nên chỉ phần này được gửi lại sau
+        return [_error_ticket(TRANSPORT_ERROR, exc)] * len(messages)
+    except ExpoRequestError as exc:
+        return _bisect(client, messages, exc)
+
+
+def _send(client, rows):
+    messages = [{'to': row['token'], 'title': row['title'], 'body': row['body'], 'data': row['data']} for row in rows]
+    try:
+        try:
+            tickets = client.send(messages)
+        except ExpoRequestError as exc:
+            tickets = _bisect(client, messages, exc)
+        return rows, tickets, None
+    except Exception as exc:
+        return rows, None, exc
+
+
+def drain_outbox(client, batch_size=MAX_MESSAGES_PER_REQUEST, workers=1, max_rounds=None):
+    """
+    Gửi mọi tin đang đến hạn. Mỗi vòng nhận `workers` lô và gửi song song; chỉ thread chính ghi database.
+    Trả về số liệu cộng dồn {'batches', 'sent', 'retried', 'failed'}.
+    """
+    batch_size = min(batch_size, MAX_MESSAGES_PER_REQUEST)
+    totals = {'batches': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+    rounds = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while max_rounds is None or rounds < max_rounds:
+            batches = claim_batches(workers, batch_size)
+            if not batches:
+                break
+            rounds += 1
+            for rows, tickets, error in executor.map(lambda rows: _send(client, rows), batches):
+                totals['batches'] += 1
+                for key, value in apply_tickets(rows, tickets, error).items():
+                    totals[key] += value
+    return totals
+
+
+def check_receipts(client, delay=RECEIPT_DELAY, now=None):
+    """Cập nhật trạng thái các tin đã gửi từ `delay` trước theo receipt. Trả về {'delivered', 'retried', 'failed'}."""
+    now = now or timezone.now()
+    stats = {'delivered': 0, 'retried': 0, 'failed': 0}
+    queryset = PushOutbox.objects.filter(status='sent', sent_at__lte=now - delay).order_by('id')
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values('id', 'token', 'ticket_id', 'attempts', 'sent_at')
+                    [:MAX_RECEIPT_IDS_PER_REQUEST])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        try:
+            receipts = client.get_receipts([row['ticket_id'] for row in rows])
+        except ExpoTransportError:
+            break  # Thử lại ở lần chạy sau
+
+        results = {}
+        unregistered = set()
+        for row in rows:
+            receipt = receipts.get(row['ticket_id'])
+            if receipt is None:
+                if row['sent_at'] > now - RECEIPT_EXPIRY:
+                    continue  # Receipt chưa sẵn sàng
+                outcome = ('failed', now, 'receipt expired')
+            elif receipt.get('status') == 'ok':
+                outcome = ('delivered', now, '')
+            else:
+                code = _error_code(receipt)
+                if code == UNREGISTERED_ERROR:
+                    unregistered.add(row['token'])
+                outcome = _retry_or_fail(row, code, now) if code in RETRYABLE_ERRORS else ('failed', now, code)
+            stats[{'delivered': 'delivered', 'pending': 'retried', 'failed': 'failed'}[outcome[0]]] += 1
+            results[row['id']] = outcome
+
+        _write_results(results, None, unregistered)
+    return stats
@@ -0,0 +1,118 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gyms.models import Booking
+from users.models import CustomUser
+from .expo import ExpoPushClient, ExpoTransportError
+from .fake_expo import FakeExpoServer
+from .models import PushOutbox
+from .outbox import MAX_ATTEMPTS, check_receipts, drain_outbox, enqueue_push
+
+
+class PushOutboxTests(TestCase):
+
+    def setUp(self):
+        self.server = FakeExpoServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.client_expo = ExpoPushClient(base_url=self.server.base_url, timeout=(1, 1))
+        self.addCleanup(self.client_expo.close)
+
+    def make_due(self):
+        PushOutbox.objects.filter(status='pending').update(next_attempt_at=timezone.now())
+
+    def test_booking_approval_is_queued_not_sent(self):
+        member = CustomUser.objects.create_user(username='member', password='pass', role='member',
+                                                expo_push_token='ExponentPushToken[member]')
+        pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        start = timezone.now() + datetime.timedelta(days=1)
+        booking = Booking.objects.create(member=member, pt=pt, start_time=start,
+                                         end_time=start + datetime.timedelta(hours=1), status='pending')
+        api = APIClient()
+        api.force_authenticate(pt)
+        self.assertEqual(api.post(f'/api/gyms/bookings/{booking.pk}/approve/').status_code, 200)
+
+        queued = PushOutbox.objects.get()
+        self.assertEqual((queued.token, queued.status), ('ExponentPushToken[member]', 'pending'))
+        self.assertEqual(self.server.requests, 0)
+
+    def test_drain_sends_in_batches_of_100(self):
+        for index in range(250):
+            enqueue_push(f'ExponentPushToken[{index}]', 'Title', f'Body {index}', {'index': index})
+        stats = drain_outbox(self.client_expo, workers=2)
+        self.assertEqual(stats, {'batches': 3, 'sent': 250, 'retried': 0, 'failed': 0})
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len({message['to'] for message in self.server.messages}), 250)
+        self.assertFalse(PushOutbox.objects.exclude(status='sent').exists())
+        self.assertFalse(PushOutbox.objects.filter(ticket_id__isnull=True).exists())
+
+    def test_transport_errors_are_retried_with_backoff(self):
+        enqueue_push('ExponentPushToken[a]', 'Title', 'Body')
+        self.server.fail_next = 1
+        self.assertEqual(drain_outbox(self.client_expo)['retried'], 1)
+        row = PushOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), ('pending', 1))
+        self.assertGreater(row.next_attempt_at, timezone.now())
+        self.assertEqual(drain_outbox(self.client_expo)['batches'], 0)  # Chưa đến hạn gửi lại
+
+        self.make_due()
+        self.assertEqual(drain_outbox(self.client_expo)['sent'], 1)
+
+        enqueue_push('ExponentPushToken[b]', 'Title', 'Body')
+        self.server.fail_next = MAX_ATTEMPTS
+        for _ in range(MAX_ATTEMPTS):
+            self.make_due()
+            drain_outbox(self.client_expo)
+        self.assertEqual(PushOutbox.objects.get(token='ExponentPushToken[b]').status, 'failed')
+
+    def test_timeout_is_a_transport_error(self):
+        self.server.latency = 0.5
+        client = ExpoPushClient(base_url=self.server.base_url, timeout=(1, 0.1))
+        self.addCleanup(client.close)
+        with self.assertRaises(ExpoTransportError):
+            client.send([{'to': 'ExponentPushToken[a]', 'title': 'Title', 'body': 'Body'}])
+
+    def test_unregistered_device_clears_token(self):
+        user = CustomUser.objects.create_user(username='gone', password='pass', expo_push_token='ExponentPushToken[gone]')
+        self.server.invalid_tokens.add('ExponentPushToken[gone]')
+        enqueue_push('ExponentPushToken[gone]', 'Title', 'Body')
+        enqueue_push('ExponentPushToken[ok]', 'Title', 'Body')
+
+        self.assertEqual(drain_outbox(self.client_expo), {'batches': 1, 'sent': 1, 'retried': 0, 'failed': 1})
+        user.refresh_from_db()
+        self.assertIsNone(user.expo_push_token)
+        self.assertEqual(PushOutbox.objects.get(token='ExponentPushToken[gone]').last_error, 'DeviceNotRegistered')
+
+    def test_invalid_tokens_are_not_queued(self):
+        self.assertIsNone(enqueue_push('not-a-token', 'Title', 'Body'))
+        self.assertIsNotNone(enqueue_push('ExpoPushToken[abc]', 'Title', 'Body'))
+        self.assertEqual(PushOutbox.objects.count(), 1)
+
+    def test_rejected_batch_is_split_to_isolate_bad_message(self):
+        for index in range(10):
+            enqueue_push(f'ExponentPushToken[{index}]', 'Title', 'Body')
+        self.server.rejected_tokens.add('ExponentPushToken[3]')
+
+        self.assertEqual(drain_outbox(self.client_expo), {'batches': 1, 'sent': 9, 'retried': 0, 'failed': 1})
+        self.assertEqual(PushOutbox.objects.get(status='failed').token, 'ExponentPushToken[3]')
+        self.assertEqual(len(self.server.messages), 9)
+
+    def test_receipts(self):
+        for token in ('a', 'b', 'c'):
+            enqueue_push(f'ExponentPushToken[{token}]', 'Title', 'Body')
+        drain_outbox(self.client_expo)
+        self.assertEqual(check_receipts(self.client_expo), {'delivered': 0, 'retried': 0, 'failed': 0})
+
+        tickets = dict(PushOutbox.objects.values_list('token', 'ticket_id'))
+        self.server.receipt_errors = {
+            tickets['ExponentPushToken[b]']: 'MessageTooBig',
+            tickets['ExponentPushToken[c]']: 'MessageRateExceeded',
+        }
+        stats = check_receipts(self.client_expo, now=timezone.now() + datetime.timedelta(minutes=20))
+        self.assertEqual(stats, {'delivered': 1, 'retried': 1, 'failed': 1})
+        self.assertEqual(
+            dict(PushOutbox.objects.values_list('token', 'status')),
+            {'ExponentPushToken[a]': 'delivered', 'ExponentPushToken[b]': 'failed', 'ExponentPushToken[c]': 'pending'},
+        )
@@ -0,0 +1,56 @@
+"""
+Số liệu tổng quan của mọi hội viên đang được một PT phụ trách, gom trong MỘT câu query.
+
+Mỗi chỉ số là một subquery tương quan (correlated subquery) theo hội viên, thay vì app gọi
+/tracking/summary/ và /gyms/bookings/ lần lượt cho từng hội viên.
+"""
+import datetime
+
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from gyms.models import Booking
+from tracking.models import ProgressLog
+from workouts.models import UserPlanProgress
+from .models import PTAssignment
+
+CHANGE_WINDOW_DAYS = 30
+
+
+def cohort_queryset(pt, now):
+    """
+    Các PTAssignment đang hoạt động của `pt`, kèm:
+    cân nặng mới nhất, thay đổi trong 30 ngày, % tiến độ chương trình được gán,
+    lần tập gần nhất và lịch hẹn sắp tới (chưa hủy).
+    """
+    member = OuterRef('member_id')
+    logs = ProgressLog.objects.filter(member=member)
+    window_start = now.date() - datetime.timedelta(days=CHANGE_WINDOW_DAYS)
+    # Mốc so sánh: lần cân cuối cùng trước cửa sổ 30 ngày; nếu không có thì lần cân đầu tiên trong cửa sổ
+    baseline = Coalesce(
+        Subquery(logs.filter(date__lte=window_start).order_by('-date').values('weight')[:1]),
+        Subquery(logs.filter(date__gt=window_start).order_by('date').values('weight')[:1]),
+    )
+    latest = logs.order_by('-date')
+    next_booking = Booking.objects.filter(
+        member=member, start_time__gte=now, status__in=['pending', 'approved'],
+    ).order_by('start_time')
+
+    return PTAssignment.objects.filter(pt=pt, is_active=True).select_related('member').annotate(
+        latest_weight=Subquery(latest.values('weight')[:1]),
+        latest_log_date=Subquery(latest.values('date')[:1]),
+        baseline_weight=baseline,
+        plan_id=F('member__assigned_plan__plan_id'),
+        plan_name=F('member__assigned_plan__plan__name'),
+        plan_progress_percent=Subquery(
+            UserPlanProgress.objects.filter(member=member, plan=OuterRef('member__assigned_plan__plan'))
+            .values('progress_percent')[:1]
+        ),
+        last_workout_at=Subquery(
+            UserPlanProgress.objects.filter(member=member, last_completed_at__isnull=False)
+            .order_by('-last_completed_at').values('last_completed_at')[:1]
+        ),
+        next_booking_id=Subquery(next_booking.values('pk')[:1]),
+        next_booking_start=Subquery(next_booking.values('start_time')[:1]),
+        next_booking_status=Subquery(next_booking.values('status')[:1]),
+    ).order_by('member__username')
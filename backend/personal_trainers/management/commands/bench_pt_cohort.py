@@ -0,0 +1,99 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from gyms.models import Booking
+from gyms.views import BookingViewSet
+from personal_trainers.models import PTAssignment
+from personal_trainers.views import MyMembersCohortView, MyMembersListView
+from resofit_api.benchmarks import format_latency, rolled_back, time_calls
+from tracking.models import ProgressLog
+from tracking.views import ProgressSummaryView
+from users.models import CustomUser
+from workouts.models import UserPlanProgress, UserWorkoutPlanAssignment, WorkoutPlan
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark màn hình hội viên của PT: endpoint cohort (một câu query) so với cách cũ "
+        "(danh sách hội viên + summary và bookings cho từng hội viên). Dữ liệu được rollback sau khi chạy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=500)
+        parser.add_argument('--logs', type=int, default=60, help="Số ProgressLog mỗi hội viên.")
+        parser.add_argument('--bookings', type=int, default=20, help="Số lịch hẹn mỗi hội viên.")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--legacy-repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        factory = APIRequestFactory()
+        now = timezone.now()
+        today = now.date()
+
+        with rolled_back():
+            pt = CustomUser.objects.create_user(username='bench_cohort_pt', password=None, role='pt')
+            plans = [
+                WorkoutPlan.objects.create(name=f'bench_cohort_plan_{i}', description='', difficulty='beginner')
+                for i in range(10)
+            ]
+            members = CustomUser.objects.bulk_create([
+                CustomUser(username=f'bench_cohort_member_{i}', role='member') for i in range(options['members'])
+            ])
+            PTAssignment.objects.bulk_create([PTAssignment(pt=pt, member=member) for member in members])
+            assignments = [UserWorkoutPlanAssignment(pt=pt, member=member, plan=rng.choice(plans)) for member in members]
+            UserWorkoutPlanAssignment.objects.bulk_create(assignments)
+            UserPlanProgress.objects.bulk_create([
+                UserPlanProgress(
+                    member_id=assignment.member_id, plan=assignment.plan, completed_days=rng.randrange(30), total_days=30,
+                    progress_percent=rng.randrange(100), last_completed_at=now - datetime.timedelta(hours=rng.randrange(500)),
+                )
+                for assignment in assignments
+            ])
+            ProgressLog.objects.bulk_create([
+                ProgressLog(member=member, created_by=member, weight=80 + rng.uniform(-5, 5),
+                            date=today - datetime.timedelta(days=offset * 2))
+                for member in members
+                for offset in range(options['logs'])
+            ], batch_size=5000)
+            bookings = []
+            for member in members:
+                for _ in range(options['bookings']):
+                    start = now + datetime.timedelta(hours=rng.randrange(-2000, 2000))
+                    bookings.append(Booking(member=member, pt=pt, start_time=start, end_time=start + datetime.timedelta(hours=1),
+                                            status=rng.choice(['pending', 'approved', 'cancelled'])))
+            Booking.objects.bulk_create(bookings, batch_size=5000)
+            self.stdout.write(f"members={len(members)} logs={len(members) * options['logs']} bookings={len(bookings)}")
+
+            cohort_view = MyMembersCohortView.as_view()
+            members_view = MyMembersListView.as_view()
+            summary_view = ProgressSummaryView.as_view()
+            bookings_view = BookingViewSet.as_view({'get': 'list'})
+
+            def get(view, path, params=None):
+                request = factory.get(path, params or {}, HTTP_HOST='localhost')
+                force_authenticate(request, user=pt)
+                response = view(request)
+                response.render()
+                return response
+
+            def cohort():
+                get(cohort_view, '/api/pts/my-members/cohort/')
+
+            def legacy():
+                for row in get(members_view, '/api/pts/my-members/').data:
+                    member_id = row['member']['id']
+                    get(summary_view, '/api/tracking/summary/', {'member_id': member_id})
+                    get(bookings_view, '/api/gyms/bookings/', {'member_id': member_id})
+
+            for label, func, repeat in (('cohort', cohort, options['repeat']), ('legacy', legacy, options['legacy_repeat'])):
+                func()  # làm nóng (bảng tóm tắt được tạo lười ở lần đầu)
+                queries = []
+                with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                    func()
+                self.stdout.write("  " + format_latency(f"{label} ({len(queries)} queries)", time_calls(func, repeat)))
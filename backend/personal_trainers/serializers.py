@@ -7,4 +7,38 @@ class MyMemberSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PTAssignment
-        fields = ['member', 'start_date', 'is_active']
\ No newline at end of file
+        fields = ['member', 'start_date', 'is_active']
+
+class CohortMemberSerializer(serializers.ModelSerializer):
+    """Một dòng của /my-members/cohort/; cần queryset từ `cohort_queryset`."""
+    member = UserSerializer(read_only=True)
+    latest_weight = serializers.FloatField(read_only=True)
+    latest_log_date = serializers.DateField(read_only=True)
+    weight_change_30d = serializers.SerializerMethodField()
+    plan = serializers.SerializerMethodField()
+    last_workout_at = serializers.DateTimeField(read_only=True)
+    next_booking = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PTAssignment
+        fields = ['member', 'start_date', 'latest_weight', 'latest_log_date', 'weight_change_30d',
+                  'plan', 'last_workout_at', 'next_booking']
+
+    def get_weight_change_30d(self, obj):
+        if obj.latest_weight is None or obj.baseline_weight is None:
+            return None
+        return round(obj.latest_weight - obj.baseline_weight, 2)
+
+    def get_plan(self, obj):
+        if obj.plan_id is None:
+            return None
+        return {'id': obj.plan_id, 'name': obj.plan_name, 'progress_percent': obj.plan_progress_percent or 0}
+
+    def get_next_booking(self, obj):
+        if obj.next_booking_id is None:
+            return None
+        return {
+            'id': obj.next_booking_id,
+            'start_time': serializers.DateTimeField().to_representation(obj.next_booking_start),
+            'status': obj.next_booking_status,
+        }
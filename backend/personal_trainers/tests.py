@@ -1,3 +1,72 @@
+import datetime
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gyms.models import Booking
+from tracking.models import ProgressLog
+from users.models import CustomUser
+from workouts.models import UserPlanProgress, UserWorkoutPlanAssignment, WorkoutPlan
+from .models import PTAssignment
+
+
+class CohortViewTests(TestCase):
+
+    def setUp(self):
+        self.pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        self.plan = WorkoutPlan.objects.create(name='Plan', description='', difficulty='beginner')
+        self.client = APIClient()
+        self.client.force_authenticate(self.pt)
+        self.today = timezone.now().date()
+
+    def add_member(self, index):
+        member = CustomUser.objects.create_user(username=f'member{index:02d}', password='pass', role='member')
+        PTAssignment.objects.create(pt=self.pt, member=member)
+        for offset, weight in ((40, 90), (20, 88), (1, 86)):
+            ProgressLog.objects.create(member=member, created_by=member, weight=weight - index,
+                                       date=self.today - datetime.timedelta(days=offset))
+        UserWorkoutPlanAssignment.objects.create(pt=self.pt, member=member, plan=self.plan)
+        UserPlanProgress.objects.create(member=member, plan=self.plan, completed_days=3, total_days=10,
+                                        progress_percent=30, last_completed_at=timezone.now())
+        # Giờ hẹn lệch nhau theo hội viên: một PT không được có hai lịch hẹn chồng nhau
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for days, status in ((-1, 'approved'), (3, 'cancelled'), (5, 'pending'), (9, 'approved')):
+            start = now + datetime.timedelta(days=days, hours=index)
+            Booking.objects.create(member=member, pt=self.pt, start_time=start,
+                                   end_time=start + datetime.timedelta(hours=1), status=status)
+        return member
+
+    def get_cohort(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/pts/my-members/cohort/')
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_cohort_metrics(self):
+        self.add_member(0)
+        idle = CustomUser.objects.create_user(username='member99', password='pass', role='member')
+        PTAssignment.objects.create(pt=self.pt, member=idle)
+        inactive = self.add_member(1)
+        PTAssignment.objects.filter(member=inactive).update(is_active=False)
+
+        data, _ = self.get_cohort()
+        self.assertEqual([row['member']['username'] for row in data], ['member00', 'member99'])
+        row = data[0]
+        self.assertEqual((row['latest_weight'], row['weight_change_30d']), (86, -4))
+        self.assertEqual(row['plan'], {'id': self.plan.pk, 'name': 'Plan', 'progress_percent': 30})
+        self.assertIsNotNone(row['last_workout_at'])
+        self.assertEqual(row['next_booking']['status'], 'pending')
+        for key in ('latest_weight', 'weight_change_30d', 'plan', 'last_workout_at', 'next_booking'):
+            self.assertIsNone(data[1][key])
 
-# Create your tests here.
+    def test_query_count_is_constant(self):
+        self.add_member(0)
+        _, small = self.get_cohort()
+        for index in range(1, 6):
+            self.add_member(index)
+        data, large = self.get_cohort()
+        self.assertEqual(len(data), 6)
+        self.assertEqual(small, large)
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import MyMembersListView, PTDashboardSummaryView
+from .views import MyMembersCohortView, MyMembersListView, PTDashboardSummaryView
 
 urlpatterns = [
     path('my-members/', MyMembersListView.as_view(), name='my_members'),
+    path('my-members/cohort/', MyMembersCohortView.as_view(), name='my_members_cohort'),
     path('dashboard-summary/', PTDashboardSummaryView.as_view(), name='pt_dashboard_summary'),
 
 ]
\ No newline at end of file
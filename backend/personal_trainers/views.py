@@ -2,7 +2,8 @@ from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from users.permissions import IsPT
 from .models import PTAssignment
-from .serializers import MyMemberSerializer
+from .cohort import cohort_queryset
+from .serializers import CohortMemberSerializer, MyMemberSerializer
 from rest_framework.views import APIView
 from django.utils import timezone
 from rest_framework.response import Response
@@ -17,6 +18,18 @@ class MyMembersListView(ListAPIView):
         return PTAssignment.objects.filter(pt=pt_user, is_active=True)
 
 
+class MyMembersCohortView(ListAPIView):
+    """
+    Tổng quan mọi hội viên đang được PT phụ trách (cân nặng mới nhất, thay đổi 30 ngày,
+    tiến độ chương trình, lần tập gần nhất, lịch hẹn sắp tới) trong một câu query.
+    """
+    serializer_class = CohortMemberSerializer
+    permission_classes = [IsAuthenticated, IsPT]
+
+    def get_queryset(self):
+        return cohort_queryset(self.request.user, timezone.now())
+
+
 class PTDashboardSummaryView(APIView):
     """
     API để cung cấp dữ liệu thống kê nhanh cho Dashboard của PT.
@@ -0,0 +1,47 @@
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """
+    Chạy benchmark trong một transaction và luôn rollback ở cuối,
+    để dữ liệu tổng hợp (synthetic) không còn lại trong database.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(func, repeat):
+    """Gọi `func` `repeat` lần, trả về danh sách thời gian (ms) của từng lần."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def format_latency(label, samples):
+    return (
+        f"{label}: p50={percentile(samples, 50):.2f}ms "
+        f"p95={percentile(samples, 95):.2f}ms max={max(samples):.2f}ms (n={len(samples)})"
+    )
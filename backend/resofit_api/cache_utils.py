@@ -0,0 +1,91 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+# Backend chỉ sống trong một process: phiên bản bị bump (hay lock) ở process này không tới được worker khác
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Lock theo "sọc" (striped) để giới hạn số lock trong process, thay vì một lock cho mỗi key
+_LOCAL_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _local_lock(key):
+    return _LOCAL_LOCKS[hash(key) % len(_LOCAL_LOCKS)]
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """System check: việc làm mất hiệu lực theo phiên bản cần cache dùng chung giữa các process."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [checks.Warning(
+            f"Cache mặc định ({backend}) chỉ sống trong một process.",
+            hint="Các worker khác và lệnh quản trị sẽ không thấy việc làm mất hiệu lực cache; "
+                 "dùng Redis, Memcached hoặc DatabaseCache.",
+            id='resofit.W001',
+        )]
+    return []
+
+
+def get_version(namespace, key):
+    """
+    Trả về token phiên bản hiện tại của (namespace, key).
+    Token là chuỗi ngẫu nhiên nên kể cả khi bị cache evict, dữ liệu cũ cũng không bị dùng lại.
+    """
+    version_key = f'{namespace}:{key}:version'
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key) or version
+    return version
+
+
+def bump_version(namespace, key):
+    """Đổi token phiên bản, làm mọi entry cache gắn với phiên bản cũ hết hiệu lực."""
+    cache.set(f'{namespace}:{key}:version', uuid.uuid4().hex, None)
+
+
+def single_flight(key, build, timeout, lock_timeout=30, poll_interval=0.05):
+    """
+    Đọc `key` từ cache; nếu miss thì gọi `build()` và lưu kết quả.
+    Các lượt miss đồng thời cho cùng một key chỉ chạy `build()` một lần:
+    trong cùng process nhờ lock cục bộ, giữa các process nhờ lock `cache.add`.
+    Kết quả `None` không được cache.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    with _local_lock(key):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + lock_timeout
+        acquired = cache.add(lock_key, 1, lock_timeout)
+        while not acquired:
+            # Một process khác đang build, chờ nó ghi kết quả vào cache
+            time.sleep(poll_interval)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if time.monotonic() >= deadline:
+                break
+            acquired = cache.add(lock_key, 1, lock_timeout)
+
+        try:
+            value = build()
+            if value is not None:
+                cache.set(key, value, timeout)
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+    return value
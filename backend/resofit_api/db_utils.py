@@ -0,0 +1,14 @@
+from django.db import connections, router
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=1000):
+    """
+    INSERT ... ON CONFLICT DO UPDATE qua `bulk_create`.
+    MySQL không hỗ trợ chỉ định `unique_fields` (ON DUPLICATE KEY UPDATE dùng mọi unique key),
+    nên chỉ truyền tham số này khi backend hỗ trợ.
+    """
+    connection = connections[router.db_for_write(model)]
+    kwargs = {'update_conflicts': True, 'update_fields': update_fields, 'batch_size': batch_size}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = unique_fields
+    return model.objects.bulk_create(objs, **kwargs)
@@ -1,19 +1,12 @@
-import requests
+from notifications.outbox import enqueue_push
 
-def send_push_message(token, title, message, extra_data={}):
+
+def send_push_message(token, title, message, extra_data=None):
+    """
+    Xếp thông báo vào outbox (cùng transaction với request); lệnh `drain_push_outbox` gửi đi theo lô.
+    Trả về False khi người dùng chưa đăng ký token.
+    """
     if not token:
         return False
-    try:
-        requests.post(
-            'https://exp.host/--/api/v2/push/send',
-            json={
-                'to': token,
-                'title': title,
-                'body': message,
-                'data': extra_data,
-            }
-        )
-        return True
-    except Exception as e:
-        print(f"Failed to send push notification: {e}")
-        return False
\ No newline at end of file
+    enqueue_push(token, title, message, extra_data)
+    return True
@@ -39,6 +39,11 @@ NGROK_URL = os.getenv('NGROK_URL') # <-- Thêm dòng này
 MOMO_TEST_MODE = os.getenv('MOMO_TEST_MODE') == 'True'
 MOMO_IPN_URL_BASE = f"{os.getenv('NGROK_URL')}/api/payments/momo-ipn/"
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+# Số buổi tập tối đa có thể diễn ra cùng lúc trong phòng gym (dùng khi tính khung giờ trống)
+GYM_CAPACITY = int(os.getenv('GYM_CAPACITY', '20'))
+# Expo Push API (đổi sang server giả lập khi test/benchmark)
+EXPO_PUSH_API_URL = os.getenv('EXPO_PUSH_API_URL', 'https://exp.host/--/api/v2/push')
+EXPO_ACCESS_TOKEN = os.getenv('EXPO_ACCESS_TOKEN')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 # DEBUG = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
@@ -86,6 +91,8 @@ INSTALLED_APPS = [
     'personal_trainers',
     'workouts',
     'reports',
+    'telemetry',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -134,6 +141,24 @@ if 'RENDER' in os.environ:
         'sslmode': 'require'
     }
 
+# Cache dùng chung cho mọi worker/process (phiên bản tài liệu chương trình, xu hướng cân nặng, lời khuyên AI,
+# lock single-flight). Không dùng LocMemCache: bump phiên bản ở một process sẽ không tới được các process khác.
+# Dùng Redis nếu có REDIS_URL, mặc định là bảng cache trong database (tạo bằng `createcachetable`).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'resofit_cache',
+        }
+    }
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
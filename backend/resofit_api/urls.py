@@ -20,5 +20,6 @@ urlpatterns = [
     path('api/pts/', include('personal_trainers.urls')),  # <-- Thêm
     path('api/workouts/', include('workouts.urls')),  # <-- Thêm dòng này
     path('api/reports/', include('reports.urls')),  # <-- Thêm
+    path('api/telemetry/', include('telemetry.urls')),
 
 ]
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Mã hóa dạng cột (columnar) cho telemetry buổi tập.
+
+Mỗi khối gồm: 4 byte độ dài header + header JSON (tên cột, dtype, shape) + dữ liệu thô của các cột
+nối liền nhau, toàn bộ được nén zlib. Cột thời gian được lưu dạng delta để nén tốt hơn.
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+
+# Thứ tự 17 keypoint của MoveNet (giống @tensorflow-models/pose-detection ở frontend)
+KEYPOINT_NAMES = (
+    'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle',
+)
+KEYPOINT_INDEX = {name: index for index, name in enumerate(KEYPOINT_NAMES)}
+
+# Cột của sự kiện rep: thời điểm hoàn thành rep và biên độ góc khớp trong rep đó
+REP_COLUMNS = {'t': np.int64, 'min_angle': np.float32, 'max_angle': np.float32}
+# Cột của frame tư thế: thời điểm và mảng keypoint (frame, 17, [x, y, score])
+POSE_COLUMNS = {'t': np.int64, 'keypoints': np.float32}
+# Shape của một phần tử trong cột (ngoài chiều frame); cột không có ở đây là cột vô hướng
+COLUMN_ITEM_SHAPES = {'keypoints': (len(KEYPOINT_NAMES), 3)}
+
+_HEADER_SIZE = struct.Struct('<I')
+
+
+def encode_columns(columns):
+    header = []
+    buffers = []
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array)
+        if name == 't':
+            array = np.diff(array, prepend=0)
+        header.append({'name': name, 'dtype': array.dtype.str, 'shape': array.shape})
+        buffers.append(array.tobytes())
+    header_bytes = json.dumps(header).encode()
+    return zlib.compress(_HEADER_SIZE.pack(len(header_bytes)) + header_bytes + b''.join(buffers), 6)
+
+
+def decode_columns(blob):
+    raw = zlib.decompress(bytes(blob))
+    (header_size,) = _HEADER_SIZE.unpack_from(raw)
+    offset = _HEADER_SIZE.size + header_size
+    columns = {}
+    for column in json.loads(raw[_HEADER_SIZE.size:offset]):
+        dtype = np.dtype(column['dtype'])
+        count = int(np.prod(column['shape'], dtype=np.int64))
+        array = np.frombuffer(raw, dtype=dtype, count=count, offset=offset).reshape(column['shape'])
+        offset += count * dtype.itemsize
+        if column['name'] == 't':
+            array = np.cumsum(array)
+        columns[column['name']] = array
+    return columns
+
+
+def to_columns(payload, spec):
+    """Chuyển payload JSON ({tên cột: list}) thành các mảng NumPy, kiểm tra shape và độ dài khớp nhau."""
+    if not isinstance(payload, dict):
+        raise ValueError("Expected an object of columns.")
+    columns = {}
+    for name, dtype in spec.items():
+        if name not in payload:
+            raise ValueError(f"Missing column '{name}'.")
+        try:
+            with np.errstate(over='ignore', invalid='ignore'):
+                array = np.asarray(payload[name], dtype=dtype)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Column '{name}' is not numeric or out of range.")
+        item_shape = COLUMN_ITEM_SHAPES.get(name, ())
+        if array.shape == (0,):
+            array = array.reshape((0, *item_shape))
+        if array.ndim != 1 + len(item_shape) or array.shape[1:] != item_shape:
+            raise ValueError(f"Column '{name}' must have shape (n, {', '.join(map(str, item_shape))})."
+                             if item_shape else f"Column '{name}' must be a list of numbers.")
+        # NaN/Infinity (hoặc số vượt quá float32) làm hỏng chỉ số tổng hợp và JSON trả về
+        if array.dtype.kind == 'f' and not np.all(np.isfinite(array)):
+            raise ValueError(f"Column '{name}' must contain only finite numbers.")
+        columns[name] = array
+    lengths = {len(array) for array in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length.")
+    if np.any(np.diff(columns['t']) < 0):
+        raise ValueError("Column 't' must be sorted.")
+    return columns
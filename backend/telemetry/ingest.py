@@ -0,0 +1,67 @@
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, F, FloatField, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .codec import POSE_COLUMNS, REP_COLUMNS, encode_columns, to_columns
+from .models import TelemetryBatch, WorkoutSession
+
+
+def _extend_min(field, value, output_field):
+    value = Value(value, output_field=output_field)
+    return Least(Coalesce(F(field), value), value)
+
+
+def _extend_max(field, value, output_field):
+    value = Value(value, output_field=output_field)
+    return Greatest(Coalesce(F(field), value), value)
+
+
+def ingest_batch(session, sequence, reps=None, pose=None):
+    """
+    Lưu một lô telemetry dạng cột và cộng dồn chỉ số tổng hợp của buổi tập.
+    Trả về False nếu lô với `sequence` này đã được nhận trước đó (client gửi lại).
+    Ném ValueError nếu dữ liệu không hợp lệ.
+    """
+    rep_columns = to_columns(reps, REP_COLUMNS) if reps else None
+    pose_columns = to_columns(pose, POSE_COLUMNS) if pose else None
+
+    rep_count = len(rep_columns['t']) if rep_columns else 0
+    frame_count = len(pose_columns['t']) if pose_columns else 0
+    times = [columns['t'] for columns in (rep_columns, pose_columns) if columns and len(columns['t'])]
+    start_ms = int(min(t[0] for t in times)) if times else None
+    end_ms = int(max(t[-1] for t in times)) if times else None
+
+    updates = {
+        'batch_count': F('batch_count') + 1,
+        'rep_count': F('rep_count') + rep_count,
+        'pose_frame_count': F('pose_frame_count') + frame_count,
+    }
+    if times:
+        updates['first_event_ms'] = _extend_min('first_event_ms', start_ms, BigIntegerField())
+        updates['last_event_ms'] = _extend_max('last_event_ms', end_ms, BigIntegerField())
+    if rep_count:
+        updates['min_angle'] = _extend_min('min_angle', float(rep_columns['min_angle'].min()), FloatField())
+        updates['max_angle'] = _extend_max('max_angle', float(rep_columns['max_angle'].max()), FloatField())
+    if frame_count:
+        frame_scores = pose_columns['keypoints'][:, :, 2].mean(axis=1)
+        updates['pose_score_sum'] = F('pose_score_sum') + float(frame_scores.sum())
+
+    try:
+        with transaction.atomic():
+            TelemetryBatch.objects.create(
+                session=session,
+                sequence=sequence,
+                rep_count=rep_count,
+                frame_count=frame_count,
+                start_ms=start_ms,
+                end_ms=end_ms,
+                rep_events=encode_columns(rep_columns) if rep_count else None,
+                pose_frames=encode_columns(pose_columns) if frame_count else None,
+            )
+            WorkoutSession.objects.filter(pk=session.pk).update(**updates)
+    except IntegrityError:
+        # Chỉ trùng khóa (session, sequence) mới là client gửi lại; lỗi ràng buộc khác phải được báo
+        if TelemetryBatch.objects.filter(session=session, sequence=sequence).exists():
+            return False
+        raise
+    return True
@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from telemetry.rep_counting import REP_COUNTERS, analyze_reps, count_reps_reference, synthesize_keypoints
+
+
+class Command(BaseCommand):
+    help = "So sánh tốc độ đếm rep bằng NumPy (vectorized) với bản port từng frame của repCounters.ts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frames', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--counter', default='squatsCounter', choices=sorted(REP_COUNTERS))
+
+    def handle(self, *args, **options):
+        spec = REP_COUNTERS[options['counter']]
+        for frames in options['frames']:
+            # ~2 giây mỗi rep ở 30fps, góc dao động giữa 60 và 175 độ, có nhiễu và frame bị che
+            t = np.arange(frames)
+            angles = 117.5 + 57.5 * np.cos(2 * np.pi * t / 60) + np.random.default_rng(1).normal(0, 2, frames)
+            keypoints = synthesize_keypoints(angles, spec, dropout=0.05)
+
+            started = time.perf_counter()
+            analysis = analyze_reps(keypoints, spec)
+            vectorized = time.perf_counter() - started
+
+            started = time.perf_counter()
+            reference = count_reps_reference(keypoints, spec)
+            naive = time.perf_counter() - started
+
+            if analysis.rep_count != len(reference):
+                self.stdout.write(self.style.ERROR(
+                    f"frames={frames}: mismatch {analysis.rep_count} != {len(reference)}"
+                ))
+            self.stdout.write(
+                f"frames={frames} reps={analysis.rep_count}: vectorized={vectorized * 1000:.2f}ms "
+                f"naive={naive * 1000:.2f}ms speedup={naive / vectorized:.1f}x"
+            )
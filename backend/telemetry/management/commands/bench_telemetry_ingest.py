@@ -0,0 +1,74 @@
+import gzip
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from resofit_api.benchmarks import rolled_back
+from telemetry.models import WorkoutSession
+from telemetry.views import WorkoutSessionViewSet
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thông lượng ghi telemetry qua endpoint nhận lô (gzip JSON -> NumPy -> dạng cột nén) "
+        "trên một worker. Dữ liệu được rollback sau khi chạy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batches', type=int, default=200)
+        parser.add_argument('--frames', type=int, default=300, help="Số frame tư thế mỗi lô (~10s ở 30fps).")
+        parser.add_argument('--reps', type=int, default=10, help="Số sự kiện rep mỗi lô.")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(7)
+        frames, reps = options['frames'], options['reps']
+        factory = APIRequestFactory()
+        view = WorkoutSessionViewSet.as_view({'post': 'batches'}, **WorkoutSessionViewSet.batches.kwargs)
+
+        # Chuẩn bị sẵn body đã nén để chỉ đo phía server
+        bodies = []
+        for sequence in range(options['batches']):
+            start_ms = sequence * frames * 33
+            bodies.append(gzip.compress(json.dumps({
+                'sequence': sequence,
+                'reps': {
+                    't': sorted(rng.integers(start_ms, start_ms + frames * 33, reps).tolist()),
+                    'min_angle': rng.uniform(70, 100, reps).round(1).tolist(),
+                    'max_angle': rng.uniform(150, 180, reps).round(1).tolist(),
+                },
+                'pose': {
+                    't': list(range(start_ms, start_ms + frames * 33, 33)),
+                    'keypoints': rng.random((frames, 17, 3)).round(3).tolist(),
+                },
+            }).encode()))
+
+        with rolled_back():
+            user = CustomUser.objects.create_user(username='bench_telemetry', password=None)
+            session = WorkoutSession.objects.create(member=user, started_at=timezone.now())
+
+            started = time.perf_counter()
+            for body in bodies:
+                request = factory.post(
+                    f'/api/telemetry/sessions/{session.pk}/batches/', body,
+                    content_type='application/json', HTTP_CONTENT_ENCODING='gzip', HTTP_HOST='localhost',
+                )
+                force_authenticate(request, user=user)
+                response = view(request, pk=session.pk)
+                if response.status_code != 201:
+                    raise RuntimeError(f"Unexpected response {response.status_code}: {response.data}")
+            elapsed = time.perf_counter() - started
+
+            session.refresh_from_db()
+            events = session.rep_count + session.pose_frame_count
+            self.stdout.write(
+                f"{options['batches']} batches, {session.rep_count} rep events, "
+                f"{session.pose_frame_count} pose frames in {elapsed:.2f}s"
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Throughput: {events / elapsed:,.0f} events/s, {options['batches'] / elapsed:,.1f} batches/s"
+            ))
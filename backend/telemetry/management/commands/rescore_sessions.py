@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from telemetry.models import WorkoutSession
+from telemetry.scoring import score_sessions, with_pose_batches
+
+
+class Command(BaseCommand):
+    help = "Đếm rep và chấm điểm tư thế lại (phía server) cho các buổi tập đã lưu, theo từng lô."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Chỉ các buổi bắt đầu từ ngày này (YYYY-MM-DD).")
+        parser.add_argument('--exercise', type=int, help="Chỉ các buổi của bài tập này (ID).")
+        parser.add_argument('--unscored', action='store_true', help="Chỉ các buổi chưa được chấm điểm.")
+        parser.add_argument('--chunk-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        sessions = WorkoutSession.objects.filter(exercise__rep_counting_logic__isnull=False)
+        if options['since']:
+            sessions = sessions.filter(started_at__date__gte=parse_date(options['since']))
+        if options['exercise']:
+            sessions = sessions.filter(exercise_id=options['exercise'])
+        if options['unscored']:
+            sessions = sessions.filter(scored_at__isnull=True)
+
+        last_pk = 0
+        scored = 0
+        while True:
+            chunk = list(with_pose_batches(sessions.filter(pk__gt=last_pk).order_by('pk'))[:options['chunk_size']])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            scored += score_sessions(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Rescored {scored} sessions."))
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('workouts', '0011_alter_userworkoutprogress_completed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('batch_count', models.PositiveIntegerField(default=0)),
+                ('rep_count', models.PositiveIntegerField(default=0)),
+                ('pose_frame_count', models.PositiveIntegerField(default=0)),
+                ('first_event_ms', models.BigIntegerField(blank=True, null=True)),
+                ('last_event_ms', models.BigIntegerField(blank=True, null=True)),
+                ('min_angle', models.FloatField(blank=True, null=True)),
+                ('max_angle', models.FloatField(blank=True, null=True)),
+                ('pose_score_sum', models.FloatField(default=0)),
+                ('exercise', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='workouts.exercise')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_sessions', to=settings.AUTH_USER_MODEL)),
+                ('workout_day', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='workouts.workoutday')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetryBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('rep_count', models.PositiveIntegerField(default=0)),
+                ('frame_count', models.PositiveIntegerField(default=0)),
+                ('start_ms', models.BigIntegerField(blank=True, null=True)),
+                ('end_ms', models.BigIntegerField(blank=True, null=True)),
+                ('rep_events', models.BinaryField(blank=True, null=True)),
+                ('pose_frames', models.BinaryField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='telemetry.workoutsession')),
+            ],
+            options={
+                'ordering': ['sequence'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['member', '-started_at'], name='session_member_started_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='telemetrybatch',
+            unique_together={('session', 'sequence')},
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telemetry', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutsession',
+            name='form_score',
+            field=models.FloatField(blank=True, help_text='Điểm tư thế trung bình mỗi rep (0-100)', null=True),
+        ),
+        migrations.AddField(
+            model_name='workoutsession',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workoutsession',
+            name='server_rep_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.db import models
+from django.conf import settings
+from workouts.models import Exercise, WorkoutDay
+
+
+class WorkoutSession(models.Model):
+    """
+    Một buổi tập có AI Coach (đếm rep / nhận diện tư thế trên thiết bị).
+    Các chỉ số tổng hợp được cộng dồn khi nhận từng lô telemetry,
+    nên việc đọc tóm tắt không cần giải nén dữ liệu thô.
+    """
+    member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='workout_sessions')
+    exercise = models.ForeignKey(Exercise, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
+    workout_day = models.ForeignKey(WorkoutDay, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # --- Chỉ số tổng hợp ---
+    batch_count = models.PositiveIntegerField(default=0)
+    rep_count = models.PositiveIntegerField(default=0)
+    pose_frame_count = models.PositiveIntegerField(default=0)
+    # Mốc thời gian (ms tính từ started_at) của sự kiện đầu tiên / cuối cùng
+    first_event_ms = models.BigIntegerField(blank=True, null=True)
+    last_event_ms = models.BigIntegerField(blank=True, null=True)
+    # Góc khớp nhỏ nhất / lớn nhất đạt được trong các rep (độ)
+    min_angle = models.FloatField(blank=True, null=True)
+    max_angle = models.FloatField(blank=True, null=True)
+    # Tổng độ tin cậy trung bình của keypoint trên mỗi frame (để tính trung bình)
+    pose_score_sum = models.FloatField(default=0)
+
+    # --- Kết quả đếm rep / chấm điểm phía server (xem telemetry.rep_counting) ---
+    server_rep_count = models.PositiveIntegerField(blank=True, null=True)
+    form_score = models.FloatField(blank=True, null=True, help_text="Điểm tư thế trung bình mỗi rep (0-100)")
+    scored_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['member', '-started_at'], name='session_member_started_idx'),
+        ]
+
+    def __str__(self):
+        return f"Session of {self.member.username} at {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class TelemetryBatch(models.Model):
+    """
+    Một lô sự kiện rep và frame keypoint của một buổi tập, lưu dạng cột (columnar) đã nén
+    thay vì mỗi frame một dòng. Xem `telemetry.codec` cho định dạng.
+    """
+    session = models.ForeignKey(WorkoutSession, on_delete=models.CASCADE, related_name='batches')
+    # Số thứ tự do client đánh, để gửi lại (retry) không bị ghi trùng
+    sequence = models.PositiveIntegerField()
+    rep_count = models.PositiveIntegerField(default=0)
+    frame_count = models.PositiveIntegerField(default=0)
+    start_ms = models.BigIntegerField(blank=True, null=True)
+    end_ms = models.BigIntegerField(blank=True, null=True)
+    rep_events = models.BinaryField(blank=True, null=True)
+    pose_frames = models.BinaryField(blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['sequence']
+        unique_together = ('session', 'sequence')
+
+    def __str__(self):
+        return f"Batch {self.sequence} of session {self.session_id}"
@@ -0,0 +1,37 @@
+import json
+import zlib
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.json import strict_constant
+
+# Giới hạn kích thước sau khi giải nén, tránh "zip bomb"
+MAX_DECOMPRESSED_BYTES = 16 * 1024 * 1024
+
+
+class CompressedJSONParser(JSONParser):
+    """
+    JSONParser chấp nhận body được nén gzip/deflate (header `Content-Encoding`).
+    Body không nén vẫn được xử lý như JSON bình thường.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context.get('request')
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').lower() if request is not None else ''
+        if encoding not in ('gzip', 'deflate'):
+            return super().parse(stream, media_type, parser_context)
+
+        # wbits: 16 + MAX_WBITS cho gzip, MAX_WBITS cho zlib/deflate
+        wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+        decompressor = zlib.decompressobj(wbits)
+        try:
+            raw = decompressor.decompress(stream.read(), MAX_DECOMPRESSED_BYTES)
+            if decompressor.unconsumed_tail:
+                raise ParseError("Decompressed payload is too large.")
+            charset = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+            # Như JSONParser: không chấp nhận NaN/Infinity khi STRICT_JSON bật
+            return json.loads(raw.decode(charset), parse_constant=strict_constant if self.strict else None)
+        except (zlib.error, ValueError) as exc:
+            raise ParseError(f"Compressed JSON parse error - {exc}")
@@ -0,0 +1,169 @@
+"""
+Đếm rep và chấm điểm tư thế phía server, tương đương `frontend/src/ai/repCounters.ts`.
+
+Toàn bộ được tính trên mảng keypoint (frame, 17, [x, y, score]) bằng NumPy:
+góc khớp cho mọi frame cùng lúc, và máy trạng thái up/down được suy ra từ chuỗi tín hiệu
+thay vì vòng lặp Python qua từng frame.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .codec import KEYPOINT_INDEX
+
+MIN_KEYPOINT_SCORE = 0.5
+
+
+@dataclass(frozen=True)
+class RepCounterSpec:
+    # Mỗi bên (trái/phải) là bộ ba keypoint (a, b, c), góc được đo tại b
+    left: tuple
+    right: tuple
+    down_below: float = 90
+    up_above: float = 160
+    # Góc đáy mong muốn, đạt mức này thì điểm độ sâu = 1
+    target_depth: float = 80
+
+
+# Khóa trùng với `Exercise.rep_counting_logic` và tên hàm trong repCounters.ts
+REP_COUNTERS = {
+    'pushUpsCounter': RepCounterSpec(
+        left=('left_shoulder', 'left_elbow', 'left_wrist'),
+        right=('right_shoulder', 'right_elbow', 'right_wrist'),
+    ),
+    'squatsCounter': RepCounterSpec(
+        left=('left_hip', 'left_knee', 'left_ankle'),
+        right=('right_hip', 'right_knee', 'right_ankle'),
+    ),
+}
+
+
+@dataclass
+class RepAnalysis:
+    rep_count: int
+    # Chỉ số frame tại đó mỗi rep hoàn thành
+    rep_frames: np.ndarray
+    # Điểm tư thế của từng rep (0-100) và trung bình
+    rep_scores: np.ndarray
+    form_score: float
+
+
+def joint_angles(keypoints, a, b, c):
+    """Góc (độ) tại keypoint `b` cho mọi frame. keypoints: (frame, 17, 3)."""
+    ia, ib, ic = KEYPOINT_INDEX[a], KEYPOINT_INDEX[b], KEYPOINT_INDEX[c]
+    ab = keypoints[:, ia, :2] - keypoints[:, ib, :2]
+    cb = keypoints[:, ic, :2] - keypoints[:, ib, :2]
+    dot = np.einsum('ij,ij->i', ab, cb)
+    norms = np.linalg.norm(ab, axis=1) * np.linalg.norm(cb, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosine = np.clip(dot / norms, -1.0, 1.0)
+    return np.degrees(np.arccos(cosine))
+
+
+def _side_scores(keypoints, joints):
+    return keypoints[:, [KEYPOINT_INDEX[name] for name in joints], 2]
+
+
+def analyze_reps(keypoints, spec):
+    """Đếm rep và chấm điểm tư thế cho một chuỗi keypoint, không dùng vòng lặp theo frame."""
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    if len(keypoints) == 0:
+        return RepAnalysis(0, np.empty(0, dtype=np.int64), np.empty(0), 0.0)
+
+    left = joint_angles(keypoints, *spec.left)
+    right = joint_angles(keypoints, *spec.right)
+    angle = (left + right) / 2
+
+    scores = np.concatenate([_side_scores(keypoints, spec.left), _side_scores(keypoints, spec.right)], axis=1)
+    valid = np.all(scores > MIN_KEYPOINT_SCORE, axis=1) & np.isfinite(angle)
+
+    # Tín hiệu mỗi frame: +1 = "up", -1 = "down", 0 = giữ nguyên trạng thái
+    signal = np.zeros(len(angle), dtype=np.int8)
+    signal[valid & (angle > spec.up_above)] = 1
+    signal[valid & (angle < spec.down_below)] = -1
+
+    # Chỉ frame có tín hiệu mới có thể đổi trạng thái; trạng thái ban đầu là "up" (giống frontend).
+    # Một rep hoàn thành khi tín hiệu chuyển từ "down" sang "up".
+    event_frames = np.flatnonzero(signal)
+    events = np.concatenate([[1], signal[event_frames]])
+    completes = (events[1:] == 1) & (events[:-1] == -1)
+    rep_frames = event_frames[completes]
+
+    if len(rep_frames) == 0:
+        return RepAnalysis(0, rep_frames, np.empty(0), 0.0)
+
+    # Mỗi rep kéo dài từ frame sau rep trước đến frame hoàn thành; các frame sau rep cuối bị bỏ qua
+    # (reduceat kéo đoạn cuối tới hết mảng)
+    end = rep_frames[-1] + 1
+    angle, left, right, valid, scores = angle[:end], left[:end], right[:end], valid[:end], scores[:end]
+    segment_starts = np.concatenate([[0], rep_frames[:-1] + 1])
+    masked_angle = np.where(valid, angle, np.nan)
+    depth = np.fmin.reduceat(masked_angle, segment_starts)
+    depth_score = np.clip((spec.up_above - depth) / (spec.up_above - spec.target_depth), 0, 1)
+
+    asymmetry = np.where(valid, np.abs(left - right), 0)
+    valid_count = np.add.reduceat(valid.astype(np.int64), segment_starts)
+    symmetry_score = 1 - np.clip(np.add.reduceat(asymmetry, segment_starts) / np.maximum(valid_count, 1) / 45, 0, 1)
+
+    visibility_score = np.add.reduceat(scores.mean(axis=1), segment_starts) / np.diff(
+        np.concatenate([segment_starts, [end]])
+    )
+
+    rep_scores = np.round((0.5 * depth_score + 0.3 * symmetry_score + 0.2 * visibility_score) * 100, 1)
+    return RepAnalysis(len(rep_frames), rep_frames, rep_scores, float(np.round(rep_scores.mean(), 1)))
+
+
+def count_reps_reference(keypoints, spec):
+    """
+    Bản port trực tiếp theo từng frame của repCounters.ts.
+    Chỉ dùng để kiểm chứng và làm mốc so sánh hiệu năng cho `analyze_reps`.
+    """
+    state = 'up'
+    rep_frames = []
+    for frame_index, frame in enumerate(keypoints):
+        points = [frame[KEYPOINT_INDEX[name]] for name in (*spec.left, *spec.right)]
+        if any(point[2] <= MIN_KEYPOINT_SCORE for point in points):
+            continue
+
+        side_angles = []
+        for a, b, c in (points[0:3], points[3:6]):
+            abx, aby = a[0] - b[0], a[1] - b[1]
+            cbx, cby = c[0] - b[0], c[1] - b[1]
+            magnitude = (abx ** 2 + aby ** 2) ** 0.5 * (cbx ** 2 + cby ** 2) ** 0.5
+            if magnitude == 0:
+                break
+            cosine = min(max((abx * cbx + aby * cby) / magnitude, -1), 1)
+            side_angles.append(np.degrees(np.arccos(cosine)))
+        if len(side_angles) != 2:
+            continue
+
+        angle = sum(side_angles) / 2
+        if state == 'up' and angle < spec.down_below:
+            state = 'down'
+        elif state == 'down' and angle > spec.up_above:
+            state = 'up'
+            rep_frames.append(frame_index)
+    return rep_frames
+
+
+def synthesize_keypoints(angles, spec, dropout=0.0, seed=0):
+    """
+    Sinh chuỗi keypoint giả lập có góc khớp (hai bên) bằng `angles` (độ).
+    `dropout` là tỉ lệ frame bị che khuất (score thấp). Dùng cho test và benchmark.
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.radians(np.asarray(angles, dtype=np.float64))
+    keypoints = np.empty((len(angles), len(KEYPOINT_INDEX), 3))
+    keypoints[:, :, :2] = rng.random((len(angles), len(KEYPOINT_INDEX), 2))
+    keypoints[:, :, 2] = 0.9
+
+    for offset, (a, b, c) in ((0.3, spec.left), (0.7, spec.right)):
+        keypoints[:, KEYPOINT_INDEX[b], :2] = (offset, 0.5)
+        keypoints[:, KEYPOINT_INDEX[c], :2] = (offset, 0.8)
+        keypoints[:, KEYPOINT_INDEX[a], 0] = offset + 0.3 * np.sin(angles)
+        keypoints[:, KEYPOINT_INDEX[a], 1] = 0.5 + 0.3 * np.cos(angles)
+
+    if dropout:
+        hidden = rng.random(len(angles)) < dropout
+        keypoints[hidden, KEYPOINT_INDEX[spec.left[1]], 2] = 0.2
+    return keypoints
@@ -0,0 +1,46 @@
+import numpy as np
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .codec import decode_columns
+from .models import TelemetryBatch, WorkoutSession
+from .rep_counting import REP_COUNTERS, analyze_reps
+
+SCORE_FIELDS = ['server_rep_count', 'form_score', 'scored_at']
+
+
+def session_keypoints(session):
+    """Ghép keypoint của mọi lô (theo thứ tự sequence) thành một mảng (frame, 17, 3)."""
+    arrays = [decode_columns(batch.pose_frames)['keypoints'] for batch in session.batches.all() if batch.pose_frames]
+    if not arrays:
+        return np.empty((0, 17, 3), dtype=np.float32)
+    return np.concatenate(arrays)
+
+
+def score_sessions(sessions):
+    """
+    Đếm rep và chấm điểm tư thế lại cho các buổi tập (đã prefetch `batches`), rồi lưu bằng bulk_update.
+    Buổi tập có bài tập không hỗ trợ đếm rep sẽ được bỏ qua. Trả về số buổi đã chấm.
+    """
+    scored = []
+    now = timezone.now()
+    for session in sessions:
+        logic = session.exercise.rep_counting_logic if session.exercise else None
+        spec = REP_COUNTERS.get(logic)
+        if spec is None:
+            continue
+        analysis = analyze_reps(session_keypoints(session), spec)
+        session.server_rep_count = analysis.rep_count
+        session.form_score = analysis.form_score if analysis.rep_count else None
+        session.scored_at = now
+        scored.append(session)
+
+    if scored:
+        WorkoutSession.objects.bulk_update(scored, SCORE_FIELDS)
+    return len(scored)
+
+
+def with_pose_batches(queryset):
+    return queryset.select_related('exercise').prefetch_related(
+        Prefetch('batches', queryset=TelemetryBatch.objects.only('id', 'session_id', 'sequence', 'pose_frames'))
+    )
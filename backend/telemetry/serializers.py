@@ -0,0 +1,60 @@
+from rest_framework import serializers
+from workouts.models import Exercise, WorkoutDay
+from .models import WorkoutSession
+
+
+class WorkoutSessionSerializer(serializers.ModelSerializer):
+    """Tóm tắt một buổi tập, tính hoàn toàn từ các chỉ số đã cộng dồn."""
+    exercise_id = serializers.PrimaryKeyRelatedField(
+        source='exercise', queryset=Exercise.objects.all(), required=False, allow_null=True
+    )
+    workout_day_id = serializers.PrimaryKeyRelatedField(
+        source='workout_day', queryset=WorkoutDay.objects.all(), required=False, allow_null=True
+    )
+    duration_seconds = serializers.SerializerMethodField()
+    avg_rep_seconds = serializers.SerializerMethodField()
+    avg_pose_score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WorkoutSession
+        fields = [
+            'id', 'exercise_id', 'workout_day_id', 'started_at', 'ended_at',
+            'batch_count', 'rep_count', 'pose_frame_count', 'min_angle', 'max_angle',
+            'duration_seconds', 'avg_rep_seconds', 'avg_pose_score',
+            'server_rep_count', 'form_score',
+        ]
+        extra_kwargs = {'started_at': {'required': False}}
+        read_only_fields = [
+            'ended_at', 'batch_count', 'rep_count', 'pose_frame_count', 'min_angle', 'max_angle',
+            'server_rep_count', 'form_score',
+        ]
+
+    def get_duration_seconds(self, obj):
+        if obj.ended_at:
+            return round((obj.ended_at - obj.started_at).total_seconds(), 1)
+        if obj.last_event_ms is not None:
+            return round(obj.last_event_ms / 1000, 1)
+        return None
+
+    def get_avg_rep_seconds(self, obj):
+        if obj.rep_count and obj.first_event_ms is not None:
+            return round((obj.last_event_ms - obj.first_event_ms) / 1000 / obj.rep_count, 2)
+        return None
+
+    def get_avg_pose_score(self, obj):
+        if obj.pose_frame_count:
+            return round(obj.pose_score_sum / obj.pose_frame_count, 3)
+        return None
+
+
+class TelemetryBatchSerializer(serializers.Serializer):
+    """
+    Một lô telemetry dạng cột. VD:
+    {"sequence": 3,
+     "reps": {"t": [1200, 3400], "min_angle": [84.5, 88.0], "max_angle": [168.2, 171.0]},
+     "pose": {"t": [0, 33, 66], "keypoints": [[[x, y, score] x 17], ...]}}
+    `t` là mili-giây tính từ lúc bắt đầu buổi tập.
+    """
+    sequence = serializers.IntegerField(min_value=0)
+    reps = serializers.DictField(required=False)
+    pose = serializers.DictField(required=False)
@@ -0,0 +1,191 @@
+import gzip
+import io
+import json
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import CustomUser
+from workouts.models import Exercise
+from .codec import decode_columns, encode_columns
+from .ingest import ingest_batch
+from .models import TelemetryBatch, WorkoutSession
+from .rep_counting import REP_COUNTERS, analyze_reps, count_reps_reference, synthesize_keypoints
+
+
+def squat_angles(reps, frames_per_rep=60):
+    t = np.arange(reps * frames_per_rep)
+    return 117.5 + 57.5 * np.cos(2 * np.pi * t / frames_per_rep)
+
+
+def make_batch(sequence, start_ms, reps=3, frames=30):
+    rng = np.random.default_rng(sequence)
+    keypoints = rng.random((frames, 17, 3)).round(3)
+    return {
+        'sequence': sequence,
+        'reps': {
+            't': [start_ms + 1000 * (i + 1) for i in range(reps)],
+            'min_angle': [85.0 + i for i in range(reps)],
+            'max_angle': [165.0 + i for i in range(reps)],
+        },
+        'pose': {
+            't': [start_ms + 33 * i for i in range(frames)],
+            'keypoints': keypoints.tolist(),
+        },
+    }
+
+
+class TelemetryCodecTests(TestCase):
+
+    def test_round_trip(self):
+        columns = {
+            't': np.array([0, 33, 66, 100], dtype=np.int64),
+            'keypoints': np.random.default_rng(1).random((4, 17, 3)).astype(np.float32),
+        }
+        decoded = decode_columns(encode_columns(columns))
+        np.testing.assert_array_equal(decoded['t'], columns['t'])
+        np.testing.assert_array_equal(decoded['keypoints'], columns['keypoints'])
+
+
+class RepCountingTests(TestCase):
+
+    def test_matches_reference_on_clean_motion(self):
+        spec = REP_COUNTERS['squatsCounter']
+        keypoints = synthesize_keypoints(squat_angles(5), spec)
+        analysis = analyze_reps(keypoints, spec)
+        self.assertEqual(analysis.rep_count, 5)
+        self.assertEqual(analysis.rep_frames.tolist(), count_reps_reference(keypoints, spec))
+        self.assertTrue(0 < analysis.form_score <= 100)
+
+    def test_matches_reference_on_noisy_motion(self):
+        rng = np.random.default_rng(7)
+        for name, spec in REP_COUNTERS.items():
+            for seed in range(5):
+                angles = squat_angles(8) + rng.normal(0, 15, 480)
+                keypoints = synthesize_keypoints(angles, spec, dropout=0.2, seed=seed)
+                with self.subTest(counter=name, seed=seed):
+                    self.assertEqual(
+                        analyze_reps(keypoints, spec).rep_frames.tolist(),
+                        count_reps_reference(keypoints, spec),
+                    )
+
+    def test_trailing_frames_do_not_affect_last_rep(self):
+        spec = REP_COUNTERS['squatsCounter']
+        angles = squat_angles(2)
+        analysis = analyze_reps(synthesize_keypoints(angles, spec), spec)
+        idle = np.concatenate([angles, np.full(1200, 175.0)])
+        with_idle = analyze_reps(synthesize_keypoints(idle, spec), spec)
+        self.assertEqual(with_idle.rep_count, 2)
+        np.testing.assert_array_equal(with_idle.rep_scores, analysis.rep_scores)
+        self.assertTrue(0 < with_idle.form_score <= 100)
+
+    def test_empty_sequence(self):
+        analysis = analyze_reps(np.empty((0, 17, 3)), REP_COUNTERS['squatsCounter'])
+        self.assertEqual(analysis.rep_count, 0)
+        self.assertEqual(analysis.form_score, 0.0)
+
+
+class WorkoutSessionApiTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.exercise = Exercise.objects.create(name='Squat', ai_supported=True, rep_counting_logic='squatsCounter')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        response = self.client.post('/api/telemetry/sessions/', {'exercise_id': self.exercise.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.session_id = response.data['id']
+
+    def post_batch(self, batch, compress=False):
+        url = f'/api/telemetry/sessions/{self.session_id}/batches/'
+        body = json.dumps(batch).encode()
+        if compress:
+            return self.client.generic('POST', url, gzip.compress(body), content_type='application/json',
+                                       HTTP_CONTENT_ENCODING='gzip')
+        return self.client.generic('POST', url, body, content_type='application/json')
+
+    def test_ingest_and_summary(self):
+        self.assertEqual(self.post_batch(make_batch(0, 0), compress=True).status_code, 201)
+        self.assertEqual(self.post_batch(make_batch(1, 5000)).status_code, 201)
+        # Gửi lại cùng sequence không bị cộng dồn hai lần
+        self.assertEqual(self.post_batch(make_batch(1, 5000)).status_code, 200)
+
+        response = self.client.get(f'/api/telemetry/sessions/{self.session_id}/')
+        self.assertEqual(response.data['batch_count'], 2)
+        self.assertEqual(response.data['rep_count'], 6)
+        self.assertEqual(response.data['pose_frame_count'], 60)
+        self.assertEqual(response.data['min_angle'], 85.0)
+        self.assertEqual(response.data['max_angle'], 167.0)
+        self.assertIsNotNone(response.data['avg_pose_score'])
+
+        batch = TelemetryBatch.objects.get(session_id=self.session_id, sequence=1)
+        pose = decode_columns(batch.pose_frames)
+        self.assertEqual(pose['keypoints'].shape, (30, 17, 3))
+        self.assertEqual(int(pose['t'][-1]), 5000 + 33 * 29)
+
+    def test_rejects_malformed_batch(self):
+        batch = make_batch(0, 0)
+        batch['pose']['keypoints'] = [[1, 2, 3]] * 30
+        self.assertEqual(self.post_batch(batch).status_code, 400)
+
+        batch = make_batch(0, 0)
+        batch['reps']['min_angle'] = [1.0]
+        self.assertEqual(self.post_batch(batch).status_code, 400)
+
+        batch = make_batch(0, 0)
+        batch['reps']['t'] = 5
+        self.assertEqual(self.post_batch(batch).status_code, 400)
+
+        batch = make_batch(0, 0, reps=1)
+        batch['reps']['t'] = [10 ** 30]
+        self.assertEqual(self.post_batch(batch).status_code, 400)
+        self.assertFalse(TelemetryBatch.objects.exists())
+
+    def test_rejects_non_finite_values(self):
+        # json.dumps ghi NaN thành hằng `NaN` (không phải JSON chuẩn)
+        for compress in (True, False):
+            batch = make_batch(0, 0)
+            batch['reps']['min_angle'][0] = float('nan')
+            self.assertEqual(self.post_batch(batch, compress=compress).status_code, 400)
+
+            batch = make_batch(0, 0)
+            batch['pose']['keypoints'][0][0][2] = float('nan')
+            self.assertEqual(self.post_batch(batch, compress=compress).status_code, 400)
+
+        # Vượt quá float32 thành Infinity khi ép kiểu
+        batch = make_batch(0, 0)
+        batch['reps']['max_angle'][0] = 1e39
+        self.assertEqual(self.post_batch(batch).status_code, 400)
+        self.assertFalse(TelemetryBatch.objects.exists())
+
+    def test_only_duplicate_sequence_counts_as_retry(self):
+        session = WorkoutSession.objects.get(pk=self.session_id)
+        with mock.patch.object(WorkoutSession.objects, 'filter', side_effect=IntegrityError('constraint failed')):
+            with self.assertRaises(IntegrityError):
+                ingest_batch(session, 0, reps=make_batch(0, 0)['reps'])
+        self.assertFalse(TelemetryBatch.objects.exists())
+
+    def test_other_members_cannot_access_session(self):
+        other = CustomUser.objects.create_user(username='other', password='pass', role='member')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.post_batch(make_batch(0, 0)).status_code, 404)
+        self.assertEqual(self.client.get(f'/api/telemetry/sessions/{self.session_id}/').status_code, 404)
+
+    def test_finish_and_rescore_count_reps_on_server(self):
+        keypoints = synthesize_keypoints(squat_angles(3), REP_COUNTERS['squatsCounter']).round(4)
+        batch = make_batch(0, 0, frames=len(keypoints))
+        batch['pose']['keypoints'] = keypoints.tolist()
+        self.assertEqual(self.post_batch(batch).status_code, 201)
+
+        response = self.client.post(f'/api/telemetry/sessions/{self.session_id}/finish/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['server_rep_count'], 3)
+        self.assertIsNotNone(response.data['form_score'])
+
+        WorkoutSession.objects.filter(pk=self.session_id).update(server_rep_count=None, scored_at=None)
+        call_command('rescore_sessions', '--unscored', stdout=io.StringIO())
+        self.assertEqual(WorkoutSession.objects.get(pk=self.session_id).server_rep_count, 3)
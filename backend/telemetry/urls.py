@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import WorkoutSessionViewSet
+
+router = DefaultRouter()
+router.register(r'sessions', WorkoutSessionViewSet, basename='workoutsession')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
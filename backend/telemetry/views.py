@@ -0,0 +1,64 @@
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .ingest import ingest_batch
+from .models import WorkoutSession
+from .parsers import CompressedJSONParser
+from .scoring import score_sessions, with_pose_batches
+from .serializers import TelemetryBatchSerializer, WorkoutSessionSerializer
+
+
+class WorkoutSessionViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet
+):
+    """
+    ViewSet cho buổi tập có AI Coach của hội viên hiện tại.
+    - `POST /sessions/` tạo buổi tập, `GET /sessions/{id}/` xem tóm tắt.
+    - `POST /sessions/{id}/batches/` gửi một lô telemetry (có thể nén gzip).
+    - `POST /sessions/{id}/finish/` kết thúc buổi tập và chấm điểm lại phía server.
+    """
+    serializer_class = WorkoutSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return WorkoutSession.objects.filter(member=self.request.user)
+
+    def perform_create(self, serializer):
+        started_at = serializer.validated_data.get('started_at') or timezone.now()
+        serializer.save(member=self.request.user, started_at=started_at)
+
+    @action(detail=True, methods=['post'], parser_classes=[CompressedJSONParser])
+    def batches(self, request, pk=None):
+        session = self.get_object()
+        serializer = TelemetryBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            created = ingest_batch(
+                session,
+                serializer.validated_data['sequence'],
+                reps=serializer.validated_data.get('reps'),
+                pose=serializer.validated_data.get('pose'),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if created:
+            return Response({"status": "batch stored"}, status=status.HTTP_201_CREATED)
+        return Response({"status": "batch already received"}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def finish(self, request, pk=None):
+        session = self.get_object()
+        if session.ended_at is None:
+            session.ended_at = timezone.now()
+            session.save(update_fields=['ended_at'])
+        score_sessions(with_pose_batches(WorkoutSession.objects.filter(pk=session.pk)))
+        session.refresh_from_db()
+        return Response(self.get_serializer(session).data)
@@ -0,0 +1,154 @@
+"""
+Sinh lời khuyên dinh dưỡng/luyện tập bằng Gemini, có cache theo đầu vào đã chuẩn hóa.
+
+- Client Gemini được cấu hình một lần cho mỗi process và dùng lại.
+- Đầu vào (cân nặng, chiều cao, BMI, mục tiêu) được làm tròn/chuẩn hóa trước khi tạo khóa cache,
+  nên các request gần như giống nhau dùng chung một kết quả.
+- `single_flight` đảm bảo các request đồng thời cùng khóa chỉ gọi Gemini một lần, kể cả giữa các worker
+  (lock và kết quả nằm trong cache dùng chung, xem `CACHES`).
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from resofit_api.cache_utils import single_flight
+
+ADVICE_CACHE_TIMEOUT = 60 * 60 * 24
+ADVICE_CACHE_PREFIX = 'advice'
+GEMINI_MODEL_NAME = 'gemini-1.5-flash-latest'
+DEFAULT_GOAL = "Không có mục tiêu cụ thể"
+
+PROMPT_TEMPLATE = """
+Bạn là một chuyên gia dinh dưỡng và huấn luyện viên thể hình AI.
+Dựa trên các chỉ số sau của một người dùng:
+- Chiều cao: {height} cm
+- Cân nặng: {weight} kg
+- Chỉ số BMI: {bmi:.2f}
+- Mục tiêu: "{goal}"
+
+Hãy đưa ra hai lời khuyên ngắn gọn, đi thẳng vào vấn đề, mỗi lời khuyên không quá 3 câu:
+1. Một lời khuyên về chế độ ăn uống.
+2. Một lời khuyên về nhóm cơ hoặc loại bài tập cần tập trung.
+
+Trả lời bằng tiếng Việt. Định dạng câu trả lời của bạn chính xác như sau:
+{{
+    "diet_advice": "Nội dung lời khuyên ăn uống.",
+    "workout_advice": "Nội dung lời khuyên luyện tập."
+}}
+"""
+
+
+class AdviceFormatError(ValueError):
+    """Gemini trả về nội dung không phải JSON lời khuyên hợp lệ."""
+
+
+class GeminiAdviceClient:
+    def __init__(self, api_key, model_name=GEMINI_MODEL_NAME):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt):
+        return self.model.generate_content(prompt).text
+
+
+class StubModelClient:
+    """Model giả lập chạy offline (dùng cho `precompute_advice --stub` và test)."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def generate(self, prompt):
+        time.sleep(self.delay)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return json.dumps({
+            'diet_advice': f"Lời khuyên ăn uống mẫu ({digest}).",
+            'workout_advice': f"Lời khuyên luyện tập mẫu ({digest}).",
+        }, ensure_ascii=False)
+
+
+class RateLimiter:
+    """Giới hạn số lần gọi mỗi giây giữa nhiều thread: mỗi lượt gọi được cấp một khe thời gian riêng."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Client dùng chung cho cả process, chỉ cấu hình ở lần gọi đầu tiên."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not settings.GEMINI_API_KEY:
+                    raise ValueError("GEMINI_API_KEY is not configured.")
+                _client = GeminiAdviceClient(settings.GEMINI_API_KEY)
+    return _client
+
+
+def normalize_inputs(weight, height, bmi, goal):
+    """Làm tròn chỉ số (cân nặng 0.5kg, chiều cao 1cm, BMI 0.1) và chuẩn hóa khoảng trắng/hoa thường của mục tiêu."""
+    weight, height, bmi = float(weight), float(height), float(bmi)
+    if not all(math.isfinite(value) for value in (weight, height, bmi)):
+        raise ValueError("weight, height and bmi must be finite numbers.")
+    goal = ' '.join((goal or DEFAULT_GOAL).split())
+    return {
+        'weight': round(weight * 2) / 2,
+        'height': round(height),
+        'bmi': round(bmi, 1),
+        'goal': goal,
+    }
+
+
+def fingerprint(inputs):
+    normalized = dict(inputs, goal=inputs['goal'].lower())
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def parse_advice(text):
+    clean_text = (text or '').strip().replace('```json', '').replace('```', '').strip()
+    if not clean_text:
+        raise AdviceFormatError("Gemini returned an empty response.")
+    # Xử lý trailing comma
+    if clean_text.endswith(',}'):
+        clean_text = clean_text[:-2] + '}'
+    try:
+        advice = json.loads(clean_text)
+    except json.JSONDecodeError as exc:
+        raise AdviceFormatError(f"{exc}; faulty text: '{clean_text}'")
+    if not isinstance(advice, dict):
+        raise AdviceFormatError(f"Unexpected advice payload: '{clean_text}'")
+    return advice
+
+
+def request_advice(inputs, client=None):
+    """Gọi model (không qua cache) với đầu vào đã chuẩn hóa."""
+    client = client or get_client()
+    return parse_advice(client.generate(PROMPT_TEMPLATE.format(**inputs)))
+
+
+def generate_advice(inputs):
+    """
+    Trả về lời khuyên cho đầu vào đã chuẩn hóa (từ `normalize_inputs`),
+    dùng cache theo fingerprint của đầu vào (TTL `ADVICE_CACHE_TIMEOUT`).
+    """
+    key = f'{ADVICE_CACHE_PREFIX}:{fingerprint(inputs)}'
+    return single_flight(key, lambda: request_advice(inputs), ADVICE_CACHE_TIMEOUT)
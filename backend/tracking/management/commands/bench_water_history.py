@@ -0,0 +1,56 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from resofit_api.benchmarks import format_latency, rolled_back, time_calls
+from tracking.models import WaterLog
+from tracking.views import WaterHistoryView
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark endpoint lịch sử uống nước trên các hội viên có nhiều năm dữ liệu hằng ngày. "
+        "Dữ liệu được rollback sau khi chạy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=50)
+        parser.add_argument('--years', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        factory = APIRequestFactory()
+        view = WaterHistoryView.as_view()
+        today = datetime.date.today()
+        days = 365 * options['years']
+
+        with rolled_back():
+            members = [
+                CustomUser.objects.create_user(username=f'bench_water_{i}', password=None, role='member')
+                for i in range(options['members'])
+            ]
+            logs = [
+                WaterLog(member=member, date=today - datetime.timedelta(days=offset), amount=rng.randrange(0, 4500, 250))
+                for member in members
+                for offset in range(days)
+                if rng.random() < 0.9
+            ]
+            WaterLog.objects.bulk_create(logs, batch_size=5000)
+            self.stdout.write(f"members={len(members)} rows={len(logs)}")
+
+            scenarios = {
+                '365 days': {},
+                f'{options["years"]} years': {'start': (today - datetime.timedelta(days=days - 1)).isoformat()},
+            }
+            for label, params in scenarios.items():
+                def call():
+                    request = factory.get('/api/tracking/water-history/', params, HTTP_HOST='localhost')
+                    force_authenticate(request, user=rng.choice(members))
+                    response = view(request)
+                    response.render()
+
+                self.stdout.write("  " + format_latency(label, time_calls(call, options['repeat'])))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from resofit_api.cache_utils import check_shared_cache
+from tracking.progress_import import FORMATS, READERS, ImportFormatError, guess_format, import_progress_logs
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Nhập lịch sử cân (CSV, JSON hoặc JSONL) cho một hội viên, upsert theo ngày. "
+        "Đọc file theo luồng và ghi theo lô; dòng lỗi được bỏ qua và liệt kê ở cuối. "
+        "Cache xu hướng cân nặng của web worker được làm mới qua cache dùng chung (CACHES)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--member', required=True, help="id hoặc username của hội viên.")
+        parser.add_argument('--format', choices=FORMATS, help="Mặc định suy ra từ đuôi file (csv nếu không rõ).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Kiểm tra file rồi rollback, không lưu gì.")
+
+    def handle(self, *args, **options):
+        for warning in check_shared_cache(None):
+            self.stderr.write(self.style.WARNING(f"{warning.msg} {warning.hint}"))
+        lookup = options['member']
+        member = CustomUser.objects.filter(
+            role='member', **({'pk': int(lookup)} if lookup.isdigit() else {'username': lookup})
+        ).first()
+        if member is None:
+            raise CommandError(f"Không tìm thấy hội viên '{lookup}'.")
+
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as stream:
+                report = import_progress_logs(
+                    member, READERS[fmt](stream), batch_size=options['batch_size'], dry_run=options['dry_run'],
+                )
+        except (ImportFormatError, OSError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            self.stderr.write(f"{path}:{error['row']}: {error['error']}")
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['processed']} rows for {member.username}: {report['created']} created, "
+            f"{report['updated']} updated, {report['error_count']} errors."
+        ))
@@ -0,0 +1,99 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+
+from resofit_api.db_utils import bulk_upsert
+from tracking.advice import RateLimiter, StubModelClient, fingerprint, get_client, normalize_inputs, request_advice
+from tracking.models import MemberAdvice, ProgressLog
+from tracking.summary import calculate_bmi
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Sinh sẵn lời khuyên AI cho các hội viên đang hoạt động (có ProgressLog gần đây), theo từng lô, "
+        "gọi model song song với số luồng và tốc độ giới hạn. Hội viên có đầu vào không đổi sẽ được bỏ qua."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Hội viên có ProgressLog trong số ngày gần đây này.")
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--rate', type=float, default=2.0, help="Số lần gọi model tối đa mỗi giây (0 = không giới hạn).")
+        parser.add_argument('--force', action='store_true', help="Sinh lại kể cả khi fingerprint không đổi.")
+        parser.add_argument('--stub', action='store_true', help="Dùng model giả lập (chạy offline).")
+
+    def handle(self, *args, **options):
+        client = StubModelClient() if options['stub'] else get_client()
+        limiter = RateLimiter(options['rate'])
+        since = timezone.now().date() - datetime.timedelta(days=options['days'])
+
+        latest = ProgressLog.objects.filter(member=OuterRef('pk')).order_by('-date')
+        recent_logs = ProgressLog.objects.filter(member=OuterRef('pk'), date__gte=since)
+        members = CustomUser.objects.filter(Exists(recent_logs), role='member').annotate(
+            latest_weight=Subquery(latest.values('weight')[:1]),
+            height=F('memberprofile__height'),
+            goal=F('memberprofile__goal'),
+        )
+
+        def generate(item):
+            member_id, inputs, digest = item
+            limiter.wait()
+            try:
+                return member_id, inputs, digest, request_advice(inputs, client), None
+            except Exception as exc:
+                return member_id, inputs, digest, None, exc
+
+        last_pk = 0
+        generated = skipped = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                chunk = list(
+                    members.filter(pk__gt=last_pk).order_by('pk')
+                    .values('pk', 'latest_weight', 'height', 'goal')[:options['chunk_size']]
+                )
+                if not chunk:
+                    break
+                last_pk = chunk[-1]['pk']
+
+                existing = dict(
+                    MemberAdvice.objects.filter(member_id__in=[row['pk'] for row in chunk])
+                    .values_list('member_id', 'fingerprint')
+                )
+                pending = []
+                for row in chunk:
+                    bmi = calculate_bmi(row['latest_weight'], row['height'])
+                    if bmi is None:
+                        skipped += 1
+                        continue
+                    inputs = normalize_inputs(row['latest_weight'], row['height'], bmi, row['goal'])
+                    digest = fingerprint(inputs)
+                    if not options['force'] and existing.get(row['pk']) == digest:
+                        skipped += 1
+                        continue
+                    pending.append((row['pk'], inputs, digest))
+
+                # Chỉ thread chính ghi database; các thread con chỉ gọi model
+                results = []
+                now = timezone.now()
+                for member_id, inputs, digest, advice, error in executor.map(generate, pending):
+                    if error is not None:
+                        failed += 1
+                        self.stderr.write(f"member={member_id}: {type(error).__name__}: {error}")
+                        continue
+                    results.append(MemberAdvice(
+                        member_id=member_id, fingerprint=digest, inputs=inputs, advice=advice, generated_at=now,
+                    ))
+                if results:
+                    bulk_upsert(
+                        MemberAdvice, results, unique_fields=['member'],
+                        update_fields=['fingerprint', 'inputs', 'advice', 'generated_at'],
+                    )
+                generated += len(results)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated advice for {generated} members, skipped {skipped}, failed {failed}."
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tracking.water import REQUEST_KEY_RETENTION_DAYS, purge_request_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Xóa khóa idempotency (`seq`) của các lượt cộng nước đã cũ. Khóa chỉ cần giữ trong khoảng client còn "
+        "gửi lại request; nên chạy hằng ngày bằng cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=REQUEST_KEY_RETENTION_DAYS,
+            help="Giữ lại khóa của số ngày gần đây này.",
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        deleted = purge_request_keys(timezone.now().date(), options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} water request keys."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0002_waterlog'),
+        ('users', '0003_customuser_expo_push_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressSummary',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('log_count', models.PositiveIntegerField(default=0)),
+                ('first_weight', models.FloatField(blank=True, null=True)),
+                ('latest_weight', models.FloatField(blank=True, null=True)),
+                ('weight_change', models.FloatField(blank=True, null=True)),
+                ('latest_bmi', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('latest_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tracking.progresslog')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0003_progresssummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waterlog',
+            name='last_seq',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
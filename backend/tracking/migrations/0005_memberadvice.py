@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0004_waterlog_last_seq'),
+        ('users', '0003_customuser_expo_push_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberAdvice',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ai_advice', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('inputs', models.JSONField(default=dict)),
+                ('advice', models.JSONField(default=dict)),
+                ('generated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0005_memberadvice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='waterlog',
+            name='last_seq',
+        ),
+        migrations.CreateModel(
+            name='WaterRequestKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('seq', models.BigIntegerField()),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='water_request_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('member', 'date', 'seq')},
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings
 
+from users.models import MemberProfile
+
 
 class ProgressLog(models.Model):
     member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='progress_logs')
@@ -30,4 +34,72 @@ class WaterLog(models.Model):
         unique_together = ('member', 'date')
 
     def __str__(self):
-        return f"{self.member.username} drank {self.amount}ml on {self.date}"
\ No newline at end of file
+        return f"{self.member.username} drank {self.amount}ml on {self.date}"
+
+class WaterRequestKey(models.Model):
+    """Khóa idempotency (`seq`) của các lượt cộng nước đã áp dụng, để request gửi lại không bị cộng hai lần."""
+    member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='water_request_keys')
+    date = models.DateField()
+    seq = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ('member', 'date', 'seq')
+
+
+class ProgressSummary(models.Model):
+    """
+    Bảng tóm tắt tiến độ (denormalized) của mỗi hội viên, cập nhật trong cùng transaction
+    khi ProgressLog thay đổi và khi chiều cao trong MemberProfile thay đổi (xem tracking/summary.py).
+    """
+    member = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='progress_summary'
+    )
+    log_count = models.PositiveIntegerField(default=0)
+    first_weight = models.FloatField(blank=True, null=True)
+    latest_log = models.ForeignKey(ProgressLog, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    latest_weight = models.FloatField(blank=True, null=True)
+    weight_change = models.FloatField(blank=True, null=True)
+    latest_bmi = models.FloatField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Progress summary of {self.member_id}"
+
+
+class MemberAdvice(models.Model):
+    """
+    Lời khuyên AI đã sinh sẵn cho hội viên (lệnh `precompute_advice` hoặc lần gọi trước),
+    kèm fingerprint của đầu vào đã chuẩn hóa. Chỉ dùng lại khi fingerprint còn khớp.
+    """
+    member = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='ai_advice'
+    )
+    fingerprint = models.CharField(max_length=64)
+    inputs = models.JSONField(default=dict)
+    advice = models.JSONField(default=dict)
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Advice for {self.member_id}"
+
+
+# Tín hiệu (Signal): Giữ ProgressSummary và cache xu hướng khớp với ProgressLog và chiều cao của hội viên
+@receiver([post_save, post_delete], sender=ProgressLog)
+def refresh_progress_summary(sender, instance, origin=None, **kwargs):
+    from .summary import recompute_summary
+    # Tạo dòng tóm tắt nếu chưa có (xem tracking/summary.py), trừ khi đang xóa cả hội viên (cascade)
+    origin_model = getattr(origin, 'model', type(origin))
+    recompute_summary(instance.member_id, create=kwargs['signal'] is post_save or origin_model is ProgressLog)
+
+
+@receiver([post_save, post_delete], sender=ProgressLog)
+def invalidate_progress_trend(sender, instance, **kwargs):
+    from .trends import schedule_invalidation
+    schedule_invalidation(instance.member_id)
+
+
+@receiver(post_save, sender=MemberProfile)
+def refresh_summary_bmi(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None or 'height' in update_fields:
+        from .summary import update_bmi
+        update_bmi(instance.user_id, instance.height)
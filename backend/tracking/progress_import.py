@@ -0,0 +1,216 @@
+"""
+Nhập hàng loạt ProgressLog (VD: lịch sử cân từ ứng dụng cân thông minh) từ CSV, JSON Lines hoặc mảng JSON.
+
+- File được đọc theo luồng, kiểm tra từng dòng và ghi theo lô bằng upsert trên (member, date):
+  ngày đã có bản ghi thì cập nhật cân nặng/% mỡ/ghi chú, ngày chưa có thì tạo mới.
+- Dòng lỗi không làm hỏng cả lần nhập; lỗi được trả về kèm số dòng.
+- Nhiều lần cân trong cùng một ngày: lần xuất hiện sau cùng trong file được giữ lại.
+- bulk_create không phát tín hiệu post_save, nên ProgressSummary được tính lại và cache xu hướng
+  được làm mới một lần ở cuối.
+"""
+import csv
+import datetime
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from resofit_api.db_utils import bulk_upsert
+from .models import ProgressLog
+from .summary import recompute_summary
+from .trends import schedule_invalidation
+
+FORMATS = ('csv', 'json', 'jsonl')
+MAX_WEIGHT = 500
+MAX_REPORTED_ERRORS = 100
+UPDATE_FIELDS = ['weight', 'body_fat_percentage', 'notes']
+
+# Tên cột thường gặp trong file xuất từ ứng dụng cân (so khớp không phân biệt hoa thường)
+COLUMN_ALIASES = {
+    'date': 'date', 'time': 'date', 'datetime': 'date', 'timestamp': 'date',
+    'weight': 'weight', 'weight_kg': 'weight', 'weight (kg)': 'weight',
+    'body_fat_percentage': 'body_fat_percentage', 'body_fat': 'body_fat_percentage',
+    'body fat': 'body_fat_percentage', 'body fat (%)': 'body_fat_percentage', 'fat (%)': 'body_fat_percentage',
+    'notes': 'notes', 'note': 'notes',
+}
+
+
+class ImportFormatError(ValueError):
+    """Cả file không đọc được (sai định dạng, thiếu cột bắt buộc)."""
+
+
+class RowError(ValueError):
+    """Một dòng không hợp lệ; các dòng khác vẫn được nhập."""
+
+
+def guess_format(filename, default='csv'):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else default
+
+
+def read_csv(stream):
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [COLUMN_ALIASES.get(name.strip().lower()) for name in header]
+    missing = {'date', 'weight'} - set(columns)
+    if missing:
+        raise ImportFormatError(f"Thiếu cột: {', '.join(sorted(missing))}.")
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, {column: value for column, value in zip(columns, values) if column}
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"Dòng {line_number}: JSON không hợp lệ ({exc}).")
+
+
+# Token bị cắt ở cuối chunk (số, true/false/null, escape) chỉ làm decoder báo lỗi trong vài ký tự cuối buffer
+PARTIAL_TOKEN_TAIL = 8
+
+
+def _maybe_truncated(buffer, exc):
+    """Lỗi decode có thể chỉ do phần tử chưa đọc hết (đọc thêm chunk sẽ hết lỗi) hay chắc chắn là JSON sai."""
+    return exc.msg.startswith('Unterminated string') or exc.pos >= len(buffer.rstrip()) - PARTIAL_TOKEN_TAIL
+
+
+def read_json_array(stream, chunk_size=64 * 1024):
+    """Đọc từng phần tử của một mảng JSON lớn mà không nạp cả file; số dòng là thứ tự phần tử (từ 1)."""
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ImportFormatError("File JSON phải là một mảng các bản ghi.")
+    buffer = buffer[1:]
+    eof = False
+    index = 0
+    while True:
+        buffer = buffer.lstrip()
+        if index and buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        error = following = None
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as exc:
+            error = exc
+        else:
+            following = buffer[end:].lstrip()[:1]
+            if following and following not in ',]':
+                # VD: số bị cắt trước phần mũ ("-1.5" của "-1.5e-07")
+                error = json.JSONDecodeError("Expecting ',' delimiter", buffer, end)
+        # Chỉ chấp nhận phần tử khi đã thấy ký tự sau nó (tránh cắt đôi một số ở cuối chunk)
+        if error is not None or (not following and not eof):
+            # Lỗi ở giữa buffer thì báo ngay, không đọc tiếp cả file rồi mới báo
+            if eof or (error is not None and not _maybe_truncated(buffer, error)):
+                raise ImportFormatError(f"Phần tử {index + 1}: JSON không hợp lệ ({error}).")
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        index += 1
+        yield index, item
+        buffer = buffer[end:]
+
+
+READERS = {'csv': read_csv, 'json': read_json_array, 'jsonl': read_jsonl}
+
+
+def _parse_number(value, field, required=False):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise RowError(f"Thiếu '{field}'.")
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"'{field}' phải là số.")
+
+
+def validate_row(raw, today):
+    """Chuẩn hóa một bản ghi đã đọc; `date` nhận YYYY-MM-DD hoặc ngày giờ ISO 8601 (chỉ lấy phần ngày)."""
+    if not isinstance(raw, dict):
+        raise RowError("Bản ghi phải là một object.")
+    value = str(raw.get('date') or '').strip()
+    try:
+        date = parse_date(value) or parse_datetime(value)
+    except ValueError:
+        date = None
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    if date is None:
+        raise RowError("'date' không hợp lệ (cần YYYY-MM-DD).")
+    if date > today:
+        raise RowError("'date' không được ở tương lai.")
+
+    weight = _parse_number(raw.get('weight'), 'weight', required=True)
+    if not 0 < weight <= MAX_WEIGHT:
+        raise RowError(f"'weight' phải nằm trong (0, {MAX_WEIGHT}] kg.")
+    body_fat = _parse_number(raw.get('body_fat_percentage'), 'body_fat_percentage')
+    if body_fat is not None and not 0 <= body_fat <= 100:
+        raise RowError("'body_fat_percentage' phải nằm trong [0, 100].")
+    notes = raw.get('notes')
+    return {
+        'date': date,
+        'weight': weight,
+        'body_fat_percentage': body_fat,
+        'notes': str(notes) if notes not in (None, '') else None,
+    }
+
+
+def import_progress_logs(member, rows, created_by=None, batch_size=1000, dry_run=False):
+    """
+    Nhập các bản ghi `rows` (cặp (số dòng, dict) từ một reader) cho `member`.
+    Trả về báo cáo: số dòng đã đọc, số bản ghi tạo mới/cập nhật, và các lỗi theo dòng
+    (tối đa `MAX_REPORTED_ERRORS`, tổng số lỗi ở `error_count`).
+    """
+    today = timezone.localdate()
+    report = {'processed': 0, 'created': 0, 'updated': 0, 'error_count': 0, 'errors': []}
+    pending = {}
+
+    def flush():
+        if not pending:
+            return
+        existing = set(
+            ProgressLog.objects.filter(member=member, date__in=list(pending)).values_list('date', flat=True)
+        )
+        bulk_upsert(
+            ProgressLog,
+            [ProgressLog(member=member, created_by=created_by, **data) for data in pending.values()],
+            unique_fields=['member', 'date'], update_fields=UPDATE_FIELDS, batch_size=batch_size,
+        )
+        report['updated'] += len(existing)
+        report['created'] += len(pending) - len(existing)
+        pending.clear()
+
+    with transaction.atomic():
+        for row_number, raw in rows:
+            report['processed'] += 1
+            try:
+                data = validate_row(raw, today)
+            except RowError as exc:
+                report['error_count'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'row': row_number, 'error': str(exc)})
+                continue
+            # Cùng một ngày trong một lô phải gộp lại (ON CONFLICT không cho cập nhật một dòng hai lần)
+            pending[data['date']] = data
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+
+        if report['created'] or report['updated']:
+            recompute_summary(member.pk, create=True)
+            schedule_invalidation(member.pk)
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ProgressLog, WaterLog
+from .models import ProgressLog, ProgressSummary, WaterLog
 from users.serializers import UserSerializer
 
 class ProgressLogSerializer(serializers.ModelSerializer):
@@ -34,4 +34,22 @@ class WaterLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = WaterLog
         fields = ['id', 'date', 'amount']
-# --------------------------
\ No newline at end of file
+# --------------------------
+
+class ProgressSummarySerializer(serializers.ModelSerializer):
+    """
+    Tóm tắt tiến độ đọc từ bảng ProgressSummary, giữ nguyên định dạng cũ của /summary/.
+    Cần select_related('member__memberprofile', 'latest_log__member__memberprofile', 'latest_log__created_by').
+    """
+    member_id = serializers.IntegerField(read_only=True)
+    latest_log = ProgressLogSerializer(read_only=True)
+    first_log_weight = serializers.FloatField(source='first_weight', read_only=True)
+    bmi = serializers.FloatField(source='latest_bmi', read_only=True)
+    is_height_missing = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProgressSummary
+        fields = ['member_id', 'latest_log', 'first_log_weight', 'weight_change', 'bmi', 'log_count', 'is_height_missing']
+
+    def get_is_height_missing(self, obj):
+        return getattr(getattr(obj.member, 'memberprofile', None), 'height', None) is None
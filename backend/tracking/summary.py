@@ -0,0 +1,94 @@
+"""
+Duy trì bảng ProgressSummary (mỗi hội viên một dòng).
+
+Dòng được tạo khi ghi ProgressLog (hoặc lười ở lần đọc đầu tiên với dữ liệu cũ), sau đó các tín hiệu
+giữ nó luôn khớp. Khi cập nhật, dòng tóm tắt được khóa (SELECT ... FOR UPDATE) trước khi tính lại,
+nên các lượt ghi đồng thời cho cùng một hội viên được xếp hàng và lượt sau luôn thấy dữ liệu của lượt trước.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Round
+
+from users.models import CustomUser
+from .models import ProgressLog, ProgressSummary
+
+
+def calculate_bmi(weight, height_cm):
+    if weight is None or not height_cm or height_cm <= 0:
+        return None
+    height_m = height_cm / 100
+    return round(weight / (height_m * height_m), 2)
+
+
+def _summary_values(member_id):
+    """Tính mọi giá trị tóm tắt của một hội viên trong một câu query (subquery trên ProgressLog)."""
+    logs = ProgressLog.objects.filter(member=OuterRef('pk'))
+    latest = logs.order_by('-date')
+    row = CustomUser.objects.filter(pk=member_id).annotate(
+        log_count=Subquery(logs.order_by().values('member').annotate(total=Count('pk')).values('total')),
+        first_weight=Subquery(logs.order_by('date').values('weight')[:1]),
+        latest_log_id=Subquery(latest.values('pk')[:1]),
+        latest_weight=Subquery(latest.values('weight')[:1]),
+        height=F('memberprofile__height'),
+    ).values('log_count', 'first_weight', 'latest_log_id', 'latest_weight', 'height').first()
+    if row is None:
+        return None
+
+    latest_weight = row['latest_weight']
+    has_logs = latest_weight is not None
+    return {
+        'log_count': row['log_count'] or 0,
+        'first_weight': row['first_weight'],
+        'latest_log_id': row['latest_log_id'],
+        'latest_weight': latest_weight,
+        'weight_change': latest_weight - row['first_weight'] if has_logs else None,
+        'latest_bmi': calculate_bmi(latest_weight, row['height']),
+    }
+
+
+def recompute_summary(member_id, create=False):
+    """
+    Tính lại tóm tắt của hội viên. Mặc định chỉ cập nhật dòng đã có; `create=True` sẽ tạo dòng
+    nếu chưa có. Dòng luôn được tạo trước rồi khóa và tính lại trong cùng transaction, nên một
+    lượt ghi ProgressLog đồng thời hoặc chờ dòng này, hoặc đã commit trước khi ta tính.
+    """
+    with transaction.atomic():
+        summary = ProgressSummary.objects.select_for_update().filter(member_id=member_id).first()
+        if summary is None:
+            if not create:
+                return None
+            ProgressSummary.objects.get_or_create(member_id=member_id)
+            summary = ProgressSummary.objects.select_for_update().get(member_id=member_id)
+        values = _summary_values(member_id)
+        if values is None:
+            return None
+        for field, value in values.items():
+            setattr(summary, field, value)
+        summary.save()
+    return summary
+
+
+def update_bmi(member_id, height_cm):
+    """Chiều cao thay đổi: tính lại BMI từ cân nặng mới nhất bằng một câu UPDATE."""
+    if height_cm and height_cm > 0:
+        bmi = Round(F('latest_weight') / Value((height_cm / 100) ** 2), 2)
+    else:
+        bmi = Value(None)
+    ProgressSummary.objects.filter(member_id=member_id).update(latest_bmi=bmi)
+
+
+def get_summaries(member_ids):
+    """
+    Tóm tắt của nhiều hội viên trong một câu query; dòng nào chưa có thì được tạo lười.
+    Trả về dict {member_id: ProgressSummary}.
+    """
+    queryset = ProgressSummary.objects.select_related(
+        'member__memberprofile', 'latest_log__member__memberprofile', 'latest_log__created_by',
+    )
+    summaries = {summary.member_id: summary for summary in queryset.filter(member_id__in=member_ids)}
+    missing = [member_id for member_id in member_ids if member_id not in summaries]
+    if missing:
+        for member_id in missing:
+            recompute_summary(member_id, create=True)
+        summaries.update({summary.member_id: summary for summary in queryset.filter(member_id__in=missing)})
+    return summaries
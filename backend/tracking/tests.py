@@ -1,3 +1,572 @@
-from django.test import TestCase
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock, skipIf
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from personal_trainers.models import PTAssignment
+from resofit_api import cache_utils
+from users.models import CustomUser, MemberProfile
+from .models import MemberAdvice, ProgressLog, ProgressSummary, WaterLog, WaterRequestKey
+from . import advice, trends
+from .timeseries import lttb_indices
+from .progress_import import ImportFormatError, read_json_array
+from .water import add_water
+
+# Cache ngoài database (như Redis) cho các test đếm query hoặc chạy nhiều thread:
+# DatabaseCache mặc định cũng ghi vào database test
+IN_MEMORY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_logs(member, days, start=datetime.date(2023, 1, 1)):
+    ProgressLog.objects.bulk_create([
+        ProgressLog(
+            member=member, created_by=member, date=start + datetime.timedelta(days=offset),
+            weight=80 - offset * 0.01 + (offset % 7) * 0.1,
+            body_fat_percentage=None if offset % 2 else 20.0,
+        )
+        for offset in range(days)
+    ])
+
+
+class ProgressSeriesTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.member.memberprofile.height = 180
+        self.member.memberprofile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_series_is_columnar_and_single_query(self):
+        create_logs(self.member, 10)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tracking/logs/series/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        data = response.data
+        self.assertEqual(len(data['dates']), 10)
+        self.assertEqual(data['dates'][0], '2023-01-01')
+        self.assertEqual(data['weight'][0], 80.0)
+        self.assertEqual(data['bmi'][0], round(80 / 1.8 ** 2, 2))
+        self.assertEqual(data['body_fat_percentage'][:2], [20.0, None])
+        self.assertFalse(data['downsampled'])
+
+    def test_downsampling_keeps_endpoints(self):
+        create_logs(self.member, 3 * 365)
+        response = self.client.get('/api/tracking/logs/series/', {'points': 100})
+        data = response.data
+        self.assertEqual(len(data['dates']), 100)
+        self.assertEqual(data['total_points'], 3 * 365)
+        self.assertEqual(data['dates'][0], '2023-01-01')
+        self.assertEqual(data['dates'][-1], (datetime.date(2023, 1, 1) + datetime.timedelta(days=3 * 365 - 1)).isoformat())
+        self.assertEqual(data['dates'], sorted(data['dates']))
+
+    def test_rejects_invalid_points(self):
+        self.assertEqual(self.client.get('/api/tracking/logs/series/', {'points': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/tracking/logs/series/', {'points': 2}).status_code, 400)
+
+    def test_lttb_keeps_peaks(self):
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[500] = 10
+        indices = lttb_indices(x, y, 20)
+        self.assertEqual(len(indices), 20)
+        self.assertIn(500, indices)
+
+
+class ProgressSummaryTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.member.memberprofile.height = 200
+        self.member.memberprofile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def log(self, day, weight):
+        return ProgressLog.objects.create(member=self.member, created_by=self.member, date=datetime.date(2025, 1, day), weight=weight)
+
+    def get_summary(self):
+        response = self.client.get('/api/tracking/summary/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_summary_is_created_lazily_and_kept_in_sync(self):
+        self.assertEqual(self.get_summary(), {'is_height_missing': False})
+        self.log(1, 90)
+        latest = self.log(10, 86)
+
+        data = self.get_summary()
+        self.assertEqual((data['first_log_weight'], data['weight_change'], data['bmi']), (90, -4, 21.5))
+        self.assertEqual(data['latest_log']['id'], latest.id)
+
+        latest.weight = 84
+        latest.save()
+        self.log(5, 88)
+        summary = ProgressSummary.objects.get(member=self.member)
+        self.assertEqual((summary.log_count, summary.latest_weight, summary.weight_change), (3, 84, -6))
+
+        latest.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.log_count, summary.latest_weight, summary.latest_bmi), (2, 88, 22.0))
+
+    def test_height_change_updates_bmi(self):
+        self.log(1, 100)
+        self.get_summary()
+        self.member.memberprofile.height = 100
+        self.member.memberprofile.save()
+        self.assertEqual(ProgressSummary.objects.get(member=self.member).latest_bmi, 100)
+
+    def test_log_write_creates_summary_row(self):
+        self.log(1, 90)
+        self.assertEqual(ProgressSummary.objects.get(member=self.member).latest_weight, 90)
+        # Xóa hội viên (cascade) không tạo lại dòng tóm tắt
+        self.member.delete()
+        self.assertFalse(ProgressSummary.objects.exists())
+
+    def test_new_profile_updates_bmi(self):
+        self.log(1, 100)
+        self.member.memberprofile.delete()
+        MemberProfile.objects.create(user=self.member, height=100)
+        self.assertEqual(ProgressSummary.objects.get(member=self.member).latest_bmi, 100)
+
+    def test_summary_read_is_single_query(self):
+        self.log(1, 90)
+        self.get_summary()
+        with CaptureQueriesContext(connection) as ctx:
+            self.get_summary()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_pt_lists_assigned_member_summaries(self):
+        pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        others = [CustomUser.objects.create_user(username=f'm{i}', password='pass', role='member') for i in range(3)]
+        for member in [self.member, *others[:2]]:
+            PTAssignment.objects.create(pt=pt, member=member)
+            ProgressLog.objects.create(member=member, created_by=pt, date=datetime.date(2025, 1, 1), weight=70)
+        self.client.force_authenticate(pt)
+
+        response = self.client.get('/api/tracking/summaries/')
+        self.assertEqual(sorted(item['member_id'] for item in response.data), sorted([self.member.id, others[0].id, others[1].id]))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tracking/summaries/', {'member_ids': f'{self.member.id},{others[2].id}'})
+        self.assertEqual([item['member_id'] for item in response.data], [self.member.id])
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+
+class WaterIntakeTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def post(self, payload):
+        return self.client.post('/api/tracking/daily-water/', payload, format='json')
+
+    def test_increment_is_single_statement(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post({'amount': 250})
+        self.assertEqual((response.data['amount'], response.data['applied']), (250, True))
+        self.assertEqual(len([q for q in ctx.captured_queries if 'waterlog' in q['sql'].lower()]), 1)
+        self.assertEqual(self.post({'amount': 500}).data['amount'], 750)
+        self.assertEqual(self.client.get('/api/tracking/daily-water/').data['amount'], 750)
+
+    def test_retried_sequence_is_not_counted_twice(self):
+        self.assertEqual(self.post({'amount': 500, 'seq': 1}).data['amount'], 500)
+        response = self.post({'amount': 500, 'seq': 1})
+        self.assertEqual((response.data['amount'], response.data['applied']), (500, False))
+        self.assertEqual(self.post({'amount': 250, 'seq': 2}).data['amount'], 750)
+        # Request không có seq luôn được cộng
+        self.assertEqual(self.post({'amount': 250}).data['amount'], 1000)
+
+    def test_retry_of_older_sequence_after_newer_is_applied_once(self):
+        self.assertEqual(self.post({'amount': 250, 'seq': 20}).data['amount'], 250)
+        # Lô seq=10 đến sau lô seq=20 (request chồng nhau/thử lại) vẫn được cộng, và chỉ một lần
+        self.assertEqual(self.post({'amount': 500, 'seq': 10}).data['applied'], True)
+        response = self.post({'amount': 500, 'seq': 10})
+        self.assertEqual((response.data['amount'], response.data['applied']), (750, False))
+
+    def test_purge_keeps_only_recent_request_keys(self):
+        today = timezone.now().date()
+        for offset in range(6):
+            add_water(self.member.id, today - datetime.timedelta(days=offset), 250, seq=1)
+
+        call_command('purge_water_request_keys', '--batch-size', '2', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(WaterRequestKey.objects.values_list('date', flat=True)),
+            [today - datetime.timedelta(days=offset) for offset in (3, 2, 1, 0)],
+        )
+        # Request gửi lại trong khoảng giữ khóa vẫn không bị cộng hai lần
+        self.assertEqual(self.post({'amount': 250, 'seq': 1}).data['applied'], False)
+
+    def test_rejects_invalid_input(self):
+        self.assertEqual(self.post({'amount': -1}).status_code, 400)
+        self.assertEqual(self.post({'amount': '250'}).status_code, 400)
+        self.assertEqual(self.post({'amount': 250, 'seq': 'x'}).status_code, 400)
+
+
+# SQLite (in-memory, shared cache) khóa cả bảng khi ghi đồng thời nên không kiểm tra được ở đây
+@skipIf(connection.vendor == 'sqlite', "Cần database hỗ trợ ghi đồng thời (PostgreSQL/MySQL).")
+class WaterIntakeConcurrencyTests(TransactionTestCase):
+
+    def test_parallel_increments_are_not_lost(self):
+        member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        today = datetime.date(2025, 1, 1)
+
+        def increment(_):
+            try:
+                add_water(member.id, today, 10)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(increment, range(300)))
+        self.assertEqual(WaterLog.objects.get(member=member, date=today).amount, 3000)
+
+    def test_parallel_retries_are_applied_once(self):
+        member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        today = datetime.date(2025, 1, 1)
+
+        def retry(_):
+            try:
+                return add_water(member.id, today, 10, seq=42)[1]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            applied = list(executor.map(retry, range(32)))
+        self.assertEqual(applied.count(True), 1)
+        self.assertEqual(WaterLog.objects.get(member=member, date=today).amount, 10)
+
+
+class WaterHistoryTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        start = datetime.date(2025, 1, 27)  # Thứ Hai
+        # 27/01 -> 09/02: đạt mục tiêu trừ ngày 31/01 và 09/02 (hôm nay, chưa uống đủ); 05/02 không có dữ liệu
+        amounts = [3000, 3200, 3000, 3000, 1000, 3000, 3000, 3000, 3000, None, 3000, 3000, 3000, 500]
+        WaterLog.objects.bulk_create([
+            WaterLog(member=self.member, date=start + datetime.timedelta(days=i), amount=amount)
+            for i, amount in enumerate(amounts) if amount is not None
+        ])
+
+    def get_history(self, **params):
+        params = {'start': '2025-01-27', 'end': '2025-02-09', **params}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tracking/water-history/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return response.data
+
+    def test_rollups_and_streaks(self):
+        data = self.get_history()
+        self.assertEqual(len(data['daily']), 14)
+        self.assertEqual(data['daily'][9], 0)
+        self.assertEqual(data['weekly'], {'starts': ['2025-01-27', '2025-02-03'], 'totals': [19200, 15500]})
+        self.assertEqual(data['monthly'], {'months': ['2025-01', '2025-02'], 'totals': [13200, 21500]})
+        self.assertEqual(data['achievement_rate'], round(11 / 14, 4))
+        self.assertEqual((data['current_streak'], data['longest_streak']), (3, 4))
+
+    def test_custom_target(self):
+        data = self.get_history(target=500)
+        self.assertEqual((data['current_streak'], data['longest_streak']), (4, 9))
+
+    def test_rejects_invalid_range(self):
+        response = self.client.get('/api/tracking/water-history/', {'start': '2025-02-10', 'end': '2025-02-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/tracking/water-history/', {'start': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FakeAdviceClient:
+    """Client giả lập thay cho Gemini: đếm số lần gọi và trả về JSON cố định (có độ trễ nhỏ)."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+        time.sleep(self.delay)
+        return '```json\n{"diet_advice": "Ăn đủ đạm.", "workout_advice": "Tập chân.",}\n```'
+
+
+@override_settings(CACHES=IN_MEMORY_CACHE)
+class AdviceCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client_stub = FakeAdviceClient()
+        patcher = mock.patch.object(advice, 'get_client', return_value=self.client_stub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.api = APIClient()
+        self.api.force_authenticate(self.member)
+
+    def post(self, weight, height=175, bmi=22.86):
+        return self.api.post('/api/tracking/generate-advice/', {'weight': weight, 'height': height, 'bmi': bmi}, format='json')
+
+    def test_rounded_inputs_share_cached_result(self):
+        responses = [self.post(weight) for weight in (70.0, 70.1, 69.9, 70.2, 72)]
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertEqual(responses[0].data['diet_advice'], 'Ăn đủ đạm.')
+        # 4 request đầu làm tròn về cùng 70.0kg => 1 lần gọi; 72kg là lần gọi thứ hai
+        self.assertEqual(len(self.client_stub.prompts), 2)
+
+    def test_concurrent_identical_requests_share_one_upstream_call(self):
+        self.client_stub.delay = 0.2
+        inputs = advice.normalize_inputs(80, 180, 24.7, 'Giảm mỡ')
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: advice.generate_advice(inputs), range(8)))
+        self.assertEqual(len(self.client_stub.prompts), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    def test_waits_for_the_call_made_by_another_worker(self):
+        inputs = advice.normalize_inputs(80, 180, 24.7, 'Giảm mỡ')
+        key = f'{advice.ADVICE_CACHE_PREFIX}:{advice.fingerprint(inputs)}'
+        # Worker khác (kết nối cache riêng) đang gọi Gemini cho cùng đầu vào
+        other_worker = caches.create_connection('default')
+        self.assertTrue(other_worker.add(f'{key}:lock', 1, 30))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(advice.generate_advice, inputs)
+            time.sleep(0.1)
+            other_worker.set(key, {'diet_advice': 'Từ worker khác.', 'workout_advice': ''}, 60)
+            other_worker.delete(f'{key}:lock')
+            self.assertEqual(future.result()['diet_advice'], 'Từ worker khác.')
+        self.assertEqual(self.client_stub.prompts, [])
+
+    def test_invalid_input_and_bad_upstream_response(self):
+        self.assertEqual(self.post('abc').status_code, 400)
+        for value in ('inf', '1e400', 'nan'):
+            self.assertEqual(self.post(value).status_code, 400)
+        self.client_stub.generate = lambda prompt: 'not json'
+        self.assertEqual(self.post(90).status_code, 500)
+
+
+class PrecomputeAdviceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        today = datetime.date.today()
+        self.active = self.make_member('active', height=175, log_date=today)
+        self.no_height = self.make_member('no_height', height=None, log_date=today)
+        self.inactive = self.make_member('inactive', height=175, log_date=today - datetime.timedelta(days=90))
+
+    def make_member(self, username, height, log_date):
+        member = CustomUser.objects.create_user(username=username, password='pass', role='member')
+        member.memberprofile.height = height
+        member.memberprofile.save()
+        ProgressLog.objects.create(member=member, created_by=member, date=log_date, weight=70)
+        return member
+
+    def precompute(self, *args):
+        call_command('precompute_advice', '--stub', '--rate', '0', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_only_active_members_with_height_get_advice(self):
+        self.precompute()
+        self.assertEqual(list(MemberAdvice.objects.values_list('member_id', flat=True)), [self.active.pk])
+        stored = MemberAdvice.objects.get(member=self.active)
+        self.assertEqual(stored.inputs, advice.normalize_inputs(70, 175, 22.86, None))
+        self.assertIn('diet_advice', stored.advice)
+
+    def test_rerun_skips_unchanged_members(self):
+        self.precompute()
+        first = MemberAdvice.objects.get(member=self.active).generated_at
+        self.precompute()
+        self.assertEqual(MemberAdvice.objects.get(member=self.active).generated_at, first)
+
+        ProgressLog.objects.create(member=self.active, created_by=self.active, date=datetime.date.today() - datetime.timedelta(days=1), weight=70)
+        ProgressLog.objects.filter(member=self.active).update(weight=75)
+        self.precompute()
+        self.assertEqual(MemberAdvice.objects.get(member=self.active).inputs['weight'], 75.0)
+
+    def test_view_serves_precomputed_advice_without_model_call(self):
+        self.precompute()
+        api = APIClient()
+        api.force_authenticate(self.active)
+        with mock.patch.object(advice, 'get_client', side_effect=AssertionError('model should not be called')):
+            response = api.post('/api/tracking/generate-advice/', {'weight': 70, 'height': 175, 'bmi': 22.86}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, MemberAdvice.objects.get(member=self.active).advice)
+
+
+class ProgressImportTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.member.memberprofile.height = 200
+        self.member.memberprofile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def upload(self, name, content, **extra):
+        upload = SimpleUploadedFile(name, content.encode('utf-8-sig'))
+        return self.client.post('/api/tracking/logs/import/', {'file': upload, **extra}, format='multipart')
+
+    def test_csv_upsert_with_row_errors(self):
+        ProgressLog.objects.create(member=self.member, created_by=self.member, date=datetime.date(2024, 1, 2), weight=99)
+        self.client.get('/api/tracking/summary/')  # tạo sẵn dòng tóm tắt để kiểm tra việc tính lại sau khi nhập
+        content = (
+            "Date,Weight (kg),Body Fat (%),Source\n"
+            "2024-01-01,90.5,25,scale\n"
+            "2024-01-02T07:30:00,90.1,,scale\n"
+            "2024-01-03,abc,,scale\n"
+            "2099-01-01,80,,scale\n"
+            "2024-01-03,89.8,101,scale\n"
+        )
+        response = self.upload('scale.csv', content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['processed'], 5)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5, 6])
+
+        self.assertEqual(
+            list(ProgressLog.objects.filter(member=self.member).order_by('date').values_list('weight', 'body_fat_percentage')),
+            [(90.5, 25.0), (90.1, None)],
+        )
+        summary = self.client.get('/api/tracking/summary/').data
+        self.assertEqual((summary['log_count'], summary['latest_log']['weight']), (2, 90.1))
+
+    def test_json_body_and_streamed_array(self):
+        response = self.client.post('/api/tracking/logs/import/', {'logs': [
+            {'date': '2024-02-01', 'weight': 80}, {'date': '2024-02-01', 'weight': 79.5}, 'bad',
+        ]}, format='json')
+        self.assertEqual((response.data['created'], response.data['error_count']), (1, 1))
+        self.assertEqual(ProgressLog.objects.get(member=self.member).weight, 79.5)
+
+        items = [{'date': f'2024-03-{day:02d}', 'weight': 70 + day / 10} for day in range(1, 29)]
+        rows = list(read_json_array(StringIO(json.dumps(items, indent=2)), chunk_size=7))
+        self.assertEqual([raw for _, raw in rows], items)
+        # Số bị cắt ngay trước phần mũ ở cuối chunk
+        self.assertEqual([raw for _, raw in read_json_array(StringIO('[-1.5e-07, 2]'), chunk_size=5)], [-1.5e-07, 2])
+        response = self.upload('export.json', json.dumps(items))
+        self.assertEqual(response.data['created'], 28)
+
+    def test_streamed_array_fails_fast_on_syntax_error(self):
+        stream = StringIO('[{"date": "2024-03-01", "weight": 70}, {"date": 2024-03-02}, ' + '{"weight": 70}, ' * 10000 + ']')
+        with self.assertRaises(ImportFormatError):
+            list(read_json_array(stream, chunk_size=64))
+        # Chỉ đọc vài chunk đầu chứ không đọc đến hết file
+        self.assertLess(stream.tell(), 64 * 4)
+
+    def test_large_import_and_pt_scope(self):
+        start = datetime.date.today() - datetime.timedelta(days=9999)
+        lines = ["date,weight"] + [f"{start + datetime.timedelta(days=day)},{70 + day % 50 / 10}" for day in range(10000)]
+        call_command('import_progress_logs', self.write_file('\n'.join(lines)), '--member', 'member', stdout=StringIO())
+        self.assertEqual(ProgressLog.objects.filter(member=self.member).count(), 10000)
+
+        pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        self.client.force_authenticate(pt)
+        response = self.upload('scale.csv', "date,weight\n2024-01-01,80\n", member_id=self.member.pk)
+        self.assertEqual(response.status_code, 404)
+        PTAssignment.objects.create(pt=pt, member=self.member)
+        response = self.upload('scale.csv', "date,weight\n2024-01-01,80\n", member_id=self.member.pk)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(ProgressLog.objects.get(member=self.member, date='2024-01-01').weight, 80)
+
+    def write_file(self, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.remove, handle.name)
+        with handle:
+            handle.write(content)
+        return handle.name
+
+
+@override_settings(CACHES=IN_MEMORY_CACHE)
+class WeightTrendTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        self.start = datetime.date(2024, 1, 1)
+
+    def log(self, offset, weight):
+        ProgressLog.objects.create(member=self.member, created_by=self.member,
+                                   date=self.start + datetime.timedelta(days=offset), weight=weight)
+
+    def get_trend(self, **params):
+        response = self.client.get('/api/tracking/logs/trend/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_rolling_average_uses_calendar_window(self):
+        days = np.array([0, 1, 2, 10, 11], dtype=np.float64)
+        weights = np.array([80, 82, 84, 70, 72], dtype=np.float64)
+        np.testing.assert_allclose(trends.rolling_average(days, weights, 7), [80, 81, 82, 70, 71])
+
+    def test_rate_goal_projection_and_plateau(self):
+        # Giảm đều 0.5kg/tuần trong 8 tuần, cân cách ngày
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset in range(0, 57, 2):
+                self.log(offset, 90 - offset / 14)
+        data = self.get_trend(target_weight=80)
+        self.assertAlmostEqual(data['rate_kg_per_week'], -0.5, places=3)
+        self.assertFalse(data['plateau']['is_plateau'])
+        self.assertEqual(data['goal']['remaining'], -6.0)
+        self.assertEqual(data['goal']['days_to_goal'], 84)
+        self.assertEqual(data['goal']['projected_date'], (self.start + datetime.timedelta(days=56 + 84)).isoformat())
+
+        # Hai tuần chững cân tiếp theo
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset in range(58, 73, 2):
+                self.log(offset, 86 + (offset % 4) * 0.05)
+        data = self.get_trend(target_weight=80)
+        self.assertTrue(data['plateau']['is_plateau'])
+        self.assertEqual(data['log_count'], 37)
+
+    def test_cached_until_logs_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.log(0, 80)
+            self.log(7, 79)
+        self.get_trend()
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_trend()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(data['rate_kg_per_week'], -1.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.log(14, 79)
+        self.assertEqual(self.get_trend()['log_count'], 3)
+        self.assertEqual(self.client.get('/api/tracking/logs/trend/', {'window': 0}).status_code, 400)
+
+    def test_import_in_another_process_refreshes_served_trend(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.log(0, 80)
+        self.assertEqual(self.get_trend()['log_count'], 1)
+
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.remove, handle.name)
+        with handle:
+            handle.write("date,weight\n2024-01-08,79\n2024-01-15,78\n")
+        # Lệnh nhập chạy trong process riêng, với kết nối cache riêng
+        with mock.patch.object(cache_utils, 'cache', caches.create_connection('default')):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('import_progress_logs', handle.name, '--member', 'member', stdout=StringIO())
+
+        self.assertEqual(self.get_trend()['log_count'], 3)
@@ -0,0 +1,77 @@
+"""
+Chuỗi thời gian tiến độ (cân nặng, % mỡ, BMI) dạng cột cho biểu đồ, tính bằng NumPy.
+"""
+import numpy as np
+
+MIN_POINTS = 3
+
+
+def bmi_series(weights, height_cm):
+    """BMI cho cả mảng cân nặng từ một chiều cao duy nhất; trả về None nếu thiếu chiều cao."""
+    if not height_cm or height_cm <= 0:
+        return None
+    height_m = height_cm / 100
+    return np.round(np.asarray(weights, dtype=np.float64) / (height_m * height_m), 2)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Chọn chỉ số các điểm cần giữ theo thuật toán Largest-Triangle-Three-Buckets,
+    luôn giữ điểm đầu và điểm cuối. Giữ nguyên hình dạng đường cong khi giảm số điểm.
+    """
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Biên các bucket ở giữa (trừ điểm đầu và điểm cuối)
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Điểm trung bình của bucket kế tiếp (bucket cuối thì là điểm cuối)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Diện tích tam giác (x2) tạo bởi điểm đã chọn trước, mỗi điểm trong bucket và điểm trung bình
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def progress_series(rows, height_cm, points=None):
+    """
+    `rows` là các bộ (date, weight, body_fat_percentage) đã sắp theo ngày.
+    Trả về dict các mảng song song, giảm mẫu còn `points` điểm (theo cân nặng) nếu được yêu cầu.
+    """
+    dates = [row[0] for row in rows]
+    weights = np.array([row[1] for row in rows], dtype=np.float64)
+    body_fat = np.array([np.nan if row[2] is None else row[2] for row in rows], dtype=np.float64)
+
+    keep = np.arange(len(rows))
+    if points and len(rows) > points:
+        ordinals = np.array([day.toordinal() for day in dates], dtype=np.float64)
+        keep = lttb_indices(ordinals, weights, points)
+
+    weights = weights[keep]
+    body_fat = body_fat[keep]
+    bmi = bmi_series(weights, height_cm)
+    return {
+        'dates': [dates[index].isoformat() for index in keep],
+        'weight': weights.tolist(),
+        'body_fat_percentage': [None if np.isnan(value) else value for value in body_fat.tolist()],
+        'bmi': bmi.tolist() if bmi is not None else [None] * len(keep),
+        'height_cm': height_cm,
+        'total_points': len(rows),
+        'downsampled': len(keep) < len(rows),
+    }
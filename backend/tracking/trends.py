@@ -0,0 +1,122 @@
+"""
+Phân tích xu hướng cân nặng của một hội viên bằng NumPy, cache theo hội viên.
+
+- Trung bình trượt theo thời gian (cửa sổ N ngày, không phải N bản ghi, vì ngày cân không đều).
+- Tốc độ thay đổi (kg/tuần) bằng hồi quy tuyến tính trên các ngày gần nhất.
+- Ngày dự kiến đạt cân nặng mục tiêu (nếu có `target_weight`) theo đường hồi quy.
+- Phát hiện chững cân (plateau): tốc độ gần như bằng 0 trong khoảng thời gian gần nhất.
+
+Kết quả được cache theo phiên bản của hội viên; phiên bản đổi khi ProgressLog của họ thay đổi
+(tín hiệu trong tracking/models.py, hoặc gọi trực tiếp sau khi nhập hàng loạt). Phiên bản nằm trong
+cache dùng chung (xem `CACHES`), nên thay đổi từ lệnh nhập hay worker khác được mọi worker thấy ngay.
+"""
+import datetime
+
+import numpy as np
+from django.db import transaction
+
+from resofit_api.cache_utils import bump_version, get_version, single_flight
+from .models import ProgressLog
+
+TREND_CACHE_NAMESPACE = 'progress_trend'
+TREND_CACHE_TIMEOUT = 60 * 60 * 24
+REGRESSION_DAYS = 28
+PLATEAU_DAYS = 14
+PLATEAU_RATE = 0.1  # kg/tuần
+MAX_PROJECTION_DAYS = 3 * 365
+
+
+def schedule_invalidation(member_id):
+    """Đổi phiên bản cache sau khi transaction commit."""
+    transaction.on_commit(lambda: bump_version(TREND_CACHE_NAMESPACE, member_id))
+
+
+def rolling_average(days, weights, window_days):
+    """Trung bình các lần cân trong `window_days` ngày tính đến mỗi điểm (`days` tăng dần, đơn vị ngày)."""
+    sums = np.concatenate([[0.0], np.cumsum(weights)])
+    ends = np.arange(1, len(days) + 1)
+    starts = np.searchsorted(days, days - window_days + 1, side='left')
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def linear_fit(days, weights):
+    """Hồi quy tuyến tính; trả về (độ dốc kg/ngày, giá trị khớp tại điểm cuối, R²) hoặc None nếu không đủ dữ liệu."""
+    if len(days) < 2 or days[-1] == days[0]:
+        return None
+    x = days - days[-1]
+    slope, intercept = np.polyfit(x, weights, 1)
+    residual = weights - (slope * x + intercept)
+    total = np.sum((weights - weights.mean()) ** 2)
+    r_squared = 1.0 - np.sum(residual ** 2) / total if total else 1.0
+    return float(slope), float(intercept), float(r_squared)
+
+
+def _recent(days, weights, span_days):
+    keep = days >= days[-1] - span_days + 1
+    return days[keep], weights[keep]
+
+
+def project_goal(last_date, current, slope_per_day, target_weight):
+    remaining = target_weight - current
+    goal = {'target_weight': target_weight, 'remaining': round(remaining, 2), 'projected_date': None, 'days_to_goal': None}
+    if abs(remaining) < 0.05:
+        goal['days_to_goal'] = 0
+        goal['projected_date'] = last_date.isoformat()
+    elif slope_per_day and np.sign(remaining) == np.sign(slope_per_day):
+        days_to_goal = int(np.ceil(remaining / slope_per_day))
+        if days_to_goal <= MAX_PROJECTION_DAYS:
+            goal['days_to_goal'] = days_to_goal
+            goal['projected_date'] = (last_date + datetime.timedelta(days=days_to_goal)).isoformat()
+    return goal
+
+
+def weight_trend(rows, window_days=7, target_weight=None):
+    """`rows` là các cặp (date, weight) đã sắp theo ngày."""
+    result = {
+        'log_count': len(rows),
+        'window_days': window_days,
+        'dates': [day.isoformat() for day, _ in rows],
+        'weight': [weight for _, weight in rows],
+        'rolling_average': [],
+        'rate_kg_per_week': None,
+        'r_squared': None,
+        'plateau': None,
+        'goal': None,
+    }
+    if not rows:
+        return result
+
+    days = np.array([day.toordinal() for day, _ in rows], dtype=np.float64)
+    weights = np.array(result['weight'], dtype=np.float64)
+    result['rolling_average'] = np.round(rolling_average(days, weights, window_days), 2).tolist()
+
+    fit = linear_fit(*_recent(days, weights, REGRESSION_DAYS))
+    if fit is None:
+        return result
+    slope, current, r_squared = fit
+    result['rate_kg_per_week'] = round(slope * 7, 3)
+    result['r_squared'] = round(r_squared, 3)
+
+    plateau_days, plateau_weights = _recent(days, weights, PLATEAU_DAYS)
+    plateau_fit = linear_fit(plateau_days, plateau_weights)
+    # Chỉ kết luận khi có đủ dữ liệu: ít nhất 3 lần cân trải trên nửa cửa sổ
+    enough = plateau_fit is not None and len(plateau_days) >= 3 and plateau_days[-1] - plateau_days[0] >= PLATEAU_DAYS / 2
+    result['plateau'] = {
+        'is_plateau': bool(enough and abs(plateau_fit[0] * 7) < PLATEAU_RATE),
+        'window_days': PLATEAU_DAYS,
+        'rate_kg_per_week': round(plateau_fit[0] * 7, 3) if plateau_fit else None,
+    }
+    if target_weight is not None:
+        result['goal'] = project_goal(rows[-1][0], current, slope, target_weight)
+    return result
+
+
+def get_weight_trend(member_id, window_days=7, target_weight=None):
+    version = get_version(TREND_CACHE_NAMESPACE, member_id)
+    key = f'{TREND_CACHE_NAMESPACE}:{member_id}:{version}:{window_days}:{target_weight}'
+
+    def build():
+        rows = list(ProgressLog.objects.filter(member_id=member_id).order_by('date').values_list('date', 'weight'))
+        return weight_trend(rows, window_days, target_weight)
+
+    return single_flight(key, build, TREND_CACHE_TIMEOUT)
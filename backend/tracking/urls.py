@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProgressLogViewSet, ProgressSummaryView, GenerateAdviceView, DailyWaterLogView
+from .views import ProgressLogViewSet, ProgressSummaryView, ProgressSummaryListView, GenerateAdviceView, DailyWaterLogView, WaterHistoryView
 
 router = DefaultRouter()
 router.register(r'logs', ProgressLogViewSet, basename='progresslog')
@@ -8,7 +8,9 @@ router.register(r'logs', ProgressLogViewSet, basename='progresslog')
 urlpatterns = [
     path('', include(router.urls)),
     path('summary/', ProgressSummaryView.as_view(), name='progress_summary'),
+    path('summaries/', ProgressSummaryListView.as_view(), name='progress_summaries'),
     path('generate-advice/', GenerateAdviceView.as_view(), name='generate_advice'),
     path('daily-water/', DailyWaterLogView.as_view(), name='daily_water_log'),
+    path('water-history/', WaterHistoryView.as_view(), name='water_history'),
 
 ]
\ No newline at end of file
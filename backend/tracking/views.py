@@ -1,39 +1,47 @@
 from rest_framework.response import Response
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from .models import ProgressLog, WaterLog
-from .serializers import ProgressLogSerializer, WaterLogSerializer
-from users.permissions import IsOwnerOrAssignedPT
+from .models import MemberAdvice, ProgressLog, WaterLog
+from .serializers import ProgressLogSerializer, ProgressSummarySerializer, WaterLogSerializer
+from .summary import get_summaries
+from .timeseries import progress_series
+from .trends import get_weight_trend
+from .water import add_water, water_history
+from .progress_import import FORMATS, READERS, ImportFormatError, guess_format, import_progress_logs
+from .advice import AdviceFormatError, fingerprint, generate_advice, normalize_inputs
+from users.permissions import IsOwnerOrAssignedPT, IsPT
+from personal_trainers.models import PTAssignment
 from rest_framework.views import APIView
 from users.models import CustomUser
-import google.generativeai as genai
-from django.conf import settings
-import json
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+import datetime
+import io
+import logging
 
+logger = logging.getLogger(__name__)
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash-latest')
 
 class ProgressLogViewSet(viewsets.ModelViewSet):
     serializer_class = ProgressLogSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrAssignedPT]
 
-    def get_queryset(self):
+    def get_target_member(self):
         user = self.request.user
         member_id = self.request.query_params.get('member_id', None)
 
-        target_member = None
         # Xác định đối tượng cần lấy log
         if user.role == 'pt' and member_id:
             try:
-                target_member = CustomUser.objects.get(id=member_id, role='member')
                 # TODO: Kiểm tra quyền của PT với member này
-            except CustomUser.DoesNotExist:
-                return ProgressLog.objects.none()
-        else:
-            target_member = user
+                return CustomUser.objects.get(id=member_id, role='member')
+            except (CustomUser.DoesNotExist, ValueError):
+                return None
+        return user
 
+    def get_queryset(self):
+        target_member = self.get_target_member()
         if not target_member:
             return ProgressLog.objects.none()
 
@@ -59,6 +67,95 @@ class ProgressLogViewSet(viewsets.ModelViewSet):
         # Luôn trả về theo thứ tự ngày tăng dần
         return queryset.order_by('date')
 
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Dữ liệu biểu đồ dạng mảng song song (ngày, cân nặng, % mỡ, BMI) trong một câu query.
+        Tham số: `member_id`, `year`, `month` như danh sách; `points` để giảm mẫu (LTTB) còn tối đa N điểm.
+        """
+        points = request.query_params.get('points')
+        if points is not None:
+            try:
+                points = int(points)
+            except ValueError:
+                return Response({"error": "points must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+            if points < 3:
+                return Response({"error": "points must be at least 3."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Chiều cao được JOIN sẵn vào cùng câu query, thay vì tra profile cho từng dòng
+        rows = list(self.get_queryset().values_list(
+            'date', 'weight', 'body_fat_percentage', 'member__memberprofile__height'
+        ))
+        height_cm = rows[0][3] if rows else None
+        return Response(progress_series(rows, height_cm, points))
+
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """
+        Xu hướng cân nặng trên toàn bộ lịch sử của hội viên: trung bình trượt `window` ngày (mặc định 7),
+        tốc độ thay đổi kg/tuần, phát hiện chững cân và ngày dự kiến đạt `target_weight` (nếu có).
+        PT xem của hội viên qua `member_id`.
+        """
+        member = self.get_target_member()
+        if member is None:
+            return Response({"error": "Member not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            window = int(request.query_params.get('window', 7))
+            target_weight = request.query_params.get('target_weight')
+            target_weight = round(float(target_weight), 1) if target_weight is not None else None
+        except ValueError:
+            return Response({"error": "window must be an integer and target_weight a number."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= window <= 90:
+            return Response({"error": "window must be between 1 and 90 days."}, status=status.HTTP_400_BAD_REQUEST)
+        if target_weight is not None and not 0 < target_weight <= 500:
+            return Response({"error": "target_weight must be between 0 and 500 kg."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_weight_trend(member.id, window, target_weight))
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_logs(self, request):
+        """
+        Nhập hàng loạt lịch sử cân (VD: từ ứng dụng cân thông minh), upsert theo ngày.
+        Gửi file `file` (multipart; `format` = csv/json/jsonl, mặc định suy ra từ tên file)
+        hoặc body JSON `{"logs": [...]}`. PT nhập cho hội viên được gán qua `member_id`.
+        Trả về số bản ghi tạo mới/cập nhật và lỗi theo từng dòng.
+        """
+        user = request.user
+        member = user
+        if user.role == 'pt':
+            member_id = request.data.get('member_id') or request.query_params.get('member_id')
+            assignment = PTAssignment.objects.select_related('member').filter(
+                pt=user, member_id=member_id, is_active=True,
+            ).first() if str(member_id or '').isdigit() else None
+            if assignment is None:
+                return Response({"error": "Member not found or not assigned to you."}, status=status.HTTP_404_NOT_FOUND)
+            member = assignment.member
+        elif user.role != 'member':
+            return Response({"error": "Only members and their PTs can import progress logs."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is not None:
+            fmt = request.data.get('format') or guess_format(upload.name)
+            if fmt not in READERS:
+                return Response({"error": f"format must be one of {', '.join(FORMATS)}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            # utf-8-sig: bỏ qua BOM mà Excel/ứng dụng cân thường thêm vào đầu file CSV
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            rows = READERS[fmt](stream)
+        else:
+            logs = request.data.get('logs')
+            if not isinstance(logs, list):
+                return Response({"error": "Provide a 'file' upload or a 'logs' list."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            rows = enumerate(logs, start=1)
+
+        try:
+            report = import_progress_logs(member, rows, created_by=user)
+        except (ImportFormatError, UnicodeDecodeError) as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
     def perform_create(self, serializer):
         user = self.request.user
         if user.role == 'pt':
@@ -91,40 +188,37 @@ class ProgressSummaryView(APIView):
             # Nếu là Hội viên, hoặc PT không cung cấp member_id,
             target_member = requesting_user
 
-        # --- Bắt đầu logic tính toán, sử dụng `target_member` ---
-
-        latest_log = ProgressLog.objects.filter(member=target_member).order_by('-date').first()
-        first_log = ProgressLog.objects.filter(member=target_member).order_by('date').first()
-
-        if not latest_log:
+        # Đọc từ bảng tóm tắt đã tính sẵn (tạo lười ở lần đọc đầu tiên)
+        summary = get_summaries([target_member.id]).get(target_member.id)
+        if summary is None or not summary.log_count:
             # Vẫn trả về is_height_missing để frontend có thể xử lý
-            height_cm = getattr(getattr(target_member, 'memberprofile', None), 'height', None)
+            member = summary.member if summary else target_member
+            height_cm = getattr(getattr(member, 'memberprofile', None), 'height', None)
             return Response({'is_height_missing': height_cm is None})
 
-        height_cm = None
-        try:
-            height_cm = target_member.memberprofile.height
-        except AttributeError:  # Xử lý trường hợp không có profile
-            pass
+        return Response(ProgressSummarySerializer(summary).data)
 
-        bmi = None
-        if height_cm and height_cm > 0:
-            height_meters = height_cm / 100
-            bmi = latest_log.weight / (height_meters * height_meters)
 
-        weight_change = None
-        if first_log:
-            weight_change = latest_log.weight - first_log.weight
+class ProgressSummaryListView(APIView):
+    """
+    PT lấy tóm tắt tiến độ của nhiều hội viên mình phụ trách trong một lần gọi.
+    `member_ids` (tùy chọn, phân tách bằng dấu phẩy) để giới hạn; mặc định là mọi hội viên đang được gán.
+    """
+    permission_classes = [IsAuthenticated, IsPT]
 
-        summary_data = {
-            'latest_log': ProgressLogSerializer(latest_log).data,
-            'first_log_weight': first_log.weight if first_log else None,
-            'weight_change': weight_change,
-            'bmi': bmi,
-            'is_height_missing': height_cm is None,
-        }
+    def get(self, request, *args, **kwargs):
+        member_ids = PTAssignment.objects.filter(pt=request.user, is_active=True).values_list('member_id', flat=True)
+        requested = request.query_params.get('member_ids')
+        if requested:
+            try:
+                requested_ids = {int(value) for value in requested.split(',') if value.strip()}
+            except ValueError:
+                return Response({"error": "member_ids must be a comma-separated list of integers."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            member_ids = member_ids.filter(member_id__in=requested_ids)
 
-        return Response(summary_data)
+        summaries = get_summaries(sorted(set(member_ids)))
+        return Response(ProgressSummarySerializer(list(summaries.values()), many=True).data)
 
 class GenerateAdviceView(APIView):
     permission_classes = [IsAuthenticated]
@@ -135,89 +229,37 @@ class GenerateAdviceView(APIView):
         weight = request.data.get('weight')
         height = request.data.get('height') # tính bằng cm
         bmi = request.data.get('bmi')
-        goal = "Không có mục tiêu cụ thể"
+        goal = None
         if hasattr(user, 'memberprofile') and user.memberprofile and user.memberprofile.goal:
             goal = user.memberprofile.goal
 
         if not all([weight, height, bmi]):
             return Response({"error": "Missing required data"}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            inputs = normalize_inputs(weight, height, bmi, goal)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid weight, height or bmi."}, status=status.HTTP_400_BAD_REQUEST)
 
-
-
-        # try:
-        #     response = model.generate_content(prompt)
-        #
-        #     # --- LOGIC DỌN DẸP ĐƯỢC NÂNG CẤP ---
-        #     # 1. Dọn dẹp Markdown
-        #     clean_response_text = response.text.strip().replace('```json', '').replace('```', '').strip()
-        #
-        #     # 2. Xử lý dấu phẩy thừa (trailing comma)
-        #     # Tạm thời, một cách đơn giản là thay thế các trường hợp phổ biến
-        #     clean_response_text = clean_response_text.replace(',\n}', '\n}').replace(',\n]', '\n]')
-        #
-        #     # Thêm kiểm tra trước khi parse
-        #     if not clean_response_text:
-        #         raise ValueError("Gemini returned an empty response.")
-        #
-        #     advice_json = json.loads(clean_response_text)
-        #     return Response(advice_json)
-        #
-        # except json.JSONDecodeError as e:
-        #     print(f"JSON Decode Error: {e}")
-        #     print(f"Faulty text was: {clean_response_text}")
-        #     return Response({"error": "AI trả về định dạng không hợp lệ."},
-        #                     status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        # except Exception as e:
-        #     print(f"Gemini API error: {e}")
-        #     return Response({"error": "Không thể tạo lời khuyên từ AI."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # Lời khuyên đã sinh sẵn (lệnh precompute_advice) còn khớp đầu vào thì trả về ngay
+        digest = fingerprint(inputs)
+        stored = MemberAdvice.objects.filter(member=user, fingerprint=digest).values_list('advice', flat=True).first()
+        if stored is not None:
+            return Response(stored)
 
         try:
-            if not settings.GEMINI_API_KEY:
-                raise ValueError("GEMINI_API_KEY is not configured.")
-
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-1.5-flash-latest')
-
-            # --- Tạo Prompt cho AI ---
-            prompt = f"""
-                   Bạn là một chuyên gia dinh dưỡng và huấn luyện viên thể hình AI. 
-                   Dựa trên các chỉ số sau của một người dùng:
-                   - Chiều cao: {height} cm
-                   - Cân nặng: {weight} kg
-                   - Chỉ số BMI: {bmi:.2f}
-                   - Mục tiêu: "{goal}"
-
-                   Hãy đưa ra hai lời khuyên ngắn gọn, đi thẳng vào vấn đề, mỗi lời khuyên không quá 3 câu:
-                   1. Một lời khuyên về chế độ ăn uống.
-                   2. Một lời khuyên về nhóm cơ hoặc loại bài tập cần tập trung.
-
-                   Trả lời bằng tiếng Việt. Định dạng câu trả lời của bạn chính xác như sau:
-                   {{
-                       "diet_advice": "Nội dung lời khuyên ăn uống.",
-                       "workout_advice": "Nội dung lời khuyên luyện tập."
-                   }}
-                   """
-
-            response = model.generate_content(prompt)
-
-            clean_text = response.text.strip().replace('```json', '').replace('```', '').strip()
-            if not clean_text:
-                raise ValueError("Gemini returned an empty response.")
-
-            # Xử lý trailing comma
-            if clean_text.endswith(',}'):
-                clean_text = clean_text[:-2] + '}'
-
-            advice_json = json.loads(clean_text)
-            return Response(advice_json)
-
-        except json.JSONDecodeError as e:
-            print(f"JSON Decode Error: {e}\nFaulty text: '{clean_text}'")
+            # Kết quả được cache theo đầu vào đã làm tròn; request trùng đồng thời chỉ gọi Gemini một lần
+            advice = generate_advice(inputs)
+            MemberAdvice.objects.update_or_create(member=user, defaults={
+                'fingerprint': digest, 'inputs': inputs, 'advice': advice, 'generated_at': timezone.now(),
+            })
+            return Response(advice)
+        except AdviceFormatError as e:
+            logger.warning("Gemini returned malformed advice: %s", e)
             return Response({"error": "AI trả về định dạng không hợp lệ."},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            print(f"Gemini API Error: {e}")
+            logger.exception("Gemini API error: %s", e)
             return Response({"error": "Không thể tạo lời khuyên từ AI."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class DailyWaterLogView(APIView):
@@ -231,15 +273,59 @@ class DailyWaterLogView(APIView):
         return Response(serializer.data)
 
     def post(self, request, *args, **kwargs):
-        today = timezone.now().date()
-        water_log, created = WaterLog.objects.get_or_create(member=request.user, date=today)
-
-        # Lấy lượng nước muốn thêm từ request
+        """
+        Cộng lượng nước (`amount`, ml) vào hôm nay bằng một câu upsert nguyên tử.
+        `seq` (tùy chọn) là khóa idempotency của lô lượt bấm đã gộp phía client; gửi lại cùng `seq` không bị cộng hai lần.
+        """
         amount_to_add = request.data.get('amount', 0)
-        if not isinstance(amount_to_add, int) or amount_to_add <= 0:
+        if not isinstance(amount_to_add, int) or isinstance(amount_to_add, bool) or amount_to_add <= 0:
             return Response({"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST)
 
-        water_log.amount += amount_to_add
-        water_log.save()
-        serializer = WaterLogSerializer(water_log)
-        return Response(serializer.data)
\ No newline at end of file
+        seq = request.data.get('seq')
+        if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool) or seq < 0):
+            return Response({"error": "Invalid seq"}, status=status.HTTP_400_BAD_REQUEST)
+
+        water_log, applied = add_water(request.user.id, timezone.now().date(), amount_to_add, seq)
+        data = WaterLogSerializer(water_log).data
+        data['applied'] = applied
+        return Response(data)
+
+
+
+class WaterHistoryView(APIView):
+    """
+    Lịch sử uống nước theo ngày/tuần/tháng kèm tỉ lệ đạt mục tiêu và chuỗi ngày đạt.
+    Tham số: `start`, `end` (YYYY-MM-DD, mặc định 365 ngày gần nhất), `target` (ml, mặc định 3000),
+    `member_id` cho PT xem hội viên mình phụ trách.
+    """
+    permission_classes = [IsAuthenticated]
+    DEFAULT_TARGET = 3000
+    DEFAULT_DAYS = 365
+    MAX_DAYS = 366 * 5
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        member_id = request.user.id
+        if request.user.role == 'pt' and params.get('member_id'):
+            member_id = params['member_id']
+            if not member_id.isdigit() or not PTAssignment.objects.filter(pt=request.user, member_id=member_id, is_active=True).exists():
+                return Response({"error": "Member not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            end = parse_date(params['end']) if params.get('end') else timezone.now().date()
+            start = parse_date(params['start']) if params.get('start') else end - datetime.timedelta(days=self.DEFAULT_DAYS - 1)
+            target = int(params.get('target', self.DEFAULT_TARGET))
+        except ValueError:
+            start = None
+        if start is None or end is None or target <= 0:
+            return Response({"error": "Invalid start, end or target."}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days >= self.MAX_DAYS:
+            return Response({"error": f"Date range must be between 1 and {self.MAX_DAYS} days."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Một câu query duy nhất trên index (member, date); phần cộng dồn tuần/tháng làm bằng NumPy
+        rows = list(
+            WaterLog.objects.filter(member_id=member_id, date__range=(start, end))
+            .values_list('date', 'amount')
+        )
+        return Response(water_history(rows, start, end, target))
@@ -0,0 +1,146 @@
+"""
+Cộng dồn lượng nước uống trong ngày bằng một câu upsert nguyên tử.
+
+Thay cho get_or_create + đọc-sửa-ghi (mất cập nhật khi người dùng bấm liên tục), phần cộng
+được thực hiện ngay trong database:
+INSERT ... ON CONFLICT (member_id, date) DO UPDATE SET amount = amount + EXCLUDED.amount RETURNING ...
+
+Hợp đồng gộp lượt bấm phía client: client có thể gộp nhiều lượt bấm thành một request
+`{amount, seq}`, `seq` là khóa idempotency duy nhất của lô (theo hội viên, theo ngày). Khóa được ghi
+vào WaterRequestKey (unique) trong cùng transaction với phép cộng, nên request gửi lại với cùng `seq`
+không được cộng thêm, bất kể thứ tự các request đến server. `seq` chỉ cần duy nhất trong khoảng client
+còn gửi lại request, nên khóa của các ngày cũ được xóa định kỳ (lệnh `purge_water_request_keys`).
+"""
+import datetime
+
+import numpy as np
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+
+from .models import WaterLog, WaterRequestKey
+
+REQUEST_KEY_RETENTION_DAYS = 3
+
+
+def _quoted_columns(connection):
+    quote = connection.ops.quote_name
+    opts = WaterLog._meta
+    return (
+        quote(opts.db_table),
+        *(quote(opts.get_field(name).column) for name in ('id', 'member', 'date', 'amount')),
+    )
+
+
+def _add_with_returning(connection, member_id, date, amount):
+    """PostgreSQL và SQLite (>= 3.35): một câu lệnh duy nhất, trả về tổng mới."""
+    table, id_col, member_col, date_col, amount_col = _quoted_columns(connection)
+    sql = (
+        f"INSERT INTO {table} ({member_col}, {date_col}, {amount_col}) VALUES (%s, %s, %s) "
+        f"ON CONFLICT ({member_col}, {date_col}) DO UPDATE SET "
+        f"{amount_col} = {table}.{amount_col} + EXCLUDED.{amount_col} "
+        f"RETURNING {id_col}, {amount_col}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [member_id, connection.ops.adapt_datefield_value(date), amount])
+        return cursor.fetchone()
+
+
+def _add_generic(member_id, date, amount):
+    """Backend khác (VD: MySQL không có RETURNING): khóa dòng rồi cộng bằng F() trong transaction."""
+    log, _ = WaterLog.objects.select_for_update().get_or_create(member_id=member_id, date=date)
+    WaterLog.objects.filter(pk=log.pk).update(amount=F('amount') + amount)
+    return WaterLog.objects.filter(pk=log.pk).values_list('id', 'amount').get()
+
+
+def _claim_key(member_id, date, seq):
+    """Ghi khóa `seq`; False nếu khóa đã tồn tại (request gửi lại). Request trùng đồng thời chờ nhau ở unique index."""
+    try:
+        with transaction.atomic():
+            WaterRequestKey.objects.create(member_id=member_id, date=date, seq=seq)
+        return True
+    except IntegrityError:
+        return False
+
+
+def add_water(member_id, date, amount, seq=None):
+    """
+    Cộng `amount` ml vào bản ghi nước của ngày `date` (tạo mới nếu chưa có).
+    Trả về (WaterLog chỉ gồm id/date/amount, applied); `applied` = False khi `seq` là lượt gửi lại.
+    """
+    connection = connections[router.db_for_write(WaterLog)]
+    with transaction.atomic(using=connection.alias):
+        if seq is not None and not _claim_key(member_id, date, seq):
+            row = WaterLog.objects.filter(member_id=member_id, date=date).values_list('id', 'amount').first()
+            return WaterLog(id=row[0] if row else None, member_id=member_id, date=date, amount=row[1] if row else 0), False
+        if connection.vendor in ('postgresql', 'sqlite'):
+            row = _add_with_returning(connection, member_id, date, amount)
+        else:
+            row = _add_generic(member_id, date, amount)
+    return WaterLog(id=row[0], member_id=member_id, date=date, amount=row[1]), True
+
+
+def purge_request_keys(today, retention_days=REQUEST_KEY_RETENTION_DAYS, batch_size=10000):
+    """Xóa theo lô các khóa idempotency của ngày cũ hơn `retention_days` trước `today`; trả về số dòng đã xóa."""
+    stale = WaterRequestKey.objects.filter(date__lt=today - datetime.timedelta(days=retention_days))
+    deleted = 0
+    while True:
+        ids = list(stale.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += WaterRequestKey.objects.filter(id__in=ids).delete()[0]
+
+
+def _runs_of_true(flags):
+    """Trả về (độ dài chuỗi True dài nhất, độ dài chuỗi True kết thúc ở phần tử cuối)."""
+    if not len(flags):
+        return 0, 0
+    padded = np.concatenate([[False], flags, [False]]).astype(np.int8)
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    longest = int((ends - starts).max()) if len(starts) else 0
+    trailing = int(ends[-1] - starts[-1]) if len(starts) and ends[-1] == len(flags) else 0
+    return longest, trailing
+
+
+def water_history(rows, start, end, target):
+    """
+    Tổng hợp lịch sử uống nước từ các dòng (date, amount) trong khoảng [start, end]:
+    mảng theo ngày (đủ mọi ngày, ngày trống = 0), tổng theo tuần (bắt đầu thứ Hai) và theo tháng,
+    tỉ lệ ngày đạt mục tiêu, chuỗi ngày đạt hiện tại và dài nhất.
+    """
+    days = (end - start).days + 1
+    amounts = np.zeros(days, dtype=np.int64)
+    if rows:
+        offsets = np.array([(day - start).days for day, _ in rows], dtype=np.int64)
+        np.add.at(amounts, offsets, [amount for _, amount in rows])
+    dates = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+
+    # Biên tuần/tháng: ngày đầu khoảng và mọi ngày thứ Hai / mùng 1 sau đó (1970-01-01 là thứ Năm)
+    is_monday = (dates.astype(np.int64) + 3) % 7 == 0
+    is_first_of_month = dates == dates.astype('datetime64[M]').astype('datetime64[D]')
+    week_starts = np.flatnonzero(np.concatenate([[True], is_monday[1:]]))
+    month_starts = np.flatnonzero(np.concatenate([[True], is_first_of_month[1:]]))
+    met = amounts >= target
+    longest, trailing = _runs_of_true(met)
+    if not trailing and days > 1:
+        # Hôm nay chưa đạt thì chuỗi hiện tại vẫn tính đến hôm qua
+        trailing = _runs_of_true(met[:-1])[1]
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'target': target,
+        'daily': amounts.tolist(),
+        'weekly': {
+            'starts': np.datetime_as_string(dates[week_starts]).tolist(),
+            'totals': np.add.reduceat(amounts, week_starts).tolist(),
+        },
+        'monthly': {
+            'months': np.datetime_as_string(dates[month_starts], unit='M').tolist(),
+            'totals': np.add.reduceat(amounts, month_starts).tolist(),
+        },
+        'achievement_rate': round(float(met.mean()), 4),
+        'current_streak': trailing,
+        'longest_streak': longest,
+    }
@@ -0,0 +1,96 @@
+"""
+Tạo hàng loạt cấu trúc chương trình tập (ngày tập + bài tập trong ngày) bằng bulk_create.
+Dùng chung cho lệnh import và chức năng nhân bản chương trình.
+"""
+from django.db.models import Min
+
+from .models import Exercise, WorkoutDay, WorkoutDayExercise, WorkoutPlan
+
+DAY_OVERRIDE_FIELDS = ('is_rest_day', 'title')
+EXERCISE_OVERRIDE_FIELDS = ('sets', 'reps', 'rest_period')
+
+
+def bulk_create_plan_days(entries, batch_size=1000):
+    """
+    `entries` là danh sách (day, exercises): `day` là WorkoutDay chưa lưu (đã gán plan),
+    `exercises` là danh sách WorkoutDayExercise chưa lưu (chưa gán workout_day).
+
+    Số query cố định: một lượt INSERT ngày tập, một SELECT lấy lại id (không phụ thuộc
+    việc backend có trả id từ bulk insert hay không), một lượt INSERT bài tập.
+
+    bulk_create không phát tín hiệu, nên chỉ dùng cho chương trình vừa tạo
+    (chưa có bộ đếm UserPlanProgress và chưa có cache tài liệu).
+    """
+    if not entries:
+        return 0
+    days = [day for day, _ in entries]
+    WorkoutDay.objects.bulk_create(days, batch_size=batch_size)
+
+    day_ids = {
+        (plan_id, day_number): day_id
+        for day_id, plan_id, day_number in WorkoutDay.objects.filter(
+            plan_id__in={day.plan_id for day in days}
+        ).values_list('id', 'plan_id', 'day_number')
+    }
+    day_exercises = []
+    for day, exercises in entries:
+        for day_exercise in exercises:
+            day_exercise.workout_day_id = day_ids[(day.plan_id, day.day_number)]
+            day_exercises.append(day_exercise)
+    WorkoutDayExercise.objects.bulk_create(day_exercises, batch_size=batch_size)
+    return len(days)
+
+
+def resolve_exercise_ids(names, known):
+    """
+    Tra id bài tập theo tên (khóa tự nhiên), cập nhật vào dict `known` và trả về các tên không tìm thấy.
+    Nếu có nhiều bài tập trùng tên thì lấy bài tạo sớm nhất.
+    """
+    missing = set(names) - known.keys()
+    if missing:
+        known.update(
+            Exercise.objects.filter(name__in=missing).values('name').annotate(first_id=Min('id')).values_list('name', 'first_id')
+        )
+    return sorted(set(names) - known.keys())
+
+
+def clone_plan(source, created_by=None, day_overrides=None, **plan_fields):
+    """
+    Sao chép sâu chương trình `source` (ngày tập + bài tập trong ngày) thành chương trình mới.
+    `day_overrides` là dict {day_number: {...}} ghi đè `is_rest_day`/`title` của ngày và
+    `sets`/`reps`/`rest_period` của mọi bài tập trong ngày đó. `plan_fields` ghi đè thông tin chương trình.
+
+    Số query cố định bất kể chương trình dài bao nhiêu ngày: 2 SELECT đọc cấu trúc gốc,
+    1 INSERT chương trình, rồi `bulk_create_plan_days`.
+    """
+    day_overrides = day_overrides or {}
+    exercises_by_day = {}
+    for row in WorkoutDayExercise.objects.filter(workout_day__plan=source).order_by('order', 'id').values(
+        'workout_day_id', 'exercise_id', 'sets', 'reps', 'rest_period', 'order'
+    ):
+        exercises_by_day.setdefault(row.pop('workout_day_id'), []).append(row)
+
+    plan = WorkoutPlan.objects.create(
+        **{
+            'name': source.name,
+            'description': source.description,
+            'difficulty': source.difficulty,
+            'image_url': source.image_url,
+            'is_public': False,
+            **plan_fields,
+        },
+        source_plan=source,
+        created_by=created_by,
+    )
+
+    entries = []
+    for day in WorkoutDay.objects.filter(plan=source).values('id', 'day_number', 'is_rest_day', 'title'):
+        override = day_overrides.get(day['day_number'], {})
+        day_fields = {field: override.get(field, day[field]) for field in DAY_OVERRIDE_FIELDS}
+        exercise_fields = {field: override[field] for field in EXERCISE_OVERRIDE_FIELDS if field in override}
+        entries.append((
+            WorkoutDay(plan=plan, day_number=day['day_number'], **day_fields),
+            [WorkoutDayExercise(**{**row, **exercise_fields}) for row in exercises_by_day.get(day['id'], [])],
+        ))
+    bulk_create_plan_days(entries)
+    return plan
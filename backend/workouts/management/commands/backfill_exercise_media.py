@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resofit_api.cache_utils import check_shared_cache
+from workouts.models import EXERCISE_MEDIA_VARIANTS, Exercise, WorkoutDay
+from workouts.plan_cache import schedule_invalidation
+
+
+class Command(BaseCommand):
+    help = (
+        "Tính lại và lưu các URL media Cloudinary (kèm biến thể) cho các Exercise hiện có, theo từng lô. "
+        "Cache tài liệu chương trình của web worker được làm mới qua cache dùng chung (CACHES); nếu cache chỉ "
+        "sống trong process (LocMemCache), worker vẫn trả URL cũ cho đến khi cache hết hạn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        for warning in check_shared_cache(None):
+            self.stderr.write(self.style.WARNING(f"{warning.msg} {warning.hint}"))
+        url_fields = list(EXERCISE_MEDIA_VARIANTS)
+        source_fields = {source_field for source_field, _ in EXERCISE_MEDIA_VARIANTS.values()}
+
+        last_pk = 0
+        scanned = updated = 0
+        while True:
+            chunk = list(
+                Exercise.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', *source_fields, *url_fields)[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            scanned += len(chunk)
+
+            changed = []
+            for exercise in chunk:
+                urls = exercise.build_media_urls()
+                if any(getattr(exercise, field) != url for field, url in urls.items()):
+                    for field, url in urls.items():
+                        setattr(exercise, field, url)
+                    changed.append(exercise)
+
+            if changed:
+                # bulk_update không phát tín hiệu, nên tự làm mới cache các chương trình liên quan
+                with transaction.atomic():
+                    Exercise.objects.bulk_update(changed, url_fields)
+                    schedule_invalidation(
+                        WorkoutDay.objects.filter(exercises__exercise__in=changed)
+                        .values_list('plan_id', flat=True).distinct()
+                    )
+                updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} exercises, updated {updated}."))
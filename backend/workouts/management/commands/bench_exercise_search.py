@@ -0,0 +1,65 @@
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from resofit_api.benchmarks import format_latency, percentile, rolled_back, time_calls
+from users.models import CustomUser
+from workouts.models import Exercise, normalize_search_text
+from workouts.views import ExerciseViewSet
+
+MUSCLE_GROUPS = ['Ngực', 'Lưng', 'Vai', 'Tay trước', 'Tay sau', 'Đùi', 'Mông', 'Bụng', 'Bắp chân', 'Cẳng tay']
+EQUIPMENT = ['Body only', 'Dumbbell', 'Barbell', 'Cable', 'Machine', 'Kettlebell', 'Bands']
+NAME_WORDS = ['Đẩy', 'Kéo', 'Gập', 'Nâng', 'Squat', 'Press', 'Row', 'Curl', 'Plank', 'Lunge', 'Deadlift', 'Fly']
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark endpoint danh sách bài tập (lọc + tìm kiếm + cursor pagination) "
+        "trên catalog tổng hợp nhiều kích thước. Dữ liệu được rollback sau khi chạy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        factory = APIRequestFactory()
+        view = ExerciseViewSet.as_view({'get': 'list'})
+        scenarios = {
+            'all': {},
+            'muscle_group': {'muscle_group': 'Đùi'},
+            'equipment+ai': {'equipment': 'Dumbbell', 'ai_supported': 'true'},
+            'search': {'search': 'day'},
+        }
+
+        with rolled_back():
+            user = CustomUser.objects.create_user(username='bench_exercise_search', password=None)
+            created = 0
+            for size in sorted(options['sizes']):
+                batch = []
+                for i in range(created, size):
+                    name = f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {i}"
+                    batch.append(Exercise(
+                        name=name,
+                        search_name=normalize_search_text(name),
+                        muscle_group=rng.choice(MUSCLE_GROUPS),
+                        equipment=rng.choice(EQUIPMENT),
+                        ai_supported=rng.random() < 0.2,
+                    ))
+                Exercise.objects.bulk_create(batch, batch_size=2000)
+                created = size
+
+                self.stdout.write(f"catalog={size}")
+                for label, params in scenarios.items():
+                    def call():
+                        request = factory.get('/api/workouts/exercises/', params, HTTP_HOST='localhost')
+                        force_authenticate(request, user=user)
+                        response = view(request)
+                        response.render()
+
+                    samples = time_calls(call, options['repeat'])
+                    self.stdout.write("  " + format_latency(label, samples))
+                    if percentile(samples, 95) > 100:
+                        self.stdout.write(self.style.WARNING(f"  {label}: p95 vượt 100ms"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.models import WorkoutPlan
+from workouts.plan_io import write_csv, write_jsonl
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        "Xuất chương trình tập công khai (ngày tập, bài tập trong ngày) ra file JSONL hoặc CSV, theo luồng. "
+        "Bản nhân bản riêng tư của PT không được xuất, vì file nhập vào sẽ tạo chương trình công khai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="File đích, '-' để ghi ra stdout.")
+        parser.add_argument('--format', choices=sorted(WRITERS), help="Mặc định suy ra từ đuôi file (jsonl nếu không rõ).")
+        parser.add_argument('--plan', type=int, action='append', dest='plan_ids', help="Chỉ xuất chương trình công khai này (ID), có thể lặp lại.")
+        parser.add_argument('--chunk-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+
+        plans = WorkoutPlan.objects.with_structure().filter(is_public=True).order_by('pk')
+        if options['plan_ids']:
+            plans = plans.filter(pk__in=options['plan_ids'])
+        # iterator() kèm chunk_size vẫn áp dụng prefetch theo từng lô, không nạp mọi chương trình cùng lúc
+        plans = plans.iterator(chunk_size=options['chunk_size'])
+
+        if path == '-':
+            count = WRITERS[fmt](plans, self.stdout)
+        else:
+            try:
+                with open(path, 'w', newline='', encoding='utf-8') as stream:
+                    count = WRITERS[fmt](plans, stream)
+            except OSError as exc:
+                raise CommandError(str(exc))
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} workout plans."))
@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from workouts.bulk import bulk_create_plan_days, resolve_exercise_ids
+from workouts.models import UserWorkoutPlanAssignment, UserWorkoutProgress, WorkoutDay, WorkoutDayExercise, WorkoutPlan
+from workouts.plan_io import PlanFormatError, read_csv, read_jsonl, validate_plan
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        "Nhập chương trình tập từ file JSONL hoặc CSV (định dạng của export_workout_plans). "
+        "Đọc file theo luồng, ghi bằng bulk insert trong một transaction; bài tập được khớp theo tên."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(READERS), help="Mặc định suy ra từ đuôi file (jsonl nếu không rõ).")
+        parser.add_argument(
+            '--replace', action='store_true',
+            help="Xóa các chương trình công khai trùng tên trước khi nhập (bản nhân bản riêng tư của PT được giữ nguyên). "
+                 "Việc xóa kéo theo (cascade) tiến độ và lượt gán của hội viên, nên lệnh từ chối thay chương trình "
+                 "đang được gán hoặc đã có người tập.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Kiểm tra file rồi rollback, không lưu gì.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Số ngày tập ghi trong mỗi lượt bulk insert.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        self.batch_size = options['batch_size']
+        self.exercise_ids = {}
+        self.plan_count = self.day_count = 0
+
+        try:
+            with open(path, newline='', encoding='utf-8') as stream, transaction.atomic():
+                replaced = set()
+                pending = []
+                pending_days = 0
+                for line_number, raw in READERS[fmt](stream):
+                    data = validate_plan(raw, f"{path}:{line_number}")
+                    if options['replace'] and data['name'] not in replaced:
+                        self.replace(data['name'], f"{path}:{line_number}")
+                        replaced.add(data['name'])
+
+                    plan = WorkoutPlan.objects.create(
+                        name=data['name'], description=data['description'],
+                        difficulty=data['difficulty'], image_url=data['image_url'],
+                    )
+                    pending.append((plan, data, f"{path}:{line_number}"))
+                    pending_days += len(data['days'])
+                    if pending_days >= self.batch_size:
+                        self.flush(pending)
+                        pending, pending_days = [], 0
+                self.flush(pending)
+
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+        except PlanFormatError as exc:
+            raise CommandError(str(exc))
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {self.plan_count} workout plans ({self.day_count} days)."))
+
+    def replace(self, name, location):
+        plans = WorkoutPlan.objects.filter(name=name, is_public=True)
+        in_use = plans.filter(
+            Exists(UserWorkoutPlanAssignment.objects.filter(plan=OuterRef('pk')))
+            | Exists(UserWorkoutProgress.objects.filter(workout_day__plan=OuterRef('pk')))
+        )
+        if in_use.exists():
+            raise CommandError(
+                f"{location}: chương trình '{name}' đang được gán hoặc đã có tiến độ của hội viên, không thể thay thế."
+            )
+        plans.delete()
+
+    def flush(self, pending):
+        if not pending:
+            return
+        names_by_plan = [
+            {item['exercise'] for day in data['days'] for item in day['exercises']} for _, data, _ in pending
+        ]
+        if resolve_exercise_ids(set().union(*names_by_plan), self.exercise_ids):
+            for (_, _, location), names in zip(pending, names_by_plan):
+                missing = sorted(names - self.exercise_ids.keys())
+                if missing:
+                    raise CommandError(f"{location}: không tìm thấy bài tập {', '.join(missing)}.")
+
+        entries = [
+            (
+                WorkoutDay(plan=plan, day_number=day['day_number'], is_rest_day=day['is_rest_day'], title=day['title']),
+                [
+                    WorkoutDayExercise(
+                        exercise_id=self.exercise_ids[item['exercise']], sets=item['sets'],
+                        reps=item['reps'], rest_period=item['rest_period'], order=item['order'],
+                    )
+                    for item in day['exercises']
+                ],
+            )
+            for plan, data, _ in pending
+            for day in data['days']
+        ]
+        self.day_count += bulk_create_plan_days(entries, batch_size=self.batch_size)
+        self.plan_count += len(pending)
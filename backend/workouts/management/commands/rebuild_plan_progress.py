@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from workouts.models import UserPlanProgress, UserWorkoutProgress
+from workouts.progress import refresh_plan_progress
+
+
+class Command(BaseCommand):
+    help = "Dựng lại toàn bộ bộ đếm UserPlanProgress từ dữ liệu UserWorkoutProgress."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--member', type=int, help="Chỉ dựng lại cho một hội viên (ID).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        progress = UserWorkoutProgress.objects.all()
+        counters = UserPlanProgress.objects.all()
+        if options['member']:
+            progress = progress.filter(member_id=options['member'])
+            counters = counters.filter(member_id=options['member'])
+
+        with transaction.atomic():
+            counters.delete()
+            written = refresh_plan_progress(progress, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} plan progress counters."))
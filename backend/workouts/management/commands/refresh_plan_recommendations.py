@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from workouts.recommendations import TOP_K, refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Tính lại vector đặc trưng của các chương trình mới/thay đổi và cập nhật chỉ mục gợi ý top-k. "
+        "Nên chạy định kỳ (cron); chỉ các chương trình bị đánh dấu thay đổi mới được tính lại vector."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Tính lại vector cho mọi chương trình.")
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+
+    def handle(self, *args, **options):
+        recomputed, changed = refresh_recommendations(full=options['full'], k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {recomputed} plan vectors, updated recommendations for {changed} plans."
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_exercise_rep_counting_logic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='gif_low_url',
+            field=models.URLField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='gif_thumbnail_url',
+            field=models.URLField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='gif_url',
+            field=models.URLField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='video_low_url',
+            field=models.URLField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='video_thumbnail_url',
+            field=models.URLField(blank=True, editable=False, max_length=500, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='video_url',
+            field=models.URLField(blank=True, editable=False, max_length=500, null=True),
+        ),
+    ]
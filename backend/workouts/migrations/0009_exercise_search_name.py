@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:30
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def populate_search_name(apps, schema_editor):
+    Exercise = apps.get_model('workouts', 'Exercise')
+    exercises = list(Exercise.objects.only('pk', 'name'))
+    for exercise in exercises:
+        value = (exercise.name or '').replace('đ', 'd').replace('Đ', 'D')
+        value = unicodedata.normalize('NFKD', value)
+        value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+        exercise.search_name = ' '.join(value.lower().split())
+    Exercise.objects.bulk_update(exercises, ['search_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_exercise_media_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_search_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['muscle_group', 'search_name'], name='exercise_muscle_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['equipment', 'search_name'], name='exercise_equipment_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['ai_supported', 'search_name'], name='exercise_ai_name_idx'),
+        ),
+    ]
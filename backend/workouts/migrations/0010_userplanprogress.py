@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def populate_plan_progress(apps, schema_editor):
+    UserWorkoutProgress = apps.get_model('workouts', 'UserWorkoutProgress')
+    WorkoutDay = apps.get_model('workouts', 'WorkoutDay')
+    UserPlanProgress = apps.get_model('workouts', 'UserPlanProgress')
+
+    total_days = dict(
+        WorkoutDay.objects.order_by().values('plan_id').annotate(total=Count('id')).values_list('plan_id', 'total')
+    )
+    rows = (
+        UserWorkoutProgress.objects.order_by()
+        .values('member_id', 'workout_day__plan_id')
+        .annotate(completed=Count('id'), last_completed_at=Max('completed_at'))
+    )
+    objs = []
+    for row in rows:
+        total = total_days.get(row['workout_day__plan_id'], 0)
+        objs.append(UserPlanProgress(
+            member_id=row['member_id'],
+            plan_id=row['workout_day__plan_id'],
+            completed_days=row['completed'],
+            total_days=total,
+            # Cùng quy tắc làm tròn nửa lên với workouts.progress.calculate_percent
+            progress_percent=(200 * row['completed'] + total) // (2 * total) if total else 0,
+            last_completed_at=row['last_completed_at'],
+        ))
+    UserPlanProgress.objects.bulk_create(objs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_exercise_search_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPlanProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_days', models.PositiveIntegerField(default=0)),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('progress_percent', models.PositiveSmallIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plan_progress', to=settings.AUTH_USER_MODEL)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='member_progress', to='workouts.workoutplan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['member', '-last_completed_at'], name='plan_progress_member_last_idx')],
+                'unique_together': {('member', 'plan')},
+            },
+        ),
+        migrations.RunPython(populate_plan_progress, migrations.RunPython.noop),
+    ]
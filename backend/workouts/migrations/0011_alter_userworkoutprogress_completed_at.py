@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_userplanprogress'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userworkoutprogress',
+            name='completed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_alter_userworkoutprogress_completed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutplan',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_workout_plans', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='workoutplan',
+            name='is_public',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='workoutplan',
+            name='source_plan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='derived_plans', to='workouts.workoutplan'),
+        ),
+    ]
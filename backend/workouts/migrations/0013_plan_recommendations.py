@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0012_workoutplan_clone_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanFeatureVector',
+            fields=[
+                ('plan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feature_vector', serialize=False, to='workouts.workoutplan')),
+                ('features', models.JSONField(default=dict)),
+                ('dirty', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlanSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('similar', 'Similar'), ('next', 'Next')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='workouts.workoutplan')),
+                ('similar_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workouts.workoutplan')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'unique_together': {('plan', 'kind', 'rank')},
+            },
+        ),
+    ]
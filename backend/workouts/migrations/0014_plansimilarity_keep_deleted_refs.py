@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0013_plan_recommendations'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plansimilarity',
+            name='similar_plan',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='workouts.workoutplan'),
+        ),
+    ]
@@ -1,6 +1,45 @@
-from django.db import models
+import unicodedata
+
+from django.db import models, transaction
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db.models.functions import Coalesce
+from cloudinary import CloudinaryResource
 from cloudinary.models import CloudinaryField # <-- Import
 from django.conf import settings # Thêm import này
+from django.utils import timezone
+
+
+def normalize_search_text(value):
+    """Chuẩn hóa chuỗi để tìm kiếm không dấu: bỏ dấu tiếng Việt, 'đ' -> 'd', chữ thường."""
+    value = (value or '').replace('đ', 'd').replace('Đ', 'D')
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return ' '.join(value.lower().split())
+
+
+# Các biến thể URL mà app mobile cần: (trường Cloudinary nguồn, tùy chọn transformation)
+EXERCISE_MEDIA_VARIANTS = {
+    'video_url': ('video', {}),
+    'video_thumbnail_url': ('video', {
+        'format': 'jpg',
+        'transformation': [{'start_offset': 0, 'width': 320, 'crop': 'scale'}],
+    }),
+    'video_low_url': ('video', {
+        'format': 'mp4',
+        'transformation': [{'width': 480, 'crop': 'limit', 'quality': 'auto:low'}],
+    }),
+    'gif_url': ('gif', {}),
+    'gif_thumbnail_url': ('gif', {
+        'format': 'jpg',
+        'transformation': [{'width': 320, 'crop': 'scale'}],
+    }),
+    'gif_low_url': ('gif', {
+        'format': 'webp',
+        'transformation': [{'width': 320, 'crop': 'scale', 'quality': 'auto:low', 'flags': 'awebp'}],
+    }),
+}
 
 
 class Exercise(models.Model):
@@ -36,9 +75,98 @@ class Exercise(models.Model):
         null=True,
         help_text="Tên của hàm logic đếm rep phía frontend s"
     )
+    # URL media đã được tính sẵn khi lưu, để việc đọc không cần gọi Cloudinary SDK
+    video_url = models.URLField(max_length=500, blank=True, null=True, editable=False)
+    video_thumbnail_url = models.URLField(max_length=500, blank=True, null=True, editable=False)
+    video_low_url = models.URLField(max_length=500, blank=True, null=True, editable=False)
+    gif_url = models.URLField(max_length=500, blank=True, null=True, editable=False)
+    gif_thumbnail_url = models.URLField(max_length=500, blank=True, null=True, editable=False)
+    gif_low_url = models.URLField(max_length=500, blank=True, null=True, editable=False)
+    # Tên đã bỏ dấu, dùng cho tìm kiếm theo tiền tố (có index)
+    search_name = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['muscle_group', 'search_name'], name='exercise_muscle_name_idx'),
+            models.Index(fields=['equipment', 'search_name'], name='exercise_equipment_name_idx'),
+            models.Index(fields=['ai_supported', 'search_name'], name='exercise_ai_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def build_media_urls(self):
+        """Tính tất cả URL media (kể cả các biến thể) từ các trường Cloudinary."""
+        urls = {}
+        for url_field, (source_field, options) in EXERCISE_MEDIA_VARIANTS.items():
+            value = getattr(self, source_field)
+            resource = self._meta.get_field(source_field).to_python(value) if value else None
+            if isinstance(resource, CloudinaryResource) and resource.public_id:
+                urls[url_field] = resource.build_url(**options)
+            else:
+                urls[url_field] = None
+        return urls
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # CloudinaryField chỉ upload file trong lúc super().save(), nên URL được tính sau đó
+            changed = {
+                url_field: url for url_field, url in self.build_media_urls().items()
+                if getattr(self, url_field) != url
+            }
+            if changed:
+                for url_field, url in changed.items():
+                    setattr(self, url_field, url)
+                Exercise.objects.filter(pk=self.pk).update(**changed)
+
+
+class WorkoutPlanQuerySet(models.QuerySet):
+
+    def with_structure(self):
+        """Tải toàn bộ ngày tập, bài tập trong ngày và Exercise theo lô (bulk)."""
+        return self.prefetch_related(
+            'days',
+            Prefetch('days__exercises', queryset=WorkoutDayExercise.objects.select_related('exercise')),
+        )
+
+    def visible_to(self, user):
+        """
+        Chương trình công khai, cộng với chương trình riêng (bản nhân bản) do `user` tạo
+        hoặc đang được gán cho `user`.
+        """
+        if user is None or not user.is_authenticated:
+            return self.filter(is_public=True)
+        assigned = UserWorkoutPlanAssignment.objects.filter(member=user).values('plan_id')
+        return self.filter(Q(is_public=True) | Q(created_by=user) | Q(pk__in=assigned))
+
+    def with_progress_counts(self, user):
+        """
+        Gắn sẵn `total_days` và `completed_days` (của `user`) cho mỗi chương trình
+        bằng subquery, để cả danh sách chỉ tốn đúng một câu query.
+        """
+        total_days = WorkoutDay.objects.filter(plan=OuterRef('pk')).order_by().values('plan') \
+            .annotate(total=Count('pk')).values('total')
+        queryset = self.annotate(
+            total_days=Coalesce(Subquery(total_days, output_field=IntegerField()), 0),
+        )
+
+        if user is None or not user.is_authenticated:
+            return queryset.annotate(completed_days=Value(0, output_field=IntegerField()))
+
+        completed_days = UserWorkoutProgress.objects.filter(
+            member=user,
+            workout_day__plan=OuterRef('pk')
+        ).order_by().values('workout_day__plan').annotate(total=Count('pk')).values('total')
+        return queryset.annotate(
+            completed_days=Coalesce(Subquery(completed_days, output_field=IntegerField()), 0),
+        )
+
 
 class WorkoutPlan(models.Model):
     """
@@ -53,6 +181,14 @@ class WorkoutPlan(models.Model):
     description = models.TextField()
     difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES)
     image_url = models.URLField(max_length=500, blank=True, null=True)
+    # Chương trình gốc nếu đây là bản nhân bản; bản nhân bản mặc định không hiện trong danh mục chung
+    source_plan = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True, related_name='derived_plans')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='created_workout_plans'
+    )
+    is_public = models.BooleanField(default=True)
+
+    objects = WorkoutPlanQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -100,7 +236,8 @@ class UserWorkoutProgress(models.Model):
     """
     member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='workout_progress')
     workout_day = models.ForeignKey(WorkoutDay, on_delete=models.CASCADE, related_name='user_progress')
-    completed_at = models.DateTimeField(auto_now_add=True)
+    # Dùng default thay cho auto_now_add để nhận được thời điểm hoàn thành từ thiết bị khi đồng bộ offline
+    completed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         # Đảm bảo một user chỉ có thể hoàn thành một ngày tập một lần
@@ -109,6 +246,28 @@ class UserWorkoutProgress(models.Model):
     def __str__(self):
         return f"{self.member.username} completed {self.workout_day}"
 
+class UserPlanProgress(models.Model):
+    """
+    Bộ đếm tiến độ (denormalized) của một hội viên trong một chương trình tập.
+    Được cập nhật cùng transaction khi hoàn thành ngày tập và khi chương trình thêm/bớt ngày,
+    có thể dựng lại từ UserWorkoutProgress bằng lệnh `rebuild_plan_progress`.
+    """
+    member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='plan_progress')
+    plan = models.ForeignKey(WorkoutPlan, on_delete=models.CASCADE, related_name='member_progress')
+    completed_days = models.PositiveIntegerField(default=0)
+    total_days = models.PositiveIntegerField(default=0)
+    progress_percent = models.PositiveSmallIntegerField(default=0)
+    last_completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('member', 'plan')
+        indexes = [
+            models.Index(fields=['member', '-last_completed_at'], name='plan_progress_member_last_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.member.username}: {self.completed_days}/{self.total_days} days of {self.plan.name}"
+
 class UserWorkoutPlanAssignment(models.Model):
     """
     Lưu lại việc PT nào đã gán chương trình nào cho hội viên nào.
@@ -122,4 +281,96 @@ class UserWorkoutPlanAssignment(models.Model):
         unique_together = ('member', 'plan') # Một hội viên chỉ được gán 1 chương trình tại 1 thời điểm (qua OneToOneField)
 
     def __str__(self):
-        return f"{self.pt.username} assigned '{self.plan.name}' to {self.member.username}"
\ No newline at end of file
+        return f"{self.pt.username} assigned '{self.plan.name}' to {self.member.username}"
+
+
+class PlanFeatureVector(models.Model):
+    """
+    Vector đặc trưng (thưa) của một chương trình công khai: tỉ trọng nhóm cơ, dụng cụ và độ khó.
+    `dirty` được bật khi cấu trúc chương trình thay đổi; lệnh `refresh_plan_recommendations` tính lại.
+    """
+    plan = models.OneToOneField(WorkoutPlan, on_delete=models.CASCADE, primary_key=True, related_name='feature_vector')
+    features = models.JSONField(default=dict)
+    dirty = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Features of {self.plan_id}"
+
+
+class PlanSimilarity(models.Model):
+    """
+    Chỉ mục top-k đã tính sẵn cho gợi ý chương trình.
+    - `similar`: các chương trình giống nhất.
+    - `next`: chương trình nên tập tiếp theo (cùng nội dung, độ khó cao hơn một bậc).
+    """
+    KIND_CHOICES = (
+        ('similar', 'Similar'),
+        ('next', 'Next'),
+    )
+    plan = models.ForeignKey(WorkoutPlan, on_delete=models.CASCADE, related_name='similarities')
+    # Không cascade: dòng trỏ tới chương trình đã xóa được giữ lại để lần làm mới sau biết danh sách nào
+    # cần tính lại (xem `refresh_recommendations`); lúc đọc đã lọc theo `similar_plan__is_public`
+    similar_plan = models.ForeignKey(WorkoutPlan, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('plan', 'kind', 'rank')
+
+    def __str__(self):
+        return f"{self.plan_id} -> {self.similar_plan_id} ({self.kind} #{self.rank})"
+
+
+# Tín hiệu (Signal): Làm mới cache tài liệu chương trình tập (và đánh dấu vector gợi ý cần tính lại)
+# khi cấu trúc chương trình thay đổi; được gom theo transaction (xem plan_cache.schedule_invalidation)
+def _invalidate_plan_cache(plan_ids=(), day_ids=()):
+    from .plan_cache import schedule_invalidation
+    schedule_invalidation(plan_ids, day_ids)
+
+
+@receiver([post_save, post_delete], sender=WorkoutPlan)
+def invalidate_plan_cache_on_plan_change(sender, instance, **kwargs):
+    _invalidate_plan_cache([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=WorkoutDay)
+def invalidate_plan_cache_on_day_change(sender, instance, **kwargs):
+    _invalidate_plan_cache([instance.plan_id])
+
+
+@receiver([post_save, post_delete], sender=WorkoutDayExercise)
+def invalidate_plan_cache_on_day_exercise_change(sender, instance, **kwargs):
+    # Chỉ ghi nhận ngày tập; chương trình được tra một lần cho cả lô sau khi commit
+    _invalidate_plan_cache(day_ids=[instance.workout_day_id])
+
+
+@receiver([post_save, post_delete], sender=Exercise)
+def invalidate_plan_cache_on_exercise_change(sender, instance, **kwargs):
+    _invalidate_plan_cache(
+        WorkoutDay.objects.filter(exercises__exercise_id=instance.pk).values_list('plan_id', flat=True).distinct()
+    )
+
+
+# Tín hiệu (Signal): Giữ bộ đếm UserPlanProgress khớp khi chương trình thêm/bớt ngày tập
+@receiver(post_save, sender=WorkoutDay)
+def increment_plan_total_days(sender, instance, created, **kwargs):
+    if created:
+        from .progress import adjust_total_days
+        adjust_total_days(instance.plan_id, 1)
+
+
+@receiver(post_delete, sender=WorkoutDay)
+def decrement_plan_total_days(sender, instance, **kwargs):
+    from .progress import adjust_total_days
+    adjust_total_days(instance.plan_id, -1)
+
+
+@receiver(post_delete, sender=UserWorkoutProgress)
+def decrement_plan_completed_days(sender, instance, **kwargs):
+    from .progress import adjust_completed_days
+    plan_id = WorkoutDay.objects.filter(pk=instance.workout_day_id).values_list('plan_id', flat=True).first()
+    if plan_id is not None:
+        adjust_completed_days(instance.member_id, plan_id, -1)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from resofit_api.cache_utils import bump_version, get_version, single_flight
+from .models import WorkoutDay, WorkoutPlan
+from .serializers import WorkoutPlanDetailSerializer
+
+PLAN_CACHE_NAMESPACE = 'workout_plan'
+PLAN_DOCUMENT_TIMEOUT = 60 * 60 * 24
+
+
+def get_plan_version(plan_id):
+    return get_version(PLAN_CACHE_NAMESPACE, plan_id)
+
+
+def invalidate_plans(plan_ids):
+    for plan_id in set(plan_ids):
+        bump_version(PLAN_CACHE_NAMESPACE, plan_id)
+
+
+# Các thay đổi đang chờ commit của transaction hiện tại (mỗi thread một connection)
+_pending = threading.local()
+
+
+def _apply_changes(plan_ids, day_ids):
+    from .recommendations import mark_plans_dirty
+    if day_ids:
+        # Ngày tập đã bị xóa cùng lúc (cascade) thì tín hiệu của WorkoutDay đã ghi nhận chương trình
+        plan_ids = plan_ids | set(WorkoutDay.objects.filter(pk__in=day_ids).values_list('plan_id', flat=True))
+    invalidate_plans(plan_ids)
+    # Vector đặc trưng phục vụ gợi ý cũng phụ thuộc vào cấu trúc chương trình
+    mark_plans_dirty(plan_ids)
+
+
+def _flush(batch):
+    if getattr(_pending, 'batch', None) is batch:
+        _pending.batch = None
+    _apply_changes(batch['plan_ids'], batch['day_ids'])
+
+
+def schedule_invalidation(plan_ids=(), day_ids=()):
+    """
+    Ghi nhận chương trình (hoặc ngày tập) đã thay đổi. Trong transaction, mọi thay đổi được gom lại và
+    xử lý một lần sau khi commit (VD: xóa cascade hàng nghìn dòng chỉ tốn một lượt), để không cache lại
+    dữ liệu chưa commit.
+    """
+    plan_ids, day_ids = set(plan_ids) - {None}, set(day_ids) - {None}
+    if not plan_ids and not day_ids:
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _apply_changes(plan_ids, day_ids)
+        return
+
+    batch = getattr(_pending, 'batch', None)
+    # Callback biến mất khỏi hàng đợi khi transaction/savepoint chứa nó bị rollback: tạo lô mới
+    if batch is None or not any(entry[1] is batch['callback'] for entry in connection.run_on_commit):
+        batch = {'plan_ids': set(), 'day_ids': set()}
+        batch['callback'] = lambda: _flush(batch)
+        _pending.batch = batch
+        transaction.on_commit(batch['callback'])
+    batch['plan_ids'] |= plan_ids
+    batch['day_ids'] |= day_ids
+
+
+def build_plan_document(plan_id):
+    """
+    Dựng tài liệu JSON của một chương trình tập (không phụ thuộc user).
+    `is_completed` luôn là False ở đây và được ghi đè theo từng user khi trả về.
+    """
+    plan = WorkoutPlan.objects.with_structure().filter(pk=plan_id).first()
+    if plan is None:
+        return None
+    data = WorkoutPlanDetailSerializer(plan, context={'completed_day_ids': frozenset()}).data
+    return json.loads(JSONRenderer().render(data))
+
+
+def get_plan_document(plan_id):
+    """Trả về (version, document) của chương trình, document là None nếu không tồn tại."""
+    version = get_plan_version(plan_id)
+    key = f'{PLAN_CACHE_NAMESPACE}:{plan_id}:document:{version}'
+    document = single_flight(key, lambda: build_plan_document(plan_id), PLAN_DOCUMENT_TIMEOUT)
+    return version, document
+
+
+def get_plan_access(plan_id):
+    """
+    Trả về {'is_public', 'created_by_id'} của chương trình (cache theo cùng phiên bản với tài liệu),
+    None nếu không tồn tại. Dùng để kiểm tra quyền xem mà không cần query với chương trình công khai.
+    """
+    key = f'{PLAN_CACHE_NAMESPACE}:{plan_id}:access:{get_plan_version(plan_id)}'
+    return single_flight(
+        key,
+        lambda: WorkoutPlan.objects.filter(pk=plan_id).values('is_public', 'created_by_id').first(),
+        PLAN_DOCUMENT_TIMEOUT,
+    )
+
+
+def overlay_completion(document, completed_day_ids):
+    return {
+        **document,
+        'days': [
+            {**day, 'is_completed': day['id'] in completed_day_ids}
+            for day in document['days']
+        ],
+    }
+
+
+def plan_etag(plan_id, version, completed_day_ids):
+    raw = f'{plan_id}:{version}:{",".join(str(day_id) for day_id in sorted(completed_day_ids))}'
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    """So khớp header If-None-Match (danh sách entity-tag hoặc `*`) với `etag` theo so sánh yếu (bỏ `W/`)."""
+    tags = parse_etags(if_none_match or '')
+    return '*' in tags or etag in {tag.removeprefix('W/') for tag in tags}
@@ -0,0 +1,189 @@
+"""
+Định dạng xuất/nhập chương trình tập cho các lệnh `export_workout_plans` và `import_workout_plans`.
+
+- JSONL: mỗi dòng là một chương trình (kèm danh sách ngày và bài tập lồng bên trong).
+- CSV: mỗi dòng là một bài tập trong một ngày; ngày không có bài tập (VD: ngày nghỉ) là một dòng
+  với các cột bài tập để trống. Các dòng của cùng một chương trình phải liền nhau (cùng `plan_key`).
+
+Bài tập được tham chiếu bằng tên (khóa tự nhiên) thay vì id, để dùng được giữa các môi trường.
+Cả hai định dạng đều được đọc/ghi theo luồng, không nạp toàn bộ file vào bộ nhớ.
+"""
+import csv
+import json
+from itertools import groupby
+
+from .models import WorkoutPlan
+
+CSV_COLUMNS = [
+    'plan_key', 'plan_name', 'description', 'difficulty', 'image_url',
+    'day_number', 'is_rest_day', 'day_title',
+    'exercise', 'sets', 'reps', 'rest_period', 'order',
+]
+DIFFICULTIES = {value for value, _ in WorkoutPlan.DIFFICULTY_CHOICES}
+
+
+class PlanFormatError(ValueError):
+    pass
+
+
+def plan_to_dict(plan):
+    """`plan` cần được prefetch bằng `WorkoutPlan.objects.with_structure()`."""
+    return {
+        'name': plan.name,
+        'description': plan.description,
+        'difficulty': plan.difficulty,
+        'image_url': plan.image_url,
+        'days': [
+            {
+                'day_number': day.day_number,
+                'is_rest_day': day.is_rest_day,
+                'title': day.title,
+                'exercises': [
+                    {
+                        'exercise': item.exercise.name,
+                        'sets': item.sets,
+                        'reps': item.reps,
+                        'rest_period': item.rest_period,
+                        'order': item.order,
+                    }
+                    for item in day.exercises.all()
+                ],
+            }
+            for day in plan.days.all()
+        ],
+    }
+
+
+def write_jsonl(plans, stream):
+    count = 0
+    for plan in plans:
+        stream.write(json.dumps(plan_to_dict(plan), ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(plans, stream):
+    writer = csv.writer(stream)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for plan in plans:
+        data = plan_to_dict(plan)
+        plan_columns = [plan.pk, data['name'], data['description'], data['difficulty'], data['image_url'] or '']
+        for day in data['days']:
+            day_columns = [day['day_number'], int(day['is_rest_day']), day['title'] or '']
+            for item in day['exercises'] or [None]:
+                item_columns = (
+                    [item['exercise'], item['sets'], item['reps'], item['rest_period'], item['order']]
+                    if item else [''] * 5
+                )
+                writer.writerow(plan_columns + day_columns + item_columns)
+        count += 1
+    return count
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise PlanFormatError(f"Dòng {line_number}: JSON không hợp lệ ({exc}).")
+
+
+def read_csv(stream):
+    """Gom các dòng CSV liền nhau có cùng `plan_key` thành một chương trình (dạng dict như JSONL)."""
+    reader = csv.DictReader(stream)
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+    if missing:
+        raise PlanFormatError(f"Thiếu cột: {', '.join(sorted(missing))}.")
+
+    # Ghi lại số dòng ngay khi đọc: groupby đọc trước một dòng nên reader.line_num lúc yield đã lệch
+    numbered = ((reader.line_num, row) for row in reader)
+    for _, group in groupby(numbered, key=lambda item: item[1]['plan_key']):
+        group = list(group)
+        line_number, first = group[0]
+        days = {}
+        for _, row in group:
+            day = days.setdefault(row['day_number'], {
+                'day_number': row['day_number'],
+                'is_rest_day': row['is_rest_day'].strip().lower() in ('1', 'true', 'yes'),
+                'title': row['day_title'] or None,
+                'exercises': [],
+            })
+            if row['exercise']:
+                day['exercises'].append({
+                    'exercise': row['exercise'],
+                    'sets': row['sets'],
+                    'reps': row['reps'],
+                    'rest_period': row['rest_period'],
+                    'order': row['order'] or 0,
+                })
+        yield line_number, {
+            'name': first['plan_name'],
+            'description': first['description'],
+            'difficulty': first['difficulty'],
+            'image_url': first['image_url'] or None,
+            'days': list(days.values()),
+        }
+
+
+def _positive_int(value, field, location):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = -1
+    if number < 0:
+        raise PlanFormatError(f"{location}: '{field}' phải là số nguyên không âm.")
+    return number
+
+
+def validate_plan(data, location):
+    """Kiểm tra và chuẩn hóa một chương trình đã đọc; trả về dict với các giá trị đúng kiểu."""
+    if not isinstance(data, dict) or not data.get('name'):
+        raise PlanFormatError(f"{location}: thiếu tên chương trình.")
+    if data.get('difficulty') not in DIFFICULTIES:
+        raise PlanFormatError(f"{location}: 'difficulty' phải là một trong {', '.join(sorted(DIFFICULTIES))}.")
+
+    raw_days = data.get('days') or []
+    if not isinstance(raw_days, list):
+        raise PlanFormatError(f"{location}: 'days' phải là một danh sách.")
+    days = []
+    seen = set()
+    for day in raw_days:
+        if not isinstance(day, dict):
+            raise PlanFormatError(f"{location}: mỗi ngày tập phải là một object.")
+        day_number = _positive_int(day.get('day_number'), 'day_number', location)
+        if day_number in seen:
+            raise PlanFormatError(f"{location}: ngày {day_number} bị lặp.")
+        seen.add(day_number)
+        raw_exercises = day.get('exercises') or []
+        if not isinstance(raw_exercises, list):
+            raise PlanFormatError(f"{location}: ngày {day_number} có 'exercises' không phải danh sách.")
+        exercises = []
+        for item in raw_exercises:
+            if not isinstance(item, dict):
+                raise PlanFormatError(f"{location}: ngày {day_number} có bài tập không phải object.")
+            if not item.get('exercise'):
+                raise PlanFormatError(f"{location}: ngày {day_number} có bài tập thiếu tên.")
+            exercises.append({
+                'exercise': item['exercise'],
+                'sets': _positive_int(item.get('sets'), 'sets', location),
+                'reps': str(item.get('reps') or ''),
+                'rest_period': _positive_int(item.get('rest_period'), 'rest_period', location),
+                'order': _positive_int(item.get('order', 0), 'order', location),
+            })
+        days.append({
+            'day_number': day_number,
+            'is_rest_day': bool(day.get('is_rest_day')),
+            'title': day.get('title') or None,
+            'exercises': exercises,
+        })
+
+    return {
+        'name': data['name'],
+        'description': data.get('description') or '',
+        'difficulty': data['difficulty'],
+        'image_url': data.get('image_url') or None,
+        'days': days,
+    }
@@ -0,0 +1,92 @@
+from django.db.models import Case, Count, F, FloatField, IntegerField, Max, OuterRef, Subquery, When
+from django.db.models.functions import Cast, Floor
+
+from resofit_api.db_utils import bulk_upsert
+from .models import UserPlanProgress, UserWorkoutProgress, WorkoutDay
+
+PROGRESS_FIELDS = ['completed_days', 'total_days', 'progress_percent', 'last_completed_at']
+
+
+# Làm tròn nửa lên bằng số nguyên: floor((200c + t) / 2t) = round-half-up(100c / t).
+# Dùng cùng một quy tắc ở Python và SQL để cập nhật tăng dần và tính lại toàn bộ luôn khớp nhau.
+def calculate_percent(completed_days, total_days):
+    if total_days > 0:
+        return (200 * completed_days + total_days) // (2 * total_days)
+    return 0
+
+
+def _update_percent(queryset):
+    # Tách thành câu lệnh riêng: MySQL đánh giá SET từ trái sang phải với giá trị mới,
+    # Postgres thì dùng giá trị cũ, nên không gộp chung với câu lệnh cập nhật bộ đếm
+    queryset.update(progress_percent=Case(
+        When(total_days=0, then=0),
+        default=Cast(
+            Floor(
+                Cast(F('completed_days') * 200 + F('total_days'), FloatField())
+                / Cast(F('total_days') * 2, FloatField())
+            ),
+            IntegerField(),
+        ),
+    ))
+
+
+def adjust_completed_days(member_id, plan_id, delta, completed_at=None):
+    """Cộng/trừ số ngày đã hoàn thành. Trả về False nếu chưa có bản ghi bộ đếm."""
+    counters = UserPlanProgress.objects.filter(member_id=member_id, plan_id=plan_id)
+    changes = {'completed_days': F('completed_days') + delta}
+    if completed_at is not None:
+        changes['last_completed_at'] = completed_at
+    elif delta < 0:
+        # Lần hoàn thành gần nhất có thể vừa bị xóa: lấy lại từ các lần hoàn thành còn lại
+        changes['last_completed_at'] = Subquery(
+            UserWorkoutProgress.objects.filter(member_id=OuterRef('member_id'), workout_day__plan_id=OuterRef('plan_id'))
+            .order_by('-completed_at').values('completed_at')[:1]
+        )
+    if not counters.filter(completed_days__gte=max(0, -delta)).update(**changes):
+        return False
+    _update_percent(counters)
+    return True
+
+
+def adjust_total_days(plan_id, delta):
+    counters = UserPlanProgress.objects.filter(plan_id=plan_id)
+    if counters.filter(total_days__gte=max(0, -delta)).update(total_days=F('total_days') + delta):
+        _update_percent(counters)
+
+
+def record_day_completion(progress):
+    """Cập nhật bộ đếm sau khi một UserWorkoutProgress mới được tạo (gọi trong cùng transaction)."""
+    plan_id = progress.workout_day.plan_id
+    if not adjust_completed_days(progress.member_id, plan_id, 1, completed_at=progress.completed_at):
+        refresh_plan_progress(UserWorkoutProgress.objects.filter(member_id=progress.member_id, workout_day__plan_id=plan_id))
+
+
+def refresh_plan_progress(progress_queryset, batch_size=1000):
+    """
+    Tính lại (giá trị tuyệt đối) bộ đếm cho mọi cặp (member, plan) xuất hiện trong `progress_queryset`
+    và ghi bằng bulk upsert. Trả về số bản ghi đã ghi.
+    """
+    rows = list(
+        progress_queryset.order_by()
+        .values('member_id', 'workout_day__plan_id')
+        .annotate(completed=Count('id'), last_completed_at=Max('completed_at'))
+    )
+    plan_ids = {row['workout_day__plan_id'] for row in rows}
+    total_days = dict(
+        WorkoutDay.objects.filter(plan_id__in=plan_ids).order_by()
+        .values('plan_id').annotate(total=Count('id')).values_list('plan_id', 'total')
+    )
+
+    objs = []
+    for row in rows:
+        total = total_days.get(row['workout_day__plan_id'], 0)
+        objs.append(UserPlanProgress(
+            member_id=row['member_id'],
+            plan_id=row['workout_day__plan_id'],
+            completed_days=row['completed'],
+            total_days=total,
+            progress_percent=calculate_percent(row['completed'], total),
+            last_completed_at=row['last_completed_at'],
+        ))
+    bulk_upsert(UserPlanProgress, objs, ['member', 'plan'], PROGRESS_FIELDS, batch_size=batch_size)
+    return len(objs)
@@ -0,0 +1,214 @@
+"""
+Gợi ý chương trình tập dựa trên độ tương đồng nội dung.
+
+Mỗi chương trình công khai có một vector đặc trưng (tỉ trọng nhóm cơ và dụng cụ theo số hiệp,
+cộng với độ khó). Độ tương đồng cosine được tính bằng phép nhân ma trận NumPy, và chỉ top-k của mỗi
+chương trình được lưu vào `PlanSimilarity`, nên mỗi request gợi ý chỉ là một lượt đọc theo index.
+Khi chỉ một số chương trình thay đổi, chỉ các hàng/cột liên quan của ma trận được tính lại.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+
+from resofit_api.db_utils import bulk_upsert
+from .models import PlanFeatureVector, PlanSimilarity, UserPlanProgress, WorkoutDayExercise, WorkoutPlan
+
+TOP_K = 10
+DIFFICULTY_LEVELS = [value for value, _ in WorkoutPlan.DIFFICULTY_CHOICES]
+# Trọng số của từng nhóm đặc trưng trong vector cuối cùng
+FEATURE_WEIGHTS = {'muscle': 0.6, 'equipment': 0.25, 'difficulty': 0.15}
+
+
+def mark_plans_dirty(plan_ids):
+    """Đánh dấu vector cần tính lại. Tín hiệu thay đổi cấu trúc gọi qua `plan_cache.schedule_invalidation`,
+    nên trong transaction chỉ chạy một lần sau khi commit."""
+    plan_ids = [plan_id for plan_id in plan_ids if plan_id is not None]
+    if plan_ids:
+        PlanFeatureVector.objects.filter(plan_id__in=plan_ids, dirty=False).update(dirty=True)
+
+
+def _normalized(weights, scale):
+    norm = sum(value * value for value in weights.values()) ** 0.5
+    if not norm:
+        return {}
+    return {key: value / norm * scale for key, value in weights.items()}
+
+
+def build_features(plans):
+    """Tính vector đặc trưng cho các chương trình bằng một câu query gộp theo (chương trình, nhóm cơ, dụng cụ)."""
+    volumes = {plan.pk: {'muscle': {}, 'equipment': {}} for plan in plans}
+    rows = WorkoutDayExercise.objects.filter(workout_day__plan__in=list(volumes)).values(
+        'workout_day__plan_id', 'exercise__muscle_group', 'exercise__equipment',
+    ).annotate(volume=Sum('sets')).order_by()
+    for row in rows:
+        plan_volumes = volumes[row['workout_day__plan_id']]
+        muscle = f"muscle:{(row['exercise__muscle_group'] or 'other').lower()}"
+        equipment = f"equipment:{(row['exercise__equipment'] or 'other').lower()}"
+        plan_volumes['muscle'][muscle] = plan_volumes['muscle'].get(muscle, 0) + row['volume']
+        plan_volumes['equipment'][equipment] = plan_volumes['equipment'].get(equipment, 0) + row['volume']
+
+    features = {}
+    for plan in plans:
+        features[plan.pk] = {
+            **_normalized(volumes[plan.pk]['muscle'], FEATURE_WEIGHTS['muscle']),
+            **_normalized(volumes[plan.pk]['equipment'], FEATURE_WEIGHTS['equipment']),
+            f'difficulty:{plan.difficulty}': FEATURE_WEIGHTS['difficulty'],
+        }
+    return features
+
+
+def _top_k(scores, mask, k):
+    """Chỉ số và điểm của top-k cột theo từng hàng, chỉ xét các ô `mask` = True."""
+    scores = np.where(mask, scores, -np.inf)
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0))
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def _feature_matrix(features):
+    """Ma trận (chương trình x đặc trưng) đã chuẩn hóa theo hàng, để tích vô hướng là độ tương đồng cosine."""
+    vocabulary = {key: index for index, key in enumerate(sorted({key for f in features for key in f}))}
+    matrix = np.zeros((len(features), len(vocabulary)))
+    for row, plan_features in enumerate(features):
+        for key, value in plan_features.items():
+            matrix[row, vocabulary[key]] = value
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _levels(difficulties):
+    return np.array([DIFFICULTY_LEVELS.index(difficulty) for difficulty in difficulties], dtype=np.int64)
+
+
+def _masks(levels, rows, columns):
+    """Ô (hàng, cột) nào được xét cho từng loại gợi ý; `rows`, `columns` là chỉ số chương trình."""
+    target_levels = np.minimum(levels[rows] + 1, len(DIFFICULTY_LEVELS) - 1)
+    not_self = rows[:, np.newaxis] != columns[np.newaxis, :]
+    return {
+        'similar': not_self,
+        'next': not_self & (levels[columns][np.newaxis, :] == target_levels[:, np.newaxis]),
+    }
+
+
+def compute_index(plan_ids, difficulties, features, k=TOP_K, rows=None, matrix=None):
+    """
+    Trả về dict {(plan_id, kind): [(similar_plan_id, score), ...]} cho các chương trình ở vị trí `rows`
+    (mặc định: tất cả). Chỉ tính các hàng cần thiết của ma trận tương đồng: len(rows) x N.
+    `next` chỉ xét các chương trình có độ khó cao hơn một bậc (bậc cao nhất thì cùng bậc).
+    """
+    matrix = _feature_matrix(features) if matrix is None else matrix
+    levels = _levels(difficulties)
+    rows = np.arange(len(plan_ids)) if rows is None else np.array(sorted(rows), dtype=np.int64)
+    scores = matrix[rows] @ matrix.T
+
+    index = {}
+    for kind, mask in _masks(levels, rows, np.arange(len(plan_ids))).items():
+        columns, top_scores = _top_k(scores, mask, k)
+        for position, row in enumerate(rows):
+            index[(plan_ids[row], kind)] = [
+                (plan_ids[column], round(float(score), 4))
+                for column, score in zip(columns[position], top_scores[position])
+                if np.isfinite(score)
+            ]
+    return index
+
+
+def affected_rows(plan_ids, difficulties, matrix, current, changed_ids, k=TOP_K):
+    """
+    Vị trí các chương trình có thể có top-k thay đổi khi chỉ vector của `changed_ids` đổi
+    (hoặc các chương trình đó bị bỏ khỏi chỉ mục):
+    - chính các chương trình đã đổi;
+    - chương trình có top-k hiện tại chứa một chương trình đã đổi (điểm có thể giảm, cần tìm lại cả hàng);
+    - chương trình mà một chương trình đã đổi nay vượt ngưỡng top-k (điểm thứ k hiện tại).
+    Chỉ cần tính các cột của chương trình đã đổi: N x len(changed), thay vì cả ma trận N x N.
+    """
+    position = {plan_id: row for row, plan_id in enumerate(plan_ids)}
+    rows = {position[plan_id] for plan_id in changed_ids if plan_id in position}
+    for (plan_id, _), entries in current.items():
+        if plan_id in position and any(similar_id in changed_ids for similar_id, _ in entries):
+            rows.add(position[plan_id])
+
+    changed_rows = np.array(sorted(position[plan_id] for plan_id in changed_ids if plan_id in position), dtype=np.int64)
+    if len(changed_rows):
+        levels = _levels(difficulties)
+        all_rows = np.arange(len(plan_ids))
+        scores = matrix @ matrix[changed_rows].T
+        for kind, mask in _masks(levels, all_rows, changed_rows).items():
+            thresholds = np.full(len(plan_ids), -np.inf)
+            for row, plan_id in enumerate(plan_ids):
+                entries = current.get((plan_id, kind), [])
+                if len(entries) >= k:
+                    # Điểm đã lưu được làm tròn 4 chữ số: nới ngưỡng để không bỏ sót
+                    thresholds[row] = entries[-1][1] - 1e-4
+            rows.update(np.flatnonzero(np.any(mask & (scores >= thresholds[:, np.newaxis]), axis=1)).tolist())
+    return rows
+
+
+def refresh_recommendations(full=False, k=TOP_K):
+    """
+    Tính lại vector của các chương trình mới/thay đổi (hoặc tất cả nếu `full`), rồi chỉ tính lại top-k
+    của các chương trình bị ảnh hưởng (xem `affected_rows`) và chỉ ghi những danh sách thực sự thay đổi.
+    Trả về (số vector đã tính lại, số chương trình có danh sách gợi ý thay đổi).
+    """
+    with transaction.atomic():
+        plans = list(WorkoutPlan.objects.filter(is_public=True).order_by('pk').only('pk', 'difficulty'))
+        vectors = {vector.plan_id: vector for vector in PlanFeatureVector.objects.select_for_update()}
+
+        stale = [plan for plan in plans if full or plan.pk not in vectors or vectors[plan.pk].dirty]
+        fresh = build_features(stale)
+        for plan in stale:
+            vectors[plan.pk] = PlanFeatureVector(plan_id=plan.pk, features=fresh[plan.pk], dirty=False)
+        if stale:
+            bulk_upsert(
+                PlanFeatureVector, [vectors[plan.pk] for plan in stale],
+                unique_fields=['plan'], update_fields=['features', 'dirty', 'updated_at'],
+            )
+        current = {}
+        for row in PlanSimilarity.objects.order_by('plan_id', 'kind', 'rank').values_list(
+            'plan_id', 'kind', 'similar_plan_id', 'score'
+        ):
+            current.setdefault((row[0], row[1]), []).append((row[2], row[3]))
+
+        # Chương trình đã chuyển sang riêng tư hoặc đã bị xóa (vẫn còn trong danh sách đã lưu)
+        # thì không còn được gợi ý: các danh sách chứa chúng phải được tính lại
+        public_ids = {plan.pk for plan in plans}
+        referenced_ids = {similar_id for entries in current.values() for similar_id, _ in entries}
+        removed_ids = (set(vectors) | referenced_ids) - public_ids
+        PlanFeatureVector.objects.filter(plan_id__in=removed_ids).delete()
+
+        plan_ids = [plan.pk for plan in plans]
+        difficulties = [plan.difficulty for plan in plans]
+        matrix = _feature_matrix([vectors[plan.pk].features for plan in plans])
+        rows = None
+        if not full:
+            changed_ids = {plan.pk for plan in stale} | removed_ids
+            rows = affected_rows(plan_ids, difficulties, matrix, current, changed_ids, k=k)
+        index = compute_index(plan_ids, difficulties, None, k=k, rows=rows, matrix=matrix) if plan_ids else {}
+
+        changed = {key for key in index if index[key] != current.get(key, [])}
+        changed |= {key for key in current if key[0] not in public_ids}
+        if changed:
+            changed_plans = {plan_id for plan_id, _ in changed}
+            PlanSimilarity.objects.filter(plan_id__in=changed_plans).delete()
+            PlanSimilarity.objects.bulk_create([
+                PlanSimilarity(plan_id=plan_id, similar_plan_id=similar_id, kind=kind, rank=rank, score=score)
+                for (plan_id, kind), entries in index.items() if plan_id in changed_plans
+                for rank, (similar_id, score) in enumerate(entries, start=1)
+            ])
+    return len(stale), len({plan_id for plan_id, _ in changed})
+
+
+def get_recommendations(plan_id, kind, user=None, limit=TOP_K):
+    """Đọc danh sách gợi ý đã tính sẵn; với `next` bỏ qua các chương trình `user` đã hoàn thành."""
+    # Chương trình chuyển sang riêng tư sau lần tính gần nhất không được gợi ý
+    entries = PlanSimilarity.objects.filter(
+        plan_id=plan_id, kind=kind, similar_plan__is_public=True,
+    ).select_related('similar_plan')
+    if kind == 'next' and user is not None and user.is_authenticated:
+        completed = UserPlanProgress.objects.filter(member=user, progress_percent=100).values('plan_id')
+        entries = entries.exclude(similar_plan_id__in=completed)
+    return list(entries[:limit])
@@ -6,29 +6,16 @@ from .models import Exercise, WorkoutPlan, WorkoutDay, WorkoutDayExercise, UserW
 
 class ExerciseSerializer(serializers.ModelSerializer):
     """Serializer cho một bài tập đơn lẻ."""
-    video_url = serializers.SerializerMethodField()
-    gif_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Exercise
-        # Liệt kê các trường, bao gồm cả các trường ảo mới
+        # Các URL media được lưu sẵn trên model (xem Exercise.build_media_urls)
         fields = [
             'id', 'name', 'instructions', 'equipment', 'muscle_group',
             'video_url', 'gif_url', 'ai_supported',
+            'video_thumbnail_url', 'video_low_url', 'gif_thumbnail_url', 'gif_low_url',
         ]
 
-    # Phương thức để lấy giá trị cho trường `video_url`
-    def get_video_url(self, obj):
-        if obj.video and hasattr(obj.video, 'url'):
-            return obj.video.url
-        return None
-
-    # Phương thức để lấy giá trị cho trường `gif_url`
-    def get_gif_url(self, obj):
-        if obj.gif and hasattr(obj.gif, 'url'):
-            return obj.gif.url
-        return None
-
 class WorkoutDayExerciseSerializer(serializers.ModelSerializer):
     """
     Serializer cho "công thức" của một bài tập trong một ngày.
@@ -59,6 +46,11 @@ class WorkoutDaySerializer(serializers.ModelSerializer):
         fields = ['id', 'day_number', 'is_rest_day', 'title', 'exercises', 'is_completed']
 
     def get_is_completed(self, obj):
+        # Nếu view đã nạp sẵn tập hợp ngày đã hoàn thành thì trả lời từ bộ nhớ
+        completed_day_ids = self.context.get('completed_day_ids')
+        if completed_day_ids is not None:
+            return obj.id in completed_day_ids
+
         # `obj` là một instance của WorkoutDay
         # `self.context['request'].user` là user đang gửi request
         user = self.context.get('request').user
@@ -88,11 +80,15 @@ class WorkoutPlanListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'difficulty', 'image_url', 'total_days', 'completed_days']
 
     def get_total_days(self, obj):
-        # `obj` là một instance của WorkoutPlan
-        # `.count()` là một phương thức hiệu quả để đếm số lượng object liên quan
+        # Dùng giá trị đã annotate sẵn (xem WorkoutPlanQuerySet.with_progress_counts)
+        # để không phát sinh thêm query cho mỗi chương trình
+        if hasattr(obj, 'total_days'):
+            return obj.total_days
         return obj.days.count()
 
     def get_completed_days(self, obj):
+        if hasattr(obj, 'completed_days'):
+            return obj.completed_days
         # Lấy user đang gửi request từ context
         user = self.context.get('request').user
         if user and user.is_authenticated:
@@ -118,6 +114,48 @@ class WorkoutPlanDetailSerializer(serializers.ModelSerializer):
         # Bao gồm cả trường `days` đã được định nghĩa ở trên
         fields = ['id', 'name', 'description', 'difficulty', 'image_url', 'days']
 
+class CompletedDayItemSerializer(serializers.Serializer):
+    """Một mục trong lô đồng bộ các ngày tập đã hoàn thành (offline)."""
+    day_id = serializers.IntegerField(min_value=1)
+    completed_at = serializers.DateTimeField(required=False)
+
+
+class PlanRecommendationSerializer(serializers.Serializer):
+    """Một chương trình được gợi ý (đọc từ chỉ mục PlanSimilarity đã tính sẵn)."""
+    id = serializers.IntegerField(source='similar_plan.id')
+    name = serializers.CharField(source='similar_plan.name')
+    description = serializers.CharField(source='similar_plan.description')
+    difficulty = serializers.CharField(source='similar_plan.difficulty')
+    image_url = serializers.URLField(source='similar_plan.image_url')
+    score = serializers.FloatField()
+
+
+class DayOverrideSerializer(serializers.Serializer):
+    """Ghi đè cho một ngày khi nhân bản chương trình; sets/reps/rest áp dụng cho mọi bài tập trong ngày."""
+    day_number = serializers.IntegerField(min_value=1)
+    is_rest_day = serializers.BooleanField(required=False)
+    title = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
+    sets = serializers.IntegerField(min_value=1, required=False)
+    reps = serializers.CharField(max_length=20, required=False)
+    rest_period = serializers.IntegerField(min_value=0, required=False)
+
+
+class PlanCloneSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=150, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    difficulty = serializers.ChoiceField(choices=WorkoutPlan.DIFFICULTY_CHOICES, required=False)
+    is_public = serializers.BooleanField(required=False)
+    # Gán luôn bản nhân bản cho hội viên này (tùy chọn)
+    member_id = serializers.IntegerField(min_value=1, required=False)
+    overrides = DayOverrideSerializer(many=True, required=False)
+
+    def validate_overrides(self, value):
+        day_numbers = [item['day_number'] for item in value]
+        if len(day_numbers) != len(set(day_numbers)):
+            raise serializers.ValidationError("Mỗi day_number chỉ được ghi đè một lần.")
+        return value
+
+
 class UserWorkoutPlanAssignmentSerializer(serializers.ModelSerializer):
     class PlanSummarySerializer(serializers.ModelSerializer):
         class Meta:
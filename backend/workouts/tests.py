@@ -1,3 +1,731 @@
-from django.test import TestCase
+import datetime
+import importlib
+import io
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import cloudinary
+from cloudinary import CloudinaryResource
+from django.apps import apps as django_apps
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from resofit_api import cache_utils
+from users.models import CustomUser
+from .bulk import clone_plan
+from .models import (
+    Exercise, WorkoutPlan, WorkoutDay, WorkoutDayExercise, UserWorkoutProgress, UserPlanProgress,
+    PlanFeatureVector, PlanSimilarity, UserWorkoutPlanAssignment,
+)
+from . import plan_cache
+from .progress import refresh_plan_progress
+from .recommendations import refresh_recommendations
+
+# Cache ngoài database (như Redis) cho các test đếm query hoặc chạy nhiều thread:
+# DatabaseCache mặc định cũng ghi vào database test
+IN_MEMORY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_plan(name, day_count, exercise=None):
+    plan = WorkoutPlan.objects.create(name=name, description='', difficulty='beginner')
+    for day_number in range(1, day_count + 1):
+        day = WorkoutDay.objects.create(plan=plan, day_number=day_number, title=f'Day {day_number}')
+        if exercise:
+            WorkoutDayExercise.objects.create(workout_day=day, exercise=exercise, sets=3, reps='10', rest_period=60)
+    return plan
+
+
+class WorkoutPlanListTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/workouts/plans/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_list_returns_progress_counts(self):
+        plan = create_plan('Plan A', 3)
+        create_plan('Plan B', 2)
+        UserWorkoutProgress.objects.create(member=self.member, workout_day=plan.days.first())
+
+        _, data = self.count_list_queries()
+        by_name = {item['name']: item for item in data}
+
+        self.assertEqual(by_name['Plan A']['total_days'], 3)
+        self.assertEqual(by_name['Plan A']['completed_days'], 1)
+        self.assertEqual(by_name['Plan B']['total_days'], 2)
+        self.assertEqual(by_name['Plan B']['completed_days'], 0)
+
+    def test_list_query_count_is_constant(self):
+        create_plan('Plan 1', 2)
+        small_count, _ = self.count_list_queries()
+
+        for i in range(2, 12):
+            plan = create_plan(f'Plan {i}', 4)
+            UserWorkoutProgress.objects.create(member=self.member, workout_day=plan.days.first())
+        large_count, data = self.count_list_queries()
+
+        self.assertEqual(len(data), 11)
+        self.assertEqual(small_count, large_count)
+
+
+@override_settings(CACHES=IN_MEMORY_CACHE)
+class WorkoutPlanDetailTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.exercise = Exercise.objects.create(name='Push up', muscle_group='Chest')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def count_detail_queries(self, plan):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/workouts/plans/{plan.id}/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_detail_marks_completed_days(self):
+        plan = create_plan('Plan A', 3, exercise=self.exercise)
+        first_day = plan.days.get(day_number=1)
+        UserWorkoutProgress.objects.create(member=self.member, workout_day=first_day)
+
+        _, data = self.count_detail_queries(plan)
+
+        self.assertEqual([day['is_completed'] for day in data['days']], [True, False, False])
+        self.assertEqual(data['days'][0]['exercises'][0]['exercise']['name'], 'Push up')
+
+    def test_detail_query_count_is_constant(self):
+        short_plan = create_plan('Short', 2, exercise=self.exercise)
+        long_plan = create_plan('Long', 30, exercise=self.exercise)
+        for day in long_plan.days.all()[:10]:
+            UserWorkoutProgress.objects.create(member=self.member, workout_day=day)
+
+        short_count, _ = self.count_detail_queries(short_plan)
+        long_count, data = self.count_detail_queries(long_plan)
+
+        self.assertEqual(len(data['days']), 30)
+        self.assertEqual(short_count, long_count)
+        # quyền xem + plan + days + day-exercises (kèm exercise) + tập hợp ngày đã hoàn thành
+        self.assertEqual(long_count, 5)
+
+
+@override_settings(CACHES=IN_MEMORY_CACHE)
+class WorkoutPlanCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.exercise = Exercise.objects.create(name='Squat', muscle_group='Legs')
+        # Thay đổi cấu trúc được gom theo transaction và xử lý khi commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan = create_plan('Plan A', 3, exercise=self.exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_cached_document_only_queries_completion_set(self):
+        self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        self.assertEqual(len(response.data['days']), 3)
+
+    def test_completion_is_overlaid_per_user(self):
+        self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        UserWorkoutProgress.objects.create(member=self.member, workout_day=self.plan.days.get(day_number=2))
+
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        self.assertEqual([day['is_completed'] for day in response.data['days']], [False, True, False])
+
+        other = CustomUser.objects.create_user(username='other', password='pass', role='member')
+        self.client.force_authenticate(other)
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        self.assertEqual([day['is_completed'] for day in response.data['days']], [False, False, False])
+
+    def test_etag_returns_not_modified(self):
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        etag = response['ETag']
+
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        UserWorkoutProgress.objects.create(member=self.member, workout_day=self.plan.days.first())
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_list_and_weak_validators(self):
+        etag = self.client.get(f'/api/workouts/plans/{self.plan.id}/')['ETag']
+        for header in (f'"x", W/{etag}', '*', f'"other", {etag}'):
+            response = self.client.get(f'/api/workouts/plans/{self.plan.id}/', HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+        # Chuỗi con của một entity-tag khác không được coi là khớp
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/', HTTP_IF_NONE_MATCH=f'"x{etag[1:]}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cascade_delete_invalidates_once_per_transaction(self):
+        with mock.patch.object(plan_cache, 'invalidate_plans') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as ctx:
+                    WorkoutDayExercise.objects.filter(workout_day__plan=self.plan).delete()
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertEqual(set(invalidate.call_args.args[0]), {self.plan.id})
+        # Chỉ SELECT + DELETE của chính câu xóa, không có query tra chương trình cho từng dòng
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_structure_change_invalidates_document(self):
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkoutDay.objects.create(plan=self.plan, day_number=4, is_rest_day=True)
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['days']), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exercise.name = 'Back squat'
+            self.exercise.save()
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/')
+        self.assertEqual(response.data['days'][0]['exercises'][0]['exercise']['name'], 'Back squat')
+
+    def test_missing_plan_returns_404(self):
+        response = self.client.get('/api/workouts/plans/999999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def slow_build(plan_id):
+            calls.append(plan_id)
+            time.sleep(0.2)
+            return {'id': plan_id, 'days': []}
+
+        with mock.patch.object(plan_cache, 'build_plan_document', side_effect=slow_build):
+            threads = [threading.Thread(target=plan_cache.get_plan_document, args=(self.plan.id,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+
+
+class SharedCacheInvalidationTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan = create_plan('Plan A', 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_cache_backend_is_shared_between_processes(self):
+        self.assertEqual(cache_utils.check_shared_cache(None), [])
+
+    def test_invalidation_through_another_cache_handle(self):
+        etag = self.client.get(f'/api/workouts/plans/{self.plan.id}/')['ETag']
+
+        # Một process khác (VD: lệnh import) có kết nối cache riêng
+        WorkoutPlan.objects.filter(pk=self.plan.pk).update(name='Plan B')
+        with mock.patch.object(cache_utils, 'cache', caches.create_connection('default')):
+            plan_cache.invalidate_plans([self.plan.id])
+
+        response = self.client.get(f'/api/workouts/plans/{self.plan.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Plan B')
+
+
+@mock.patch.object(cloudinary.config(), 'cloud_name', 'demo')
+class ExerciseMediaUrlTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_urls_are_materialized_on_save(self):
+        exercise = Exercise.objects.create(
+            name='Squat',
+            video='video/upload/v1/exercise_videos/squat.mp4',
+            gif='image/upload/v1/exercise_gifs/squat.gif',
+        )
+        exercise.refresh_from_db()
+
+        self.assertTrue(exercise.video_url.endswith('res.cloudinary.com/demo/video/upload/v1/exercise_videos/squat.mp4'))
+        self.assertIn('so_0', exercise.video_thumbnail_url)
+        self.assertTrue(exercise.video_thumbnail_url.endswith('.jpg'))
+        self.assertIn('q_auto:low', exercise.video_low_url)
+        self.assertTrue(exercise.gif_url.endswith('res.cloudinary.com/demo/image/upload/v1/exercise_gifs/squat.gif'))
+        self.assertTrue(exercise.gif_low_url.endswith('.webp'))
+
+    def test_reads_do_not_call_cloudinary(self):
+        exercise = Exercise.objects.create(name='Squat', video='video/upload/v1/exercise_videos/squat.mp4')
+
+        with mock.patch.object(CloudinaryResource, 'build_url', side_effect=AssertionError('SDK called')):
+            response = self.client.get(f'/api/workouts/exercises/{exercise.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['video_url'], exercise.video_url)
+        self.assertIsNone(response.data['gif_url'])
+
+    def test_backfill_command_fills_missing_urls(self):
+        for i in range(5):
+            Exercise.objects.create(name=f'Exercise {i}', gif=f'image/upload/v1/exercise_gifs/e{i}.gif')
+        Exercise.objects.update(gif_url=None, gif_thumbnail_url=None, gif_low_url=None)
+
+        call_command('backfill_exercise_media', chunk_size=2, stdout=io.StringIO())
+
+        self.assertFalse(Exercise.objects.filter(gif_url__isnull=True).exists())
+        self.assertFalse(Exercise.objects.filter(gif_thumbnail_url__isnull=True).exists())
+
+    def test_backfill_refreshes_documents_served_by_other_processes(self):
+        exercise = Exercise.objects.create(name='Squat', gif='image/upload/v1/exercise_gifs/squat.gif')
+        with self.captureOnCommitCallbacks(execute=True):
+            plan = create_plan('Plan A', 1, exercise=exercise)
+        Exercise.objects.update(gif_url=None, gif_thumbnail_url=None, gif_low_url=None)
+        self.assertIsNone(self.client.get(f'/api/workouts/plans/{plan.id}/').data['days'][0]['exercises'][0]['exercise']['gif_url'])
+
+        # Lệnh chạy trong process riêng, với kết nối cache riêng
+        with mock.patch.object(cache_utils, 'cache', caches.create_connection('default')):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('backfill_exercise_media', stdout=io.StringIO())
+
+        document = self.client.get(f'/api/workouts/plans/{plan.id}/').data
+        self.assertEqual(document['days'][0]['exercises'][0]['exercise']['gif_url'], Exercise.objects.get().gif_url)
+
+
+class ExerciseCatalogTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+        Exercise.objects.create(name='Đẩy ngực với tạ đơn', muscle_group='Ngực', equipment='Dumbbell', ai_supported=True)
+        Exercise.objects.create(name='Đẩy vai', muscle_group='Vai', equipment='Dumbbell')
+        Exercise.objects.create(name='Squat', muscle_group='Đùi', equipment='Body only', ai_supported=True)
+
+    def names(self, params):
+        response = self.client.get('/api/workouts/exercises/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.names({'muscle_group': 'Vai'}), ['Đẩy vai'])
+        self.assertEqual(self.names({'equipment': 'Dumbbell', 'ai_supported': 'true'}), ['Đẩy ngực với tạ đơn'])
+        self.assertEqual(self.names({'ai_supported': 'false'}), ['Đẩy vai'])
+
+    def test_search_is_accent_insensitive(self):
+        self.assertEqual(self.names({'search': 'day'}), ['Đẩy ngực với tạ đơn', 'Đẩy vai'])
+        self.assertEqual(self.names({'search': 'ĐẨY V'}), ['Đẩy vai'])
+
+    def test_cursor_pagination(self):
+        response = self.client.get('/api/workouts/exercises/', {'page_size': 2})
+        first_page = [item['name'] for item in response.data['results']]
+        self.assertEqual(len(first_page), 2)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['name'] for item in response.data['results']], ['Squat'])
+        self.assertIsNone(response.data['next'])
+
+
+class PlanProgressCounterTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.plan = create_plan('Plan A', 4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def complete(self, day_number):
+        day = self.plan.days.get(day_number=day_number)
+        return self.client.post('/api/workouts/progress/complete-day/', {'day_id': day.id}, format='json')
+
+    def test_completion_updates_counter_and_summary(self):
+        self.assertEqual(self.client.get('/api/workouts/progress-summary/').data, {})
+
+        self.assertEqual(self.complete(1).status_code, 201)
+        self.assertEqual(self.complete(2).status_code, 201)
+        self.assertEqual(self.complete(2).status_code, 200)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/workouts/progress-summary/')
+        self.assertEqual(response.data, {
+            'plan_name': 'Plan A', 'completed_days': 2, 'total_days': 4, 'progress_percent': 50,
+        })
+
+    def test_counter_follows_plan_day_changes(self):
+        self.complete(1)
+        WorkoutDay.objects.create(plan=self.plan, day_number=5)
+        counter = UserPlanProgress.objects.get(member=self.member, plan=self.plan)
+        self.assertEqual((counter.completed_days, counter.total_days, counter.progress_percent), (1, 5, 20))
+
+        self.plan.days.get(day_number=1).delete()
+        counter.refresh_from_db()
+        self.assertEqual((counter.completed_days, counter.total_days, counter.progress_percent), (0, 4, 0))
+
+    def test_incremental_and_rebuild_round_the_same_way(self):
+        plan = create_plan('Plan B', 8)
+        day = plan.days.get(day_number=1)
+        self.client.post('/api/workouts/progress/complete-day/', {'day_id': day.id}, format='json')
+        incremental = UserPlanProgress.objects.get(member=self.member, plan=plan).progress_percent
+        refresh_plan_progress(UserWorkoutProgress.objects.filter(member=self.member))
+        rebuilt = UserPlanProgress.objects.get(member=self.member, plan=plan).progress_percent
+        self.assertEqual((incremental, rebuilt), (13, 13))
+
+    def test_deleting_latest_completion_restores_last_completed_at(self):
+        self.complete(1)
+        self.complete(2)
+        first, second = UserWorkoutProgress.objects.order_by('workout_day__day_number')
+        UserWorkoutProgress.objects.filter(pk=first.pk).update(completed_at=second.completed_at - datetime.timedelta(days=1))
+        second.delete()
+        counter = UserPlanProgress.objects.get(member=self.member, plan=self.plan)
+        self.assertEqual(counter.last_completed_at, second.completed_at - datetime.timedelta(days=1))
+
+        UserWorkoutProgress.objects.get().delete()
+        counter.refresh_from_db()
+        self.assertIsNone(counter.last_completed_at)
+
+    def test_rebuild_command_restores_counters(self):
+        self.complete(1)
+        self.complete(3)
+        UserPlanProgress.objects.all().delete()
+
+        call_command('rebuild_plan_progress', stdout=io.StringIO())
+
+        counter = UserPlanProgress.objects.get(member=self.member, plan=self.plan)
+        self.assertEqual((counter.completed_days, counter.total_days, counter.progress_percent), (2, 4, 50))
+
+    def test_migration_backfill_rounds_like_incremental_updates(self):
+        plan = create_plan('Plan B', 8)
+        UserWorkoutProgress.objects.create(member=self.member, workout_day=plan.days.get(day_number=1))
+        UserPlanProgress.objects.all().delete()
+
+        migration = importlib.import_module('workouts.migrations.0010_userplanprogress')
+        migration.populate_plan_progress(django_apps, None)
+
+        # 1/8 = 12.5% làm tròn nửa lên thành 13, như calculate_percent
+        self.assertEqual(UserPlanProgress.objects.get(member=self.member, plan=plan).progress_percent, 13)
+
+
+class BatchCompletionTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.plan = create_plan('Plan A', 7)
+        self.days = list(self.plan.days.all())
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def post_items(self, items):
+        return self.client.post('/api/workouts/progress/complete-days/', {'items': items}, format='json')
+
+    def test_batch_reports_per_item_results(self):
+        UserWorkoutProgress.objects.create(member=self.member, workout_day=self.days[0])
+
+        response = self.post_items([
+            {'day_id': self.days[0].id},
+            {'day_id': self.days[1].id, 'completed_at': '2025-10-01T07:30:00Z'},
+            {'day_id': self.days[1].id},
+            {'day_id': 999999},
+            {'completed_at': 'yesterday'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['duplicate', 'created', 'duplicate', 'not_found', 'invalid'],
+        )
+        progress = UserWorkoutProgress.objects.get(member=self.member, workout_day=self.days[1])
+        self.assertEqual(progress.completed_at.isoformat(), '2025-10-01T07:30:00+00:00')
+
+    def test_batch_uses_constant_queries_and_updates_counter(self):
+        items = [{'day_id': day.id, 'completed_at': f'2025-10-0{i + 1}T07:00:00Z'} for i, day in enumerate(self.days)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post_items(items)
+
+        self.assertEqual(response.data['created'], 7)
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+        counter = UserPlanProgress.objects.get(member=self.member, plan=self.plan)
+        self.assertEqual((counter.completed_days, counter.total_days, counter.progress_percent), (7, 7, 100))
+        self.assertEqual(counter.last_completed_at.isoformat(), '2025-10-07T07:00:00+00:00')
+
+    def test_rows_inserted_by_concurrent_request_are_reported_as_duplicate(self):
+        bulk_create = UserWorkoutProgress.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Mô phỏng request song song chèn cùng ngày tập ngay trước lượt bulk insert
+            UserWorkoutProgress.objects.create(member=self.member, workout_day=self.days[0])
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(UserWorkoutProgress.objects, 'bulk_create', side_effect=racing_bulk_create):
+            response = self.post_items([
+                {'day_id': self.days[0].id, 'completed_at': '2025-10-01T07:30:00Z'},
+                {'day_id': self.days[1].id, 'completed_at': '2025-10-02T07:30:00Z'},
+            ])
+
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([result['status'] for result in response.data['results']], ['duplicate', 'created'])
+
+    def test_rejects_non_list_payload(self):
+        self.assertEqual(self.post_items([]).status_code, 400)
+        response = self.client.post('/api/workouts/progress/complete-days/', {'items': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PlanImportExportTests(TestCase):
+
+    def setUp(self):
+        self.squat = Exercise.objects.create(name='Squat')
+        self.push_up = Exercise.objects.create(name='Push Up')
+        self.plan = create_plan('12 Weeks', 3, exercise=self.squat)
+        WorkoutDayExercise.objects.create(
+            workout_day=self.plan.days.get(day_number=1), exercise=self.push_up, sets=4, reps='8-12', rest_period=90, order=1,
+        )
+        WorkoutDay.objects.create(plan=self.plan, day_number=4, is_rest_day=True, title='Rest')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def structure(self, plan):
+        return [
+            (day.day_number, day.is_rest_day, day.title,
+             [(item.exercise.name, item.sets, item.reps, item.rest_period, item.order) for item in day.exercises.all()])
+            for day in WorkoutPlan.objects.with_structure().get(pk=plan.pk).days.all()
+        ]
+
+    def round_trip(self, filename):
+        path = os.path.join(self.tmpdir.name, filename)
+        call_command('export_workout_plans', path, stderr=io.StringIO())
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('import_workout_plans', path, stdout=io.StringIO())
+        imported = WorkoutPlan.objects.exclude(pk=self.plan.pk).get()
+        self.assertEqual(self.structure(imported), self.structure(self.plan))
+        return len(ctx.captured_queries)
+
+    def test_round_trip_jsonl(self):
+        queries = self.round_trip('plans.jsonl')
+        # Số query không tăng theo số ngày/bài tập
+        self.assertLessEqual(queries, 10)
+
+    def test_round_trip_csv(self):
+        self.round_trip('plans.csv')
+
+    def test_unknown_exercise_rolls_back(self):
+        path = os.path.join(self.tmpdir.name, 'plans.jsonl')
+        call_command('export_workout_plans', path, stderr=io.StringIO())
+        self.push_up.delete()
+
+        with self.assertRaisesMessage(CommandError, 'Push Up'):
+            call_command('import_workout_plans', path, stdout=io.StringIO())
+        self.assertEqual(WorkoutPlan.objects.count(), 1)
+
+    def write(self, filename, content):
+        path = os.path.join(self.tmpdir.name, filename)
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def test_malformed_days_raise_command_error(self):
+        path = self.write('bad.jsonl', '{"name": "Bad", "difficulty": "beginner", "days": [1]}\n')
+        with self.assertRaisesMessage(CommandError, 'bad.jsonl:1'):
+            call_command('import_workout_plans', path, stdout=io.StringIO())
+
+    def test_csv_errors_point_at_the_plan_rows(self):
+        path = os.path.join(self.tmpdir.name, 'plans.csv')
+        call_command('export_workout_plans', path, stderr=io.StringIO())
+        with open(path, encoding='utf-8') as stream:
+            lines = stream.read().splitlines()
+        # Chương trình thứ hai bắt đầu ở dòng ngay sau chương trình đầu tiên, với độ khó sai
+        second = [line.replace(self.plan.difficulty, 'unknown').replace(f'{self.plan.pk},', '0,', 1) for line in lines[1:]]
+        path = self.write('two.csv', '\n'.join(lines + second) + '\n')
+        with self.assertRaisesMessage(CommandError, f'two.csv:{len(lines) + 1}:'):
+            call_command('import_workout_plans', path, stdout=io.StringIO())
+
+    def test_replace_refuses_plans_in_use(self):
+        path = os.path.join(self.tmpdir.name, 'plans.jsonl')
+        call_command('export_workout_plans', path, stderr=io.StringIO())
+        member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        UserWorkoutProgress.objects.create(member=member, workout_day=self.plan.days.get(day_number=1))
+
+        with self.assertRaisesMessage(CommandError, 'không thể thay thế'):
+            call_command('import_workout_plans', path, '--replace', stdout=io.StringIO())
+        UserWorkoutProgress.objects.all().delete()
+        call_command('import_workout_plans', path, '--replace', stdout=io.StringIO())
+        self.assertFalse(WorkoutPlan.objects.filter(pk=self.plan.pk).exists())
+
+    def test_private_clones_are_not_exported_or_replaced(self):
+        pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        clone = clone_plan(self.plan, created_by=pt)
+        path = os.path.join(self.tmpdir.name, 'plans.jsonl')
+        call_command('export_workout_plans', path, stderr=io.StringIO())
+        with open(path, encoding='utf-8') as stream:
+            self.assertEqual(len(stream.readlines()), 1)
+
+        call_command('import_workout_plans', path, '--replace', stdout=io.StringIO())
+        clone.refresh_from_db()
+        self.assertFalse(clone.is_public)
+        self.assertEqual(WorkoutPlan.objects.filter(name=self.plan.name, is_public=True).count(), 1)
+
+
+class PlanCloneTests(TestCase):
+
+    def setUp(self):
+        self.pt = CustomUser.objects.create_user(username='pt', password='pass', role='pt')
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        self.exercise = Exercise.objects.create(name='Squat')
+        self.plan = create_plan('90 Days', 90, exercise=self.exercise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.pt)
+
+    def clone(self, payload):
+        return self.client.post(f'/api/workouts/plans/{self.plan.id}/clone/', payload, format='json')
+
+    def test_clone_uses_constant_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.clone({
+                'name': 'Custom',
+                'member_id': self.member.id,
+                'overrides': [{'day_number': 2, 'sets': 5, 'reps': '5', 'rest_period': 120}, {'day_number': 3, 'is_rest_day': True}],
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertLessEqual(len(ctx.captured_queries), 20)
+
+        clone = WorkoutPlan.objects.get(pk=response.data['id'])
+        self.assertEqual((clone.name, clone.source_plan, clone.created_by, clone.is_public), ('Custom', self.plan, self.pt, False))
+        self.assertEqual(clone.days.count(), 90)
+        self.assertEqual(WorkoutDayExercise.objects.filter(workout_day__plan=clone).count(), 90)
+        day_two = response.data['days'][1]['exercises'][0]
+        self.assertEqual((day_two['sets'], day_two['reps'], day_two['rest_period']), (5, '5', 120))
+        self.assertEqual(response.data['days'][0]['exercises'][0]['sets'], 3)
+        self.assertTrue(response.data['days'][2]['is_rest_day'])
+        self.assertEqual(self.member.assigned_plan.plan, clone)
+
+    def test_private_clone_is_visible_to_creator_and_assigned_member_only(self):
+        clone_id = self.clone({'member_id': self.member.id}).data['id']
+        other = CustomUser.objects.create_user(username='other', password='pass', role='member')
+        for user, visible in ((self.pt, True), (self.member, True), (other, False)):
+            self.client.force_authenticate(user)
+            ids = [plan['id'] for plan in self.client.get('/api/workouts/plans/').data]
+            self.assertEqual(clone_id in ids, visible)
+            self.assertIn(self.plan.id, ids)
+
+    def test_private_clone_cannot_be_read_or_cloned_by_others(self):
+        clone_id = self.clone({'member_id': self.member.id}).data['id']
+        self.assertEqual(self.client.get(f'/api/workouts/plans/{clone_id}/').status_code, 200)
+
+        other_pt = CustomUser.objects.create_user(username='pt2', password='pass', role='pt')
+        self.client.force_authenticate(other_pt)
+        self.assertEqual(self.client.get(f'/api/workouts/plans/{clone_id}/').status_code, 404)
+        self.assertEqual(self.client.post(f'/api/workouts/plans/{clone_id}/clone/', {}, format='json').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/workouts/plans/{clone_id}/similar/').status_code, 404)
+
+    def test_private_clone_cannot_be_assigned_by_others(self):
+        clone_id = self.clone({}).data['id']
+        other_pt = CustomUser.objects.create_user(username='pt2', password='pass', role='pt')
+        self.client.force_authenticate(other_pt)
+        payload = {'member_id': self.member.id, 'plan_id': clone_id}
+        self.assertEqual(self.client.post('/api/workouts/assign-plan/', payload, format='json').status_code, 404)
+        self.assertFalse(UserWorkoutPlanAssignment.objects.exists())
+
+        self.client.force_authenticate(self.pt)
+        self.assertEqual(self.client.post('/api/workouts/assign-plan/', payload, format='json').status_code, 201)
+
+    def test_only_pt_can_clone(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.clone({}).status_code, 403)
+
+    def test_rejects_unknown_member_and_duplicate_overrides(self):
+        self.assertEqual(self.clone({'member_id': 999999}).status_code, 404)
+        response = self.clone({'overrides': [{'day_number': 1, 'sets': 2}, {'day_number': 1, 'sets': 3}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(WorkoutPlan.objects.count(), 1)
+
+
+class PlanRecommendationTests(TestCase):
+
+    def setUp(self):
+        self.member = CustomUser.objects.create_user(username='member', password='pass', role='member')
+        squat = Exercise.objects.create(name='Squat', muscle_group='Legs', equipment='Barbell')
+        lunge = Exercise.objects.create(name='Lunge', muscle_group='Legs', equipment='Body only')
+        bench = Exercise.objects.create(name='Bench Press', muscle_group='Chest', equipment='Barbell')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.legs = create_plan('Legs', 3, exercise=squat)
+            self.legs_hard = create_plan('Legs Hard', 3, exercise=lunge)
+            self.legs_hard.difficulty = 'intermediate'
+            self.legs_hard.save()
+            self.chest = create_plan('Chest', 3, exercise=bench)
+            self.chest_hard = create_plan('Chest Hard', 3, exercise=bench)
+            self.chest_hard.difficulty = 'intermediate'
+            self.chest_hard.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def get_ids(self, plan, kind):
+        response = self.client.get(f'/api/workouts/plans/{plan.id}/{kind}/')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data]
+
+    def test_similar_and_next(self):
+        self.assertEqual(refresh_recommendations(), (4, 4))
+        self.assertEqual(self.get_ids(self.legs, 'similar')[0], self.legs_hard.id)
+        self.assertEqual(self.get_ids(self.legs, 'next'), [self.legs_hard.id, self.chest_hard.id])
+
+        UserPlanProgress.objects.create(member=self.member, plan=self.legs_hard, completed_days=3, total_days=3, progress_percent=100)
+        self.assertEqual(self.get_ids(self.legs, 'next'), [self.chest_hard.id])
+
+    def test_refresh_is_incremental(self):
+        refresh_recommendations()
+        self.assertEqual(refresh_recommendations(), (0, 0))
+
+        # Đổi bài tập của một ngày: chỉ chương trình đó bị tính lại vector
+        day_exercise = WorkoutDayExercise.objects.filter(workout_day__plan=self.chest).first()
+        day_exercise.exercise = Exercise.objects.get(name='Squat')
+        with self.captureOnCommitCallbacks(execute=True):
+            day_exercise.save()
+            # Vector chỉ bị đánh dấu sau khi commit, không thêm UPDATE vào mỗi lần lưu
+            self.assertFalse(PlanFeatureVector.objects.get(plan=self.chest).dirty)
+        self.assertTrue(PlanFeatureVector.objects.get(plan=self.chest).dirty)
+        recomputed, changed = refresh_recommendations()
+        self.assertEqual(recomputed, 1)
+        self.assertGreater(changed, 0)
+        # Kết quả cập nhật từng phần phải khớp với lần tính lại toàn bộ
+        self.assertEqual(refresh_recommendations(full=True), (4, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chest_hard.is_public = False
+            self.chest_hard.save()
+        self.assertEqual(refresh_recommendations(), (0, 4))
+        self.assertEqual(refresh_recommendations(full=True), (3, 0))
+        self.assertFalse(PlanSimilarity.objects.filter(similar_plan=self.chest_hard).exists())
+
+    def test_deleted_plan_is_replaced_in_lists_that_referenced_it(self):
+        refresh_recommendations()
+        referencing = set(PlanSimilarity.objects.filter(similar_plan=self.legs_hard).values_list('plan_id', flat=True))
+        self.assertTrue(referencing)
+
+        deleted_id = self.legs_hard.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.legs_hard.delete()
+        # Danh sách cũ không bị thu ngắn ngay, nhưng chương trình đã xóa không được gợi ý
+        self.assertNotIn(deleted_id, self.get_ids(self.legs, 'similar'))
+
+        self.assertEqual(refresh_recommendations(), (0, len(referencing)))
+        self.assertFalse(PlanSimilarity.objects.filter(similar_plan_id=deleted_id).exists())
+        self.assertEqual(self.get_ids(self.legs, 'similar'), [self.chest.id, self.chest_hard.id])
+        # Kết quả cập nhật từng phần khớp với lần tính lại toàn bộ
+        self.assertEqual(refresh_recommendations(full=True), (3, 0))
+
+        # Bản nhân bản riêng tư không được đưa vào chỉ mục
+        WorkoutPlan.objects.create(name='Private', description='', difficulty='beginner', is_public=False)
+        self.assertEqual(refresh_recommendations(), (0, 0))
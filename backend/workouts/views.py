@@ -1,11 +1,23 @@
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
 from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 
 from users.models import CustomUser
 from users.permissions import IsPT
-from .models import WorkoutPlan, Exercise, UserWorkoutProgress, WorkoutDay, UserWorkoutPlanAssignment
+from .models import WorkoutPlan, Exercise, UserWorkoutProgress, WorkoutDay, UserWorkoutPlanAssignment, \
+    UserPlanProgress, normalize_search_text
+from .bulk import clone_plan
+from .plan_cache import etag_matches, get_plan_access, get_plan_document, get_plan_version, overlay_completion, \
+    plan_etag
+from .recommendations import get_recommendations
+from .progress import record_day_completion, refresh_plan_progress
 from .serializers import WorkoutPlanListSerializer, WorkoutPlanDetailSerializer, ExerciseSerializer, \
-    UserWorkoutPlanAssignmentSerializer
+    UserWorkoutPlanAssignmentSerializer, CompletedDayItemSerializer, PlanCloneSerializer, \
+    PlanRecommendationSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
@@ -22,6 +34,15 @@ class WorkoutPlanViewSet(
     permission_classes = [IsAuthenticated]
     queryset = WorkoutPlan.objects.all()
 
+    def get_queryset(self):
+        # Bản nhân bản riêng chỉ hiện với người tạo và hội viên được gán (với mọi action)
+        queryset = WorkoutPlan.objects.visible_to(self.request.user)
+        if self.action == 'list':
+            # Đếm tổng số ngày / số ngày đã hoàn thành ngay trong SQL,
+            # tránh N+1 query khi danh sách chương trình lớn dần.
+            queryset = queryset.with_progress_counts(self.request.user)
+        return queryset
+
     # Kỹ thuật quan trọng: Chọn Serializer dựa trên hành động (action)
     def get_serializer_class(self):
         if self.action == 'list':
@@ -35,14 +56,132 @@ class WorkoutPlanViewSet(
         # Truyền context (bao gồm cả request) vào serializer
         return {'request': self.request}
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Trả về tài liệu chương trình tập đã được dựng sẵn trong cache,
+        chỉ ghi đè `is_completed` theo user. Hỗ trợ ETag / 304 Not Modified.
+        """
+        plan_id = self.get_visible_plan_id()
+        completed_day_ids = self.get_completed_day_ids(plan_id)
+        etag = plan_etag(plan_id, get_plan_version(plan_id), completed_day_ids)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        version, document = get_plan_document(plan_id)
+        if document is None:
+            raise Http404
+        return Response(
+            overlay_completion(document, completed_day_ids),
+            headers={'ETag': plan_etag(plan_id, version, completed_day_ids)},
+        )
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsPT])
+    def clone(self, request, pk=None):
+        """
+        PT nhân bản một chương trình (kèm ngày tập và bài tập) để chỉnh cho một hội viên.
+        Có thể ghi đè sets/reps/rest theo từng ngày và gán luôn cho hội viên qua `member_id`.
+        """
+        serializer = PlanCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        source = self.get_object()
+        member = None
+        if 'member_id' in data:
+            member = CustomUser.objects.filter(id=data['member_id'], role='member').first()
+            if member is None:
+                return Response({"error": f"Member with id={data['member_id']} not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        day_overrides = {item.pop('day_number'): item for item in data.get('overrides', [])}
+        plan_fields = {field: data[field] for field in ('name', 'description', 'difficulty', 'is_public') if field in data}
+        with transaction.atomic():
+            plan = clone_plan(source, created_by=request.user, day_overrides=day_overrides, **plan_fields)
+            if member is not None:
+                UserWorkoutPlanAssignment.objects.update_or_create(
+                    member=member, defaults={'pt': request.user, 'plan': plan},
+                )
+
+        plan = WorkoutPlan.objects.with_structure().get(pk=plan.pk)
+        return Response(
+            WorkoutPlanDetailSerializer(plan, context={'completed_day_ids': frozenset()}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Các chương trình giống chương trình này nhất (top-k đã tính sẵn)."""
+        return Response(PlanRecommendationSerializer(get_recommendations(self.get_visible_plan_id(), 'similar'), many=True).data)
+
+    @action(detail=True, methods=['get'], url_path='next')
+    def next_plan(self, request, pk=None):
+        """Chương trình nên tập sau khi hoàn thành chương trình này, bỏ qua những chương trình user đã xong."""
+        return Response(PlanRecommendationSerializer(get_recommendations(self.get_visible_plan_id(), 'next', request.user), many=True).data)
+
+    def get_plan_id(self):
+        try:
+            return int(self.kwargs[self.lookup_field])
+        except (TypeError, ValueError):
+            raise Http404
+
+    def get_visible_plan_id(self):
+        """ID chương trình trong URL, 404 nếu user không được xem (kiểm tra trước khi đọc tài liệu đã cache)."""
+        plan_id = self.get_plan_id()
+        access = get_plan_access(plan_id)
+        if access is None:
+            raise Http404
+        if not access['is_public'] and not self.get_queryset().filter(pk=plan_id).exists():
+            raise Http404
+        return plan_id
+
+    def get_completed_day_ids(self, plan_id):
+        """Lấy một lần tập hợp ID các ngày user đã hoàn thành trong chương trình."""
+        user = self.request.user
+        if not user or not user.is_authenticated:
+            return set()
+        return set(
+            UserWorkoutProgress.objects.filter(member=user, workout_day__plan_id=plan_id)
+            .values_list('workout_day_id', flat=True)
+        )
+
+class ExerciseCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # Khớp với các index (muscle_group|equipment|ai_supported, search_name) của Exercise
+    ordering = ('search_name', 'id')
+
+
 class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    ViewSet để xem chi tiết một bài tập.
-    Chỉ cung cấp action `retrieve` (GET /exercises/{id}/).
+    ViewSet để xem danh sách và chi tiết bài tập.
+    Hỗ trợ lọc theo `muscle_group`, `equipment`, `ai_supported`
+    và tìm theo tên không dấu (`search`, khớp tiền tố), phân trang bằng cursor.
     """
     permission_classes = [IsAuthenticated]
-    queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
+    pagination_class = ExerciseCursorPagination
+
+    def get_queryset(self):
+        queryset = Exercise.objects.all()
+        params = self.request.query_params
+
+        muscle_group = params.get('muscle_group')
+        if muscle_group:
+            queryset = queryset.filter(muscle_group=muscle_group)
+
+        equipment = params.get('equipment')
+        if equipment:
+            queryset = queryset.filter(equipment=equipment)
+
+        ai_supported = params.get('ai_supported')
+        if ai_supported is not None:
+            queryset = queryset.filter(ai_supported=ai_supported.lower() in ('true', '1'))
+
+        search = normalize_search_text(params.get('search'))
+        if search:
+            queryset = queryset.filter(search_name__startswith=search)
+
+        return queryset
 
 class MarkDayAsCompletedView(APIView):
     permission_classes = [IsAuthenticated]
@@ -54,11 +193,15 @@ class MarkDayAsCompletedView(APIView):
 
         try:
             workout_day = WorkoutDay.objects.get(id=day_id)
-            # Dùng get_or_create để tránh tạo trùng lặp
-            progress, created = UserWorkoutProgress.objects.get_or_create(
-                member=request.user,
-                workout_day=workout_day
-            )
+            with transaction.atomic():
+                # Dùng get_or_create để tránh tạo trùng lặp
+                progress, created = UserWorkoutProgress.objects.get_or_create(
+                    member=request.user,
+                    workout_day=workout_day
+                )
+                if created:
+                    # Cập nhật bộ đếm tiến độ trong cùng transaction
+                    record_day_completion(progress)
             if created:
                 return Response({"status": "Day marked as completed."}, status=status.HTTP_201_CREATED)
             else:
@@ -67,6 +210,82 @@ class MarkDayAsCompletedView(APIView):
             return Response({"error": "WorkoutDay not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
+class BatchMarkDaysCompletedView(APIView):
+    """
+    API đồng bộ một lô ngày tập đã hoàn thành (VD: các buổi tập offline).
+    Body: {"items": [{"day_id": 1, "completed_at": "2025-10-01T07:30:00Z"}, ...]}
+    Trả về kết quả cho từng mục: created / duplicate / not_found / invalid.
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 500
+
+    def post(self, request, *args, **kwargs):
+        items = request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({"error": "items must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({"error": f"At most {self.max_items} items per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        results = []
+        valid_items = []
+        for item in items:
+            serializer = CompletedDayItemSerializer(data=item if isinstance(item, dict) else {})
+            if serializer.is_valid():
+                data = serializer.validated_data
+                # Không chấp nhận thời điểm hoàn thành ở tương lai
+                data['completed_at'] = min(data.get('completed_at') or now, now)
+                results.append({'day_id': data['day_id'], 'status': None})
+                valid_items.append((results[-1], data))
+            else:
+                results.append({'day_id': item.get('day_id') if isinstance(item, dict) else None,
+                                'status': 'invalid', 'errors': serializer.errors})
+
+        day_ids = {data['day_id'] for _, data in valid_items}
+        # Kiểm tra tất cả day_id bằng một query duy nhất
+        day_plans = dict(WorkoutDay.objects.filter(id__in=day_ids).values_list('id', 'plan_id'))
+
+        with transaction.atomic():
+            already_completed = set(
+                UserWorkoutProgress.objects.filter(member=request.user, workout_day_id__in=day_plans)
+                .values_list('workout_day_id', flat=True)
+            )
+            new_progress = {}
+            for result, data in valid_items:
+                day_id = data['day_id']
+                if day_id not in day_plans:
+                    result['status'] = 'not_found'
+                elif day_id in already_completed:
+                    result['status'] = 'duplicate'
+                else:
+                    already_completed.add(day_id)
+                    new_progress[day_id] = (result, UserWorkoutProgress(
+                        member=request.user, workout_day_id=day_id, completed_at=data['completed_at']
+                    ))
+
+            if new_progress:
+                # Bỏ qua bản ghi trùng khóa (member, workout_day) nếu có request song song
+                UserWorkoutProgress.objects.bulk_create(
+                    [progress for _, progress in new_progress.values()], ignore_conflicts=True
+                )
+                # bulk_create không cho biết dòng nào bị bỏ qua: đọc lại để dòng do request khác
+                # chèn trước (thời điểm hoàn thành khác) được báo là duplicate
+                stored = dict(
+                    UserWorkoutProgress.objects.filter(member=request.user, workout_day_id__in=new_progress)
+                    .values_list('workout_day_id', 'completed_at')
+                )
+                for day_id, (result, progress) in new_progress.items():
+                    result['status'] = 'created' if stored.get(day_id) == progress.completed_at else 'duplicate'
+                affected_plans = {day_plans[day_id] for day_id in new_progress}
+                refresh_plan_progress(UserWorkoutProgress.objects.filter(
+                    member=request.user, workout_day__plan_id__in=affected_plans
+                ))
+
+        created = sum(result['status'] == 'created' for result in results)
+        return Response({'created': created, 'results': results})
+
+
 class WorkoutProgressSummaryView(APIView):
     """
     API để lấy thông tin tóm tắt về tiến độ tập luyện của người dùng hiện tại.
@@ -74,38 +293,23 @@ class WorkoutProgressSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        # Lấy bản ghi tiến độ (ngày đã hoàn thành) gần nhất của người dùng
-        last_progress = UserWorkoutProgress.objects.filter(member=request.user).order_by('-completed_at').first()
+        # Đọc thẳng bộ đếm đã được duy trì sẵn của chương trình tập gần nhất
+        progress = UserPlanProgress.objects.filter(
+            member=request.user,
+            completed_days__gt=0
+        ).select_related('plan').order_by('-last_completed_at').first()
 
         # Nếu không tìm thấy bản ghi nào, có nghĩa là người dùng chưa tập ngày nào
-        if not last_progress:
+        if not progress:
             # Trả về một object rỗng để frontend có thể xử lý
             return Response({})
 
-        # Từ bản ghi tiến độ, tìm ra chương trình tập liên quan
-        target_plan = last_progress.workout_day.plan
-
-        # Đếm tổng số ngày (không tính ngày nghỉ) của chương trình đó
-        # total_days = target_plan.days.filter(is_rest_day=False).count()
-        total_days = target_plan.days.count()  # Hoặc đếm tất cả các ngày
-
-        # Đếm số ngày đã hoàn thành của user này TRONG chương trình đó
-        completed_days = UserWorkoutProgress.objects.filter(
-            member=request.user,
-            workout_day__plan=target_plan
-        ).count()
-
-        # Tính toán phần trăm
-        progress_percent = 0
-        if total_days > 0:
-            progress_percent = (completed_days / total_days) * 100
-
         # Xây dựng dữ liệu trả về
         response_data = {
-            'plan_name': target_plan.name,
-            'completed_days': completed_days,
-            'total_days': total_days,
-            'progress_percent': round(progress_percent)
+            'plan_name': progress.plan.name,
+            'completed_days': progress.completed_days,
+            'total_days': progress.total_days,
+            'progress_percent': progress.progress_percent
         }
 
         return Response(response_data)
@@ -128,8 +332,8 @@ class AssignWorkoutPlanView(APIView):
         try:
             # KIỂM TRA DỮ LIỆU TRƯỚC
             member = CustomUser.objects.get(id=member_id, role='member')
-            plan = WorkoutPlan.objects.get(id=plan_id)
-            pt_user = request.user
+            # Bản nhân bản riêng tư của PT khác không được gán (trả 404 như khi xem)
+            plan = WorkoutPlan.objects.visible_to(pt_user).get(id=plan_id)
 
             # Logic update_or_create
             assignment, created = UserWorkoutPlanAssignment.objects.update_or_create(
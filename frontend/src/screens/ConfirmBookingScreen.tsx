@@ -83,8 +83,13 @@ const ConfirmBookingScreen = () => {
           : "Bạn đã đặt lịch tự tập thành công!",
         [{ text: "OK", onPress: () => navigation.goBack() }]
       );
-    } catch (error) {
-      Alert.alert("Lỗi", "Không thể tạo lịch hẹn. Vui lòng thử lại.");
+    } catch (error: any) {
+      if (error.response && error.response.status === 409) {
+        // PT đã có lịch hẹn khác trong khung giờ này
+        Alert.alert("Khung giờ đã kín", "PT đã có lịch trong khung giờ này. Vui lòng chọn giờ khác.");
+      } else {
+        Alert.alert("Lỗi", "Không thể tạo lịch hẹn. Vui lòng thử lại.");
+      }
       console.error(error);
     } finally {
       setLoading(false);
@@ -1,4 +1,4 @@
-import React, { useState, useCallback } from "react";
+import React, { useState, useCallback, useRef } from "react";
 import { View, Text, StyleSheet, ScrollView, Image, Alert } from "react-native";
 import { SafeAreaView } from "react-native-safe-area-context";
 import { useAuth } from "../context/AuthContext";
@@ -76,17 +76,53 @@ const HomeScreen = () => {
       loadAllData();
     }, [fetchData])
   );
-  const handleAddWater = async () => {
-    const amountToAdd = 250;
-    try {
-      const response = await api.post("/api/tracking/daily-water/", {
-        amount: amountToAdd,
-      });
-      // Cập nhật lại state với dữ liệu mới từ server
-      setWaterLog(response.data);
-    } catch (error) {
+  // Gộp các lượt bấm liên tiếp thành một request; mỗi lô có `seq` riêng để server bỏ qua lượt gửi lại.
+  // Mỗi lúc chỉ có một request đang gửi, lượt bấm trong lúc đó được gộp vào lô kế tiếp.
+  const pendingWater = useRef(0);
+  const waterFlushTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const waterFlushing = useRef(false);
+
+  const flushWater = async () => {
+    if (waterFlushing.current) return;
+    const amount = pendingWater.current;
+    if (amount <= 0) return;
+    waterFlushing.current = true;
+    pendingWater.current = 0;
+    const seq = Date.now();
+    let sent = false;
+    for (let attempt = 0; attempt < 3 && !sent; attempt++) {
+      try {
+        const response = await api.post("/api/tracking/daily-water/", {
+          amount,
+          seq,
+        });
+        // Cập nhật lại state với dữ liệu mới từ server (cộng các lượt bấm chưa gửi)
+        setWaterLog({
+          ...response.data,
+          amount: response.data.amount + pendingWater.current,
+        });
+        sent = true;
+      } catch (error) {
+        // Thử lại với cùng seq, server sẽ không cộng hai lần
+      }
+    }
+    waterFlushing.current = false;
+    if (!sent) {
       Alert.alert("Lỗi", "Không thể cập nhật lượng nước.");
+      return;
     }
+    // Gửi tiếp các lượt bấm đến trong lúc request trước đang chạy
+    if (pendingWater.current > 0) flushWater();
+  };
+
+  const handleAddWater = () => {
+    const amountToAdd = 250;
+    pendingWater.current += amountToAdd;
+    setWaterLog((prev) =>
+      prev ? { ...prev, amount: prev.amount + amountToAdd } : prev
+    );
+    if (waterFlushTimer.current) clearTimeout(waterFlushTimer.current);
+    waterFlushTimer.current = setTimeout(flushWater, 800);
   };
   const waterTarget = 3000;
   const waterProgress = waterLog
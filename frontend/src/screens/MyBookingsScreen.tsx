@@ -10,27 +10,68 @@ import {
 import { SafeAreaView } from "react-native-safe-area-context";
 import { useFocusEffect, useNavigation } from "@react-navigation/native";
 import { Ionicons } from "@expo/vector-icons";
-import moment from "moment";
-import "moment/locale/vi";
 
 import api from "../api/api";
 import { Booking, MemberNavigationProp } from "../navigation/types";
 import BookingItem from "../screens/bookings_components/BookingItem";
 
+// Lịch đã qua (mới nhất trước): trang đầu khi chưa có cursor, sau đó theo cursor `next`
+const fetchPastPage = async (cursor?: string | null) => {
+  const response = cursor
+    ? await api.get(cursor)
+    : await api.get("/api/gyms/bookings/", {
+        params: { to: new Date().toISOString() },
+      });
+  return response.data;
+};
+
 const MyBookingsScreen = () => {
   const navigation = useNavigation<MemberNavigationProp>();
-  const [bookings, setBookings] = useState<Booking[]>([]);
+  const [upcoming, setUpcoming] = useState<Booking[]>([]);
+  const [past, setPast] = useState<Booking[]>([]);
+  // Cursor trang tiếp theo; pastNext là undefined khi chưa tải trang đầu của lịch đã qua
+  const [upcomingNext, setUpcomingNext] = useState<string | null>(null);
+  const [pastNext, setPastNext] = useState<string | null | undefined>(undefined);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchMyBookings = useCallback(async () => {
     try {
-      const response = await api.get("/api/gyms/bookings/");
-      setBookings(Array.isArray(response.data) ? response.data : []);
+      // API phân trang theo start_time: lịch sắp tới tăng dần; lịch đã qua chỉ tải sau khi đã hết lịch sắp tới
+      const response = await api.get("/api/gyms/bookings/", {
+        params: { from: new Date().toISOString(), order: "asc" },
+      });
+      const pastPage = response.data.next ? null : await fetchPastPage();
+      setUpcoming(response.data.results || []);
+      setUpcomingNext(response.data.next);
+      setPast(pastPage?.results || []);
+      setPastNext(pastPage ? pastPage.next : undefined);
     } catch (error) {
       console.error(error);
     }
   }, []);
 
+  // Tải trang tiếp theo (cursor) khi cuộn đến cuối danh sách
+  const fetchMore = async () => {
+    if (loadingMore || (!upcomingNext && pastNext === null)) return;
+    setLoadingMore(true);
+    try {
+      if (upcomingNext) {
+        const response = await api.get(upcomingNext);
+        setUpcoming((current) => [...current, ...response.data.results]);
+        setUpcomingNext(response.data.next);
+      } else {
+        const page = await fetchPastPage(pastNext);
+        setPast((current) => [...current, ...page.results]);
+        setPastNext(page.next);
+      }
+    } catch (error) {
+      console.error("Failed to fetch more bookings", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useFocusEffect(
     useCallback(() => {
       const loadData = async () => {
@@ -43,19 +84,12 @@ const MyBookingsScreen = () => {
   );
 
   const sections = useMemo(() => {
-    moment.locale("vi");
-    const now = moment();
-    const upcoming = bookings
-      .filter((b) => moment(b.start_time).isSameOrAfter(now))
-      .sort((a, b) => moment(a.start_time).diff(moment(b.start_time)));
-    const past = bookings.filter((b) => moment(b.start_time).isBefore(now));
-
     const data = [];
     if (upcoming.length > 0)
       data.push({ title: "Lịch hẹn Sắp tới", data: upcoming });
     if (past.length > 0) data.push({ title: "Lịch hẹn Đã qua", data: past });
     return data;
-  }, [bookings]);
+  }, [upcoming, past]);
 
   if (loading) {
     return (
@@ -80,6 +114,11 @@ const MyBookingsScreen = () => {
           <Text style={styles.sectionHeader}>{title}</Text>
         )}
         ListHeaderComponent={<Text style={styles.title}>Lịch hẹn của tôi</Text>}
+        onEndReached={fetchMore}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={
+          loadingMore ? <ActivityIndicator color="#A0FF00" /> : null
+        }
         ListEmptyComponent={
           <View style={styles.emptyContainer}>
             <Ionicons name="calendar-outline" size={80} color="#333" />
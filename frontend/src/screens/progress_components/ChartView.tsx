@@ -12,7 +12,6 @@ import RNPickerSelect from "react-native-picker-select";
 import { Ionicons } from "@expo/vector-icons";
 import moment from "moment";
 import api from "../../api/api";
-import { Log } from "../../navigation/types";
 import Animated, { FadeIn } from "react-native-reanimated";
 
 const screenWidth = Dimensions.get("window").width;
@@ -21,6 +20,17 @@ interface ChartViewProps {
   period: "month" | "year";
   memberId?: number;
 }
+// Dữ liệu dạng cột từ /api/tracking/logs/series/
+type ProgressSeries = {
+  dates: string[];
+  weight: number[];
+  bmi: (number | null)[];
+};
+type SeriesPoint = { date: string; weight: number; bmi: number | null };
+
+// Số điểm tối đa server trả về (giảm mẫu bằng LTTB), đủ cho chiều rộng biểu đồ
+const MAX_CHART_POINTS = 60;
+
 type ChartDataType = {
   labels: string[];
   datasets: { data: number[] }[];
@@ -28,7 +38,7 @@ type ChartDataType = {
 };
 
 const ChartView: React.FC<ChartViewProps> = ({ period, memberId }) => {
-  const [data, setData] = useState<Log[]>([]);
+  const [data, setData] = useState<SeriesPoint[]>([]);
   const [loading, setLoading] = useState(true);
   const [chartType, setChartType] = useState<"weight" | "bmi">("weight");
   // Tạo danh sách năm và tháng cho dropdown
@@ -49,15 +59,22 @@ const ChartView: React.FC<ChartViewProps> = ({ period, memberId }) => {
     const fetchChartData = async () => {
       setLoading(true);
       try {
-        let apiUrl = `/api/tracking/logs/?year=${selectedYear}`;
+        let apiUrl = `/api/tracking/logs/series/?year=${selectedYear}&points=${MAX_CHART_POINTS}`;
         if (period === "month") {
           apiUrl += `&month=${selectedMonth}`;
         }
         if (memberId) {
           apiUrl += `&member_id=${memberId}`;
         }
-        const response = await api.get(apiUrl);
-        setData(Array.isArray(response.data) ? response.data : []);
+        const response = await api.get<ProgressSeries>(apiUrl);
+        const series = response.data;
+        setData(
+          (series?.dates ?? []).map((date, index) => ({
+            date,
+            weight: series.weight[index],
+            bmi: series.bmi[index],
+          }))
+        );
       } catch (error) {
         console.error(`Failed to fetch ${period} data`, error);
         setData([]);
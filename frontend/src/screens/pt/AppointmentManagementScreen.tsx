@@ -79,13 +79,16 @@ const AppointmentItem: React.FC<{ item: Booking; onUpdate: () => void }> = ({
 
 const AppointmentManagementScreen = () => {
   const [bookings, setBookings] = useState<Booking[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchAppointments = useCallback(async () => {
     setLoading(true);
     try {
       const response = await api.get("/api/gyms/bookings/");
-      setBookings(response.data);
+      setBookings(response.data.results);
+      setNextPage(response.data.next);
     } catch (error) {
       Alert.alert("Lỗi", "Không thể tải danh sách lịch hẹn.");
     } finally {
@@ -93,22 +96,25 @@ const AppointmentManagementScreen = () => {
     }
   }, []);
 
+  // Tải trang tiếp theo (cursor) khi cuộn đến cuối danh sách
+  const fetchMore = async () => {
+    if (!nextPage || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get(nextPage);
+      setBookings((current) => [...current, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (error) {
+      console.error("Failed to fetch more appointments", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useFocusEffect(
     useCallback(() => {
-      const fetchData = async () => {
-        setLoading(true);
-        try {
-          const response = await api.get("/api/gyms/bookings/");
-          setBookings(response.data);
-        } catch (error) {
-          Alert.alert("Lỗi", "Không thể tải danh sách lịch hẹn.");
-        } finally {
-          setLoading(false);
-        }
-      };
-
-      fetchData();
-    }, [])
+      fetchAppointments();
+    }, [fetchAppointments])
   );
 
   if (loading)
@@ -125,6 +131,11 @@ const AppointmentManagementScreen = () => {
           <AppointmentItem item={item} onUpdate={fetchAppointments} />
         )}
         keyExtractor={(item) => item.id.toString()}
+        onEndReached={fetchMore}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={
+          loadingMore ? <ActivityIndicator color="#A0FF00" /> : null
+        }
         ListEmptyComponent={
           <Text style={styles.emptyText}>Không có lịch hẹn nào.</Text>
         }
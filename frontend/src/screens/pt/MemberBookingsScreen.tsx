@@ -50,22 +50,70 @@ const MemberBookingsScreen = () => {
   const route = useRoute<RouteProp<PTStackParamList, "MemberBookings">>();
   const { memberId, memberName } = route.params;
 
-  const [bookings, setBookings] = useState<Booking[]>([]);
+  const [upcoming, setUpcoming] = useState<Booking[]>([]);
+  const [past, setPast] = useState<Booking[]>([]);
+  // Cursor trang tiếp theo; pastNext là undefined khi chưa tải trang đầu của lịch đã qua
+  const [upcomingNext, setUpcomingNext] = useState<string | null>(null);
+  const [pastNext, setPastNext] = useState<string | null | undefined>(undefined);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Lịch đã qua (mới nhất trước): trang đầu khi chưa có cursor, sau đó theo cursor `next`
+  const fetchPastPage = useCallback(
+    async (cursor?: string | null) => {
+      const response = cursor
+        ? await api.get(cursor)
+        : await api.get("/api/gyms/bookings/", {
+            params: { member_id: memberId, to: new Date().toISOString() },
+          });
+      return response.data;
+    },
+    [memberId]
+  );
 
   const fetchBookings = useCallback(async () => {
     setLoading(true);
     try {
-      const response = await api.get(
-        `/api/gyms/bookings/?member_id=${memberId}`
-      );
-      setBookings(Array.isArray(response.data) ? response.data : []);
+      // Lịch sắp tới tăng dần; lịch đã qua chỉ tải sau khi đã hết lịch sắp tới
+      const response = await api.get("/api/gyms/bookings/", {
+        params: {
+          member_id: memberId,
+          from: new Date().toISOString(),
+          order: "asc",
+        },
+      });
+      const pastPage = response.data.next ? null : await fetchPastPage();
+      setUpcoming(response.data.results || []);
+      setUpcomingNext(response.data.next);
+      setPast(pastPage?.results || []);
+      setPastNext(pastPage ? pastPage.next : undefined);
     } catch (error) {
       console.error("Failed to fetch member bookings", error);
     } finally {
       setLoading(false);
     }
-  }, [memberId]);
+  }, [memberId, fetchPastPage]);
+
+  // Tải trang tiếp theo (cursor) khi cuộn đến cuối danh sách
+  const fetchMore = async () => {
+    if (loadingMore || (!upcomingNext && pastNext === null)) return;
+    setLoadingMore(true);
+    try {
+      if (upcomingNext) {
+        const response = await api.get(upcomingNext);
+        setUpcoming((current) => [...current, ...response.data.results]);
+        setUpcomingNext(response.data.next);
+      } else {
+        const page = await fetchPastPage(pastNext);
+        setPast((current) => [...current, ...page.results]);
+        setPastNext(page.next);
+      }
+    } catch (error) {
+      console.error("Failed to fetch more member bookings", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useFocusEffect(
     useCallback(() => {
@@ -74,17 +122,12 @@ const MemberBookingsScreen = () => {
   );
 
   const sections = useMemo(() => {
-    moment.locale("vi");
-    const now = moment();
-    const upcoming = bookings.filter((b) => moment(b.start_time).isAfter(now));
-    const past = bookings.filter((b) => moment(b.start_time).isBefore(now));
-
     const data = [];
     if (upcoming.length > 0)
-      data.push({ title: "Lịch hẹn Sắp tới", data: upcoming.reverse() });
+      data.push({ title: "Lịch hẹn Sắp tới", data: upcoming });
     if (past.length > 0) data.push({ title: "Lịch hẹn Đã qua", data: past });
     return data;
-  }, [bookings]);
+  }, [upcoming, past]);
 
   if (loading) {
     return (
@@ -104,6 +147,11 @@ const MemberBookingsScreen = () => {
         ListHeaderComponent={
           <Text style={styles.title}>Lịch hẹn của {memberName}</Text>
         }
+        onEndReached={fetchMore}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={
+          loadingMore ? <ActivityIndicator color="#A0FF00" /> : null
+        }
         ListEmptyComponent={
           <Text style={{ color: "gray", textAlign: "center", marginTop: 50 }}>
             Hội viên này chưa có lịch hẹn nào.